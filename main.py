@@ -22,6 +22,9 @@ if not groq_api_key:
     raise ValueError("GROQ_API_KEY is not set in the environment variables.")
 doc_processor = DocumentProcessor()
 
+# Start loading the embedding model now; the first question no longer waits for it
+Utils.embedding_model_warmup()
+
 
 def main():
     """
@@ -73,6 +76,16 @@ def main():
             value=10,
             help="Higher values provide more context but use more tokens"
         )
+        stream_answers = st.checkbox(
+            "Stream answers as they are generated",
+            value=True,
+            help="Show the answer token by token instead of waiting for all of it"
+        )
+        rerank_chunks = st.checkbox(
+            "Rerank chunks with a cross-encoder",
+            value=False,
+            help="Sends fewer, more relevant chunks at the cost of some CPU time per question"
+        )
         
     # Show helpful info if no API key
     if not groq_api_key:
@@ -92,11 +105,12 @@ def main():
     
     # Initialize clients
     groq_client = Utils.initialize_groq(groq_api_key)
-    embedding_model = Utils.load_embedding_model()
     
     # Store selected model and settings in session state
     st.session_state.selected_model = selected_model
     st.session_state.max_history = max_history
+    st.session_state.stream_answers = stream_answers
+    st.session_state.rerank_chunks = rerank_chunks
     
     # File upload widget
     uploaded_file = st.file_uploader(
@@ -107,7 +121,17 @@ def main():
     
     # Process uploaded file
     if uploaded_file is not None:
+        # Only wait for the embedding model once there is a document to embed
+        if not Utils.embedding_model_warmup().is_ready():
+            with st.spinner("🧠 Loading the embedding model..."):
+                embedding_model = Utils.load_embedding_model()
+        else:
+            embedding_model = Utils.load_embedding_model()
         doc_processor.process_document(uploaded_file, groq_client, embedding_model)
+
+        # Rendered after processing, so it already includes this run's stages
+        with st.sidebar:
+            doc_processor.show_timing_breakdown()
     else:
         # Show instructions when no file is uploaded
         st.markdown("""
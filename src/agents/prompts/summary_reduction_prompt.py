@@ -0,0 +1,33 @@
+system_prompt = """
+Here is an abstract of a document and summaries of consecutive parts of the document.
+Your task is to combine the summaries into one summary of those parts, in the context of the abstract.
+Keep every key finding, method and conclusion, drop repetition, and keep the order of the document.
+The summary should be in the same language as the abstract and summaries.
+
+<abstract>
+{abstract}
+</abstract>
+<summaries>
+{summaries}
+</summaries>
+<Requirement>
+
+You are expected to provide a summary that is concise, coherent, and relevant to the abstract.
+The summary should not be more than {max_words} words.
+"""
+
+
+def get_summary_reduction_prompt(abstract: str, summaries: list, max_words: int = 250) -> str:
+    """
+    Generate a prompt that merges several part summaries into one.
+
+    Args:
+        abstract (str): The abstract of the document.
+        summaries (list): Summaries of consecutive parts, in document order.
+        max_words (int): Length limit of the merged summary.
+
+    Returns:
+        str: The formatted prompt for merging the summaries.
+    """
+    numbered = "\n".join(f"{i}. {summary}" for i, summary in enumerate(summaries, start=1))
+    return system_prompt.format(abstract=abstract, summaries=numbered, max_words=max_words)
@@ -0,0 +1,297 @@
+from pathlib import Path
+import sys
+
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import json
+import os
+import re
+import time
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from agents.prompts.paragraph_summarization_prompt import get_paragraph_summarization_prompt_with_empty_check
+from agents.prompts.summary_reduction_prompt import get_summary_reduction_prompt
+from agents.summary_cache import SummaryCache
+
+
+class DocumentSummarizer:
+    """
+    Summarizes a whole document with a concurrent map-reduce over its paragraphs
+
+    This class:
+    1. Splits the pages into paragraphs and finds the document's abstract
+    2. Map: summarizes every paragraph against the abstract with the paragraph
+       summarization prompt, with at most max_concurrency Groq calls in flight
+    3. Reduce: merges the paragraph summaries in document order, reduce_fanout
+       at a time, level by level until one summary is left
+    4. Caches every summary by a hash of its input, so summarizing the same or
+       a revised document only pays for the paragraphs that changed
+    """
+
+    MAX_SUMMARY_TOKENS = 400
+    # Answers of the paragraph prompt that carry no content
+    SKIPPED_ANSWERS = ("not relevant", "empty paragraph", "empty abstract")
+
+    def __init__(self, client, model_name="llama-3.1-8b-instant", cache=None, max_concurrency=8,
+                 max_paragraph_chars=2000, min_paragraph_chars=300, reduce_fanout=8):
+        """
+        Initialize the summarizer
+
+        Args:
+            client: Groq client, GroqPool or LocalLLM
+            model_name (str): Groq model to use
+            cache (SummaryCache): Cache of summaries, an in-memory one if omitted
+            max_concurrency (int): Groq requests in flight at once
+            max_paragraph_chars (int): Longer paragraphs are split
+            min_paragraph_chars (int): Shorter paragraphs are merged with the next one
+            reduce_fanout (int): Summaries merged by one reduce call
+        """
+        self.client = client
+        self.model_name = model_name
+        self.cache = cache if cache is not None else SummaryCache()
+        self.max_concurrency = max_concurrency
+        self.max_paragraph_chars = max_paragraph_chars
+        self.min_paragraph_chars = min_paragraph_chars
+        self.reduce_fanout = max(reduce_fanout, 2)
+
+    def split_paragraphs(self, pages):
+        """
+        Split pages into paragraphs of a useful size
+
+        Blank lines mark paragraphs. Short ones are merged with those after
+        them until they reach min_paragraph_chars, so an edit only moves the
+        boundaries up to the next full-sized paragraph and the rest of the
+        document keeps its cache keys.
+
+        Args:
+            pages (list): LangChain Documents, one per page
+
+        Returns:
+            list: Paragraph texts with whitespace collapsed, in document order
+        """
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.max_paragraph_chars,
+            chunk_overlap=0,
+            separators=["\n", ". ", " ", ""],
+            length_function=len,
+        )
+        paragraphs = []
+        pending = ""
+        for page in pages:
+            for block in re.split(r"\n\s*\n", page.page_content):
+                if not block.strip():
+                    continue
+                if len(block) > self.max_paragraph_chars:
+                    parts = splitter.split_text(block)
+                else:
+                    parts = [block]
+                for part in parts:
+                    part = re.sub(r"\s+", " ", part).strip()
+                    pending = f"{pending} {part}".strip()
+                    if len(pending) >= self.min_paragraph_chars:
+                        paragraphs.append(pending)
+                        pending = ""
+        if pending:
+            paragraphs.append(pending)
+        return paragraphs
+
+    @staticmethod
+    def find_abstract(paragraphs, max_chars=2000):
+        """
+        Find the abstract of a document
+
+        Args:
+            paragraphs (list): Paragraphs in document order
+            max_chars (int): Length limit of the abstract
+
+        Returns:
+            str: The paragraph headed "Abstract", or the first paragraph
+        """
+        for i, paragraph in enumerate(paragraphs):
+            match = re.match(r"\s*abstract\b[\s:.\-—]*", paragraph, flags=re.IGNORECASE)
+            if match:
+                abstract = paragraph[match.end():] or (paragraphs[i + 1] if i + 1 < len(paragraphs) else "")
+                return abstract[:max_chars]
+        return paragraphs[0][:max_chars] if paragraphs else ""
+
+    def summarize(self, pages, abstract=None, progress_callback=None):
+        """
+        Summarize a whole document
+
+        Args:
+            pages (list): LangChain Documents, one per page
+            abstract (str): Abstract to summarize against, found in the text if omitted
+            progress_callback (callable): Called on the calling thread with
+                (summaries_done, summaries_total) after every paragraph and merge
+
+        Returns:
+            dict: summary, abstract, paragraphs, llm_calls, cached, skipped
+                (paragraphs without content), failed (paragraphs whose Groq
+                call failed), levels (reduce levels) and timings in seconds
+
+        Raises:
+            ValueError: If the document has no text
+            Exception: The Groq error, if no paragraph could be summarized or a
+                merge failed
+        """
+        paragraphs = self.split_paragraphs(pages)
+        if not paragraphs:
+            raise ValueError("The document has no text to summarize")
+        abstract = abstract or self.find_abstract(paragraphs) or paragraphs[0]
+
+        result = {"abstract": abstract, "paragraphs": len(paragraphs), "llm_calls": 0, "cached": 0,
+                  "skipped": 0, "failed": 0, "levels": 0, "timings": {}}
+        # Every paragraph and every merge of the first level counts as one step
+        total_steps = len(paragraphs) + -(-len(paragraphs) // self.reduce_fanout)
+        steps = [0]
+
+        def step():
+            steps[0] += 1
+            if progress_callback is not None:
+                progress_callback(min(steps[0], total_steps), total_steps)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            start = time.perf_counter()
+            prompts = [
+                ("paragraph", (abstract, paragraph),
+                 get_paragraph_summarization_prompt_with_empty_check(abstract, paragraph, ""))
+                for paragraph in paragraphs
+            ]
+            summaries, errors = self._run_all(executor, prompts, result, step)
+            result["timings"]["map"] = time.perf_counter() - start
+
+            kept = [
+                summary for summary in summaries
+                if summary and summary.strip().strip(".\"'").lower() not in self.SKIPPED_ANSWERS
+            ]
+            result["failed"] = sum(1 for summary in summaries if summary is None)
+            result["skipped"] = len(summaries) - result["failed"] - len(kept)
+            if not kept:
+                if errors:
+                    raise errors[0]
+                kept = [abstract]
+
+            start = time.perf_counter()
+            while len(kept) > 1:
+                groups = [kept[i:i + self.reduce_fanout] for i in range(0, len(kept), self.reduce_fanout)]
+                prompts = [
+                    ("reduce", (abstract, *group), get_summary_reduction_prompt(abstract, group))
+                    for group in groups
+                ]
+                kept, errors = self._run_all(executor, prompts, result, step)
+                if errors:
+                    raise errors[0]
+                result["levels"] += 1
+            result["timings"]["reduce"] = time.perf_counter() - start
+
+        if progress_callback is not None:
+            progress_callback(total_steps, total_steps)
+        result["summary"] = kept[0]
+        return result
+
+    def _run_all(self, executor, prompts, result, step):
+        """
+        Complete many prompts concurrently, going through the cache
+
+        Identical inputs are only sent once.
+
+        Args:
+            executor (ThreadPoolExecutor): Pool bounding the Groq calls in flight
+            prompts (list): (kind, cache key parts, prompt) tuples
+            result (dict): Receives the llm_calls and cached counts
+            step (callable): Called once per prompt as it finishes
+
+        Returns:
+            tuple: (summaries in input order, None where the call failed; errors)
+        """
+        keys = [SummaryCache.make_key(self.model_name, kind, *parts) for kind, parts, _ in prompts]
+        summaries = [self.cache.get(key) for key in keys]
+
+        pending = {}
+        for i, (key, summary) in enumerate(zip(keys, summaries)):
+            if summary is not None:
+                result["cached"] += 1
+                step()
+            else:
+                pending.setdefault(key, []).append(i)
+
+        futures = {
+            executor.submit(self._complete, prompts[positions[0]][2]): key
+            for key, positions in pending.items()
+        }
+        errors = []
+        for future in as_completed(futures):
+            key = futures[future]
+            result["llm_calls"] += 1
+            try:
+                summary = future.result()
+            except Exception as e:
+                errors.append(e)
+                summary = None
+            else:
+                self.cache.put(key, summary)
+            for i in pending[key]:
+                summaries[i] = summary
+                step()
+        return summaries, errors
+
+    def _complete(self, prompt):
+        """
+        Send one prompt to Groq
+
+        Args:
+            prompt (str): Formatted summarization prompt
+
+        Returns:
+            str: The summary, without any <response> or <summary> tags
+        """
+        response = self.client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model_name,
+            temperature=0.1,
+            max_tokens=self.MAX_SUMMARY_TOKENS,
+        )
+        summary = response.choices[0].message.content or ""
+        return re.sub(r"</?(response|summary)>", "", summary, flags=re.IGNORECASE).strip()
+
+
+def main():
+    """
+    Command line entry point: summarize a PDF with the map-reduce summarizer
+    """
+    parser = argparse.ArgumentParser(description="Summarize a whole PDF")
+    parser.add_argument("pdf", help="PDF file to summarize")
+    parser.add_argument("--model", default="llama-3.1-8b-instant", help="Groq model")
+    parser.add_argument("--llm", choices=["groq", "local"], default=os.getenv("QA_LLM", "groq"),
+                        help="Summarize with Groq or the local stand-in model")
+    parser.add_argument("--concurrency", type=int, default=8, help="Groq requests in flight at once")
+    parser.add_argument("--cache", help="SQLite file caching summaries between runs")
+    args = parser.parse_args()
+
+    from document_processor.pdf_loader import PdfLoader
+    from document_processor.service import make_client
+
+    try:
+        client = make_client(args.llm)
+    except ValueError as e:
+        parser.error(str(e))
+
+    pages = PdfLoader.load(Path(args.pdf).read_bytes(), Path(args.pdf).name)
+    summarizer = DocumentSummarizer(client, args.model, cache=SummaryCache(sqlite_path=args.cache),
+                                    max_concurrency=args.concurrency)
+    try:
+        result = summarizer.summarize(pages)
+    finally:
+        close = getattr(client, "close", None)
+        if close is not None:
+            close()
+    print(result.pop("summary"))
+    print(json.dumps(result, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
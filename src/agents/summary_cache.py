@@ -0,0 +1,129 @@
+from collections import OrderedDict
+import hashlib
+import re
+import sqlite3
+import threading
+
+
+class SummaryCache:
+    """
+    A cache of generated summaries keyed by a hash of their input
+
+    This class:
+    1. Keys every summary by the model, the prompt kind and the normalized
+       text it summarizes, so an unchanged paragraph is never summarized twice,
+       even inside a revised document
+    2. Keeps recent summaries in an in-memory LRU and optionally writes them
+       through to a SQLite file, so restarts still hit
+    3. Counts hits and misses
+    """
+
+    def __init__(self, max_entries=10_000, sqlite_path=None):
+        """
+        Initialize the summary cache
+
+        Args:
+            max_entries (int): Maximum number of summaries held in memory
+            sqlite_path (str | Path): Optional SQLite file backing the memory cache
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path is not None:
+            self._db = sqlite3.connect(str(sqlite_path), check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model_name, kind, *parts):
+        """
+        Cache key of a summary
+
+        Args:
+            model_name (str): Model writing the summary
+            kind (str): Prompt kind, e.g. "paragraph" or "reduce"
+            *parts (str): Texts the summary is made from (abstract, paragraph, ...)
+
+        Returns:
+            str: SHA-256 hex digest of the inputs with whitespace normalized
+        """
+        digest = hashlib.sha256(f"{model_name}\0{kind}".encode("utf-8"))
+        for part in parts:
+            digest.update(b"\0" + re.sub(r"\s+", " ", part).strip().encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Look up a summary
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            str | None: The cached summary, or None on a miss
+        """
+        with self._lock:
+            summary = self._memory.get(key)
+            if summary is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    summary = row[0]
+                    self._remember(key, summary)
+
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return summary
+
+    def put(self, key, summary):
+        """
+        Store a summary
+
+        Args:
+            key (str): Key from make_key
+            summary (str): Generated summary
+        """
+        with self._lock:
+            self._remember(key, summary)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?)", (key, summary))
+                self._db.commit()
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            dict: Hits, misses, hit ratio and number of summaries in memory
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries_in_memory": len(self._memory),
+        }
+
+    def close(self):
+        """
+        Close the SQLite file, if any
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key, summary):
+        """
+        Add to the memory LRU, evicting the oldest entries; caller holds the lock
+        """
+        self._memory[key] = summary
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,176 @@
+import re
+import threading
+
+import numpy as np
+from scipy import sparse
+
+
+class BM25Index:
+    """
+    A sparse lexical index scoring chunks with BM25
+
+    This class:
+    1. Tokenizes chunks into lower-cased words, keeping identifiers such as
+       part numbers ("AB-1234", "v2.1") whole
+    2. Keeps term counts per chunk and builds one term-major CSR matrix of BM25
+       weights (an inverted index) when the index is next searched, so a batch
+       of additions costs one rebuild
+    3. Scores a batch of queries with a single sparse matrix product instead of
+       looping over chunks in Python
+    """
+
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+    def __init__(self, k1=1.5, b=0.75):
+        """
+        Initialize an empty index
+
+        Args:
+            k1 (float): Term frequency saturation
+            b (float): Strength of document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}       # term -> column
+        self.chunk_ids = []        # Chunk id of every row
+        self._term_ids = []        # Column of every distinct term, per row
+        self._counts = []          # Count of every distinct term, per row
+        self._weights = None       # CSR matrix of BM25 weights, terms x rows
+        self._row_ids = np.empty(0, dtype='int64')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def tokenize(cls, text):
+        """
+        Split text into index terms
+
+        Args:
+            text (str): Chunk or query text
+
+        Returns:
+            list: Lower-cased terms
+        """
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    def add(self, chunk_ids, texts):
+        """
+        Index chunks
+
+        Args:
+            chunk_ids (list): Id of every chunk
+            texts (list): Text of every chunk
+        """
+        rows = []
+        with self._lock:
+            for text in texts:
+                terms = [self.vocabulary.setdefault(term, len(self.vocabulary)) for term in self.tokenize(text)]
+                term_ids, counts = np.unique(np.array(terms, dtype='int64'), return_counts=True)
+                rows.append((term_ids, counts))
+            self.chunk_ids.extend(int(chunk_id) for chunk_id in chunk_ids)
+            self._term_ids.extend(term_ids for term_ids, _ in rows)
+            self._counts.extend(counts for _, counts in rows)
+            self._weights = None
+
+    def remove(self, chunk_ids):
+        """
+        Drop chunks from the index
+
+        Args:
+            chunk_ids (iterable): Ids of the chunks to drop
+        """
+        removed = set(int(chunk_id) for chunk_id in chunk_ids)
+        with self._lock:
+            keep = [pos for pos, chunk_id in enumerate(self.chunk_ids) if chunk_id not in removed]
+            if len(keep) == len(self.chunk_ids):
+                return
+            self.chunk_ids = [self.chunk_ids[pos] for pos in keep]
+            self._term_ids = [self._term_ids[pos] for pos in keep]
+            self._counts = [self._counts[pos] for pos in keep]
+            self._weights = None
+
+    def search_batch(self, queries, k, exclude=None, include=None):
+        """
+        Find the best BM25 matches for many queries at once
+
+        Args:
+            queries (list): Query texts
+            k (int): Number of chunks to return per query
+            exclude (set): Chunk ids to leave out, e.g. deleted chunks
+            include (np.ndarray): Only these chunk ids may be returned, e.g.
+                the chunks matching a metadata filter
+
+        Returns:
+            list: One list of (chunk_id, score) per query, best first. Chunks
+                sharing no term with the query are never returned.
+        """
+        with self._lock:
+            weights = self._build()
+            row_ids = self._row_ids
+            query_rows, query_cols = [], []
+            for row, query in enumerate(queries):
+                cols = {self.vocabulary[term] for term in self.tokenize(query) if term in self.vocabulary}
+                query_rows.extend([row] * len(cols))
+                query_cols.extend(cols)
+
+        if weights is None or not query_cols:
+            return [[] for _ in queries]
+
+        query_matrix = sparse.csr_matrix(
+            (np.ones(len(query_cols), dtype='float32'), (query_rows, query_cols)),
+            shape=(len(queries), weights.shape[0]),
+        )
+        # Term-major storage makes this a sum of the query terms' posting rows
+        scores = (query_matrix @ weights).toarray()
+        if exclude:
+            scores[:, np.isin(row_ids, np.fromiter(exclude, dtype='int64'))] = 0.0
+        if include is not None:
+            scores[:, ~np.isin(row_ids, include)] = 0.0
+
+        results = []
+        for row_scores in scores:
+            n_matches = int(np.count_nonzero(row_scores > 0))
+            top = min(k, n_matches)
+            if not top:
+                results.append([])
+                continue
+            best = np.argpartition(-row_scores, top - 1)[:top]
+            best = best[np.argsort(-row_scores[best], kind="stable")]
+            results.append([(int(row_ids[pos]), float(row_scores[pos])) for pos in best])
+        return results
+
+    def _build(self):
+        """
+        Build the BM25 weight matrix, called with the lock held
+
+        Returns:
+            scipy.sparse.csr_matrix | None: Terms x rows weights (an inverted
+                index), None when empty
+        """
+        if self._weights is not None or not self.chunk_ids:
+            return self._weights
+
+        lengths = np.array([len(term_ids) for term_ids in self._term_ids], dtype='int64')
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        indices = np.concatenate(self._term_ids) if indptr[-1] else np.empty(0, dtype='int64')
+        tf = np.concatenate(self._counts).astype('float32') if indptr[-1] else np.empty(0, dtype='float32')
+
+        n_rows = len(self.chunk_ids)
+        row_of_entry = np.repeat(np.arange(n_rows), lengths)
+        doc_lengths = np.bincount(row_of_entry, weights=tf, minlength=n_rows)
+        avg_length = doc_lengths.mean() or 1.0
+
+        df = np.bincount(indices, minlength=len(self.vocabulary))
+        idf = np.log1p((n_rows - df + 0.5) / (df + 0.5)).astype('float32')
+
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths[row_of_entry] / avg_length)
+        data = idf[indices] * tf * (self.k1 + 1) / (tf + norm)
+
+        self._weights = sparse.csr_matrix(
+            (data.astype('float32'), indices, indptr),
+            shape=(n_rows, len(self.vocabulary)),
+        ).T.tocsr()
+        self._row_ids = np.array(self.chunk_ids, dtype='int64')
+        return self._weights
@@ -0,0 +1,166 @@
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+
+from .vectorstore import LocalVectorStore
+
+
+class DocumentCache:
+    """
+    A content-addressed on-disk cache of processed documents
+
+    This class:
+    1. Derives a cache key from the uploaded PDF bytes and the processing settings
+    2. Stores the chunks, their embeddings and the serialized FAISS index on disk
+    3. Evicts the least recently used entries once the cache exceeds its size cap
+    4. Counts hits and misses so the cache effectiveness is visible
+    """
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        """
+        Initialize the document cache
+
+        Args:
+            cache_dir (str | Path): Directory holding one sub-directory per cached document
+            max_bytes (int): Maximum total size of the cache before LRU eviction kicks in
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(file_bytes, chunk_size, chunk_overlap, model_name, chunk_boundaries="compat", storage="float32"):
+        """
+        Build the cache key for a document
+
+        Args:
+            file_bytes (bytes): Raw bytes of the uploaded PDF
+            chunk_size (int): Text splitter chunk size
+            chunk_overlap (int): Text splitter chunk overlap
+            model_name (str): Name of the embedding model
+            chunk_boundaries (str): Splitter mode; "compat" chunks like the
+                original splitter and keeps its keys
+            storage (str): Embedding storage of the index; float32 keeps the
+                keys of stores cached before storage was configurable
+
+        Returns:
+            str: Hex digest identifying the processed document
+        """
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(file_bytes).digest())
+        digest.update(f"{chunk_size}:{chunk_overlap}:{model_name}".encode("utf-8"))
+        if chunk_boundaries != "compat":
+            digest.update(f":{chunk_boundaries}".encode("utf-8"))
+        if storage != "float32":
+            digest.update(f":storage={storage}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key, embedding_model):
+        """
+        Load a cached vector store
+
+        Args:
+            key (str): Cache key from make_key
+            embedding_model: SentenceTransformer model used for future queries
+
+        Returns:
+            LocalVectorStore | None: The cached vector store, or None on a miss
+        """
+        entry = self.cache_dir / key
+        with self._lock:
+            try:
+                # Memory-map the entry so repeat loads cost almost nothing
+                vector_store = LocalVectorStore.load(entry, embedding_model, mmap=True)
+            except (OSError, ValueError, KeyError, RuntimeError):
+                self.misses += 1
+                return None
+
+            # Touch the entry so LRU eviction sees it as recently used
+            os.utime(entry)
+            self.hits += 1
+
+        return vector_store
+
+    def put(self, key, vector_store):
+        """
+        Store a vector store in the cache and evict old entries if needed
+
+        Args:
+            key (str): Cache key from make_key
+            vector_store (LocalVectorStore): Populated vector store to cache
+        """
+        if vector_store.index is None:
+            return
+
+        entry = self.cache_dir / key
+        # Write into a temporary directory first so readers never see a partial entry
+        tmp_entry = self.cache_dir / f".tmp-{uuid.uuid4().hex}"
+        try:
+            vector_store.save(tmp_entry)
+
+            with self._lock:
+                if entry.exists():
+                    shutil.rmtree(entry)
+                os.replace(tmp_entry, entry)
+                self._evict()
+        finally:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            dict: Hit and miss counts, hit ratio, entry count and total size on disk
+        """
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(size for _, _, size in entries),
+        }
+
+    def clear(self):
+        """
+        Remove every cached entry
+        """
+        with self._lock:
+            for entry, _, _ in self._entries():
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _entries(self):
+        """
+        List cached entries with their last-use time and size
+
+        Returns:
+            list: (path, mtime, size_in_bytes) tuples
+        """
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir() or entry.name.startswith(".tmp-"):
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            entries.append((entry, entry.stat().st_mtime, size))
+        return entries
+
+    def _evict(self):
+        """
+        Delete least recently used entries until the cache fits in max_bytes
+        """
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        # Always keep the most recent entry, even if it alone exceeds the cap
+        for entry, _, size in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,442 @@
+from collections.abc import Sequence
+import json
+from pathlib import Path
+import time
+
+import numpy as np
+
+
+class ChunkStore(Sequence):
+    """
+    Chunk texts and metadata held in a few contiguous arrays
+
+    This class:
+    1. Keeps every chunk's UTF-8 bytes back to back in one uint8 buffer, with
+       an int64 offsets array marking where each chunk starts
+    2. Keeps the document and source of every chunk as int32 indexes into
+       small tables of distinct values, and the page as an int32 (-1 if none);
+       each document also records when it was added
+    3. Returns a chunk as a zero-copy view of the buffer, and only decodes the
+       chunks a search actually returns
+    4. Grows its arrays geometrically, so appending stays cheap at millions of
+       chunks, and saves them as .npy files that can be memory-mapped
+    """
+
+    TEXT_FILE = "chunks.text.npy"
+    OFFSETS_FILE = "chunks.offsets.npy"
+    DOCS_FILE = "chunks.docs.npy"
+    PAGES_FILE = "chunks.pages.npy"
+    SOURCES_FILE = "chunks.sources.npy"
+    TABLES_FILE = "chunks.tables.json"
+    FILES = (TEXT_FILE, OFFSETS_FILE, DOCS_FILE, PAGES_FILE, SOURCES_FILE, TABLES_FILE)
+
+    NO_PAGE = -1
+
+    def __init__(self):
+        """
+        Create an empty store
+        """
+        self._n = 0
+        self._n_bytes = 0
+        self._text = np.empty(0, dtype=np.uint8)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._docs = np.empty(0, dtype=np.int32)
+        self._pages = np.empty(0, dtype=np.int32)
+        self._sources = np.empty(0, dtype=np.int32)
+        self.doc_table = []        # Distinct document ids, indexed by _docs
+        self.doc_added = []        # Epoch seconds each document was added, NaN if unknown
+        self.source_table = [None]  # Distinct sources, indexed by _sources; 0 is "no source"
+        self._doc_index = {}
+        self._source_index = {None: 0}
+
+    @classmethod
+    def from_lists(cls, texts, doc_ids, metadatas=None, added_at=float("nan")):
+        """
+        Build a store from per-chunk lists
+
+        Args:
+            texts (list): Chunk texts
+            doc_ids (list): Document id of every chunk
+            metadatas (list): Metadata dict of every chunk (source, page)
+            added_at (float): Epoch seconds the documents were added, unknown by default
+
+        Returns:
+            ChunkStore: A store holding the chunks
+        """
+        store = cls()
+        metadatas = metadatas if metadatas is not None else [{} for _ in texts]
+        start = 0
+        # Keep consecutive chunks of one document together in one append
+        for end in range(1, len(texts) + 1):
+            if end == len(texts) or doc_ids[end] != doc_ids[start]:
+                store.extend(texts[start:end], doc_ids[start], metadatas[start:end], added_at)
+                start = end
+        return store
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self.text(i) for i in range(*pos.indices(self._n))]
+        if pos < 0:
+            pos += self._n
+        if not 0 <= pos < self._n:
+            raise IndexError("chunk position out of range")
+        return self.text(pos)
+
+    @property
+    def docs(self):
+        """
+        Document index of every chunk, into doc_table
+
+        Returns:
+            np.ndarray: int32 array view
+        """
+        return self._docs[:self._n]
+
+    @property
+    def pages(self):
+        """
+        Page number of every chunk, NO_PAGE when unknown
+
+        Returns:
+            np.ndarray: int32 array view
+        """
+        return self._pages[:self._n]
+
+    @property
+    def sources(self):
+        """
+        Source index of every chunk, into source_table
+
+        Returns:
+            np.ndarray: int32 array view
+        """
+        return self._sources[:self._n]
+
+    def view(self, pos):
+        """
+        UTF-8 bytes of one chunk without copying them
+
+        Args:
+            pos (int): Chunk position
+
+        Returns:
+            memoryview: View into the text buffer
+        """
+        return memoryview(self._text[self._offsets[pos]:self._offsets[pos + 1]])
+
+    def text(self, pos):
+        """
+        Text of one chunk, decoded straight from the buffer
+
+        Args:
+            pos (int): Chunk position
+
+        Returns:
+            str: The chunk text
+        """
+        return str(self.view(pos), "utf-8")
+
+    def doc_id(self, pos):
+        """
+        Document id of one chunk
+
+        Args:
+            pos (int): Chunk position
+
+        Returns:
+            str: The document id
+        """
+        return self.doc_table[self._docs[pos]]
+
+    def added_at(self, doc_id):
+        """
+        When a document was added
+
+        Args:
+            doc_id (str): Document id
+
+        Returns:
+            float | None: Epoch seconds, None if the document is unknown or
+                its time was not recorded
+        """
+        index = self._doc_index.get(doc_id)
+        if index is None or np.isnan(self.doc_added[index]):
+            return None
+        return self.doc_added[index]
+
+    def metadata(self, pos):
+        """
+        Metadata of one chunk
+
+        Args:
+            pos (int): Chunk position
+
+        Returns:
+            dict: "source" and "page", for the ones that are known
+        """
+        metadata = {}
+        source = self.source_table[self._sources[pos]]
+        if source is not None:
+            metadata["source"] = source
+        if self._pages[pos] != self.NO_PAGE:
+            metadata["page"] = int(self._pages[pos])
+        return metadata
+
+    def doc_positions(self, doc_id):
+        """
+        Positions of every chunk of a document
+
+        Args:
+            doc_id (str): Document id
+
+        Returns:
+            np.ndarray: Chunk positions in order, empty if the id is unknown
+        """
+        index = self._doc_index.get(doc_id)
+        if index is None:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.docs == index)
+
+    def extend(self, texts, doc_id, metadatas=None, added_at=None):
+        """
+        Append the chunks of one document
+
+        Args:
+            texts (list): Chunk texts
+            doc_id (str): Document id of all of them
+            metadatas (list): Metadata dict of every chunk; only "source" and
+                "page" are kept
+            added_at (float): Epoch seconds the document was added, now if
+                omitted; ignored when the document already has chunks
+        """
+        if not texts:
+            return
+        encoded = [text.encode("utf-8") for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self._append(lengths, np.frombuffer(b"".join(encoded), dtype=np.uint8), doc_id, metadatas, added_at)
+
+    def extend_offsets(self, texts, metadatas, pages, starts, ends, doc_id, added_at=None):
+        """
+        Append chunks given as offsets into their page texts
+
+        This is how PageChunks hold a split document. Each page is encoded to
+        UTF-8 once and the chunk bytes are copied straight out of it, so no
+        string or Document is built per chunk.
+
+        Args:
+            texts (list): Text of every page
+            metadatas (list): Metadata dict of every page
+            pages (np.ndarray): Page index (into texts) of every chunk
+            starts (np.ndarray): Start offset of every chunk in its page, in characters
+            ends (np.ndarray): End offset of every chunk in its page
+            doc_id (str): Document id of all of them
+            added_at (float): Epoch seconds the document was added, now if omitted
+        """
+        pages = np.asarray(pages, dtype=np.int64)
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        if not len(pages):
+            return
+
+        pieces = []
+        breaks = np.flatnonzero(np.diff(pages)) + 1
+        for run_start, run_end in zip(np.concatenate([[0], breaks]), np.concatenate([breaks, [len(pages)]])):
+            text = texts[pages[run_start]]
+            data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+            byte_starts, byte_ends = starts[run_start:run_end], ends[run_start:run_end]
+            if len(data) != len(text):
+                # Turn character offsets into byte offsets from each code point's UTF-8 width
+                code_points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+                widths = 1 + (code_points >= 0x80) + (code_points >= 0x800) + (code_points >= 0x10000)
+                byte_offsets = np.concatenate([[0], np.cumsum(widths)])
+                byte_starts, byte_ends = byte_offsets[byte_starts], byte_offsets[byte_ends]
+            pieces.extend(data[a:b] for a, b in zip(byte_starts, byte_ends))
+
+        lengths = np.fromiter(map(len, pieces), dtype=np.int64, count=len(pieces))
+        self._append(lengths, np.concatenate(pieces), doc_id, [metadatas[page] for page in pages], added_at)
+
+    def _append(self, lengths, data, doc_id, metadatas, added_at):
+        """
+        Append chunks whose UTF-8 bytes are already laid out back to back
+
+        Args:
+            lengths (np.ndarray): Byte length of every chunk
+            data (np.ndarray): uint8 bytes of all of them
+            doc_id (str): Document id of all of them
+            metadatas (list): Metadata dict of every chunk, or None
+            added_at (float): Epoch seconds the document was added, now if
+                omitted. Given for a document already known (e.g. uploaded
+                again after a delete), it replaces the recorded time.
+        """
+        n_new = len(lengths)
+        n_bytes = len(data)
+        self._reserve(self._n + n_new, self._n_bytes + n_bytes)
+
+        self._text[self._n_bytes:self._n_bytes + n_bytes] = data
+        self._offsets[self._n + 1:self._n + n_new + 1] = self._n_bytes + np.cumsum(lengths)
+
+        new = slice(self._n, self._n + n_new)
+        n_docs = len(self.doc_table)
+        self._docs[new] = self._intern(doc_id, self.doc_table, self._doc_index)
+        if len(self.doc_table) > n_docs:
+            self.doc_added.append(time.time() if added_at is None else float(added_at))
+        elif added_at is not None:
+            self.doc_added[self._doc_index[doc_id]] = float(added_at)
+        if metadatas is None:
+            self._pages[new] = self.NO_PAGE
+            self._sources[new] = 0
+        else:
+            self._pages[new] = [
+                self.NO_PAGE if metadata.get("page") is None else metadata["page"] for metadata in metadatas
+            ]
+            self._sources[new] = [
+                self._intern(metadata.get("source"), self.source_table, self._source_index) for metadata in metadatas
+            ]
+        self._n += n_new
+        self._n_bytes += n_bytes
+
+    def take(self, positions):
+        """
+        Copy a subset of the chunks into a new store
+
+        Runs of consecutive positions are copied as one slice of the buffer.
+
+        Args:
+            positions (np.ndarray): Chunk positions to keep, in their new order
+
+        Returns:
+            ChunkStore: A store holding only those chunks
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        store = ChunkStore()
+        store.doc_table = list(self.doc_table)
+        store.doc_added = list(self.doc_added)
+        store.source_table = list(self.source_table)
+        store._doc_index = dict(self._doc_index)
+        store._source_index = dict(self._source_index)
+
+        starts = self._offsets[positions]
+        lengths = self._offsets[positions + 1] - starts
+        breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+        run_starts = np.concatenate([[0], breaks]).astype(np.int64)
+        run_ends = np.concatenate([breaks, [len(positions)]]).astype(np.int64)
+        pieces = [
+            self._text[self._offsets[positions[a]]:self._offsets[positions[b - 1] + 1]]
+            for a, b in zip(run_starts, run_ends) if a < b
+        ]
+        store._text = np.concatenate(pieces) if pieces else np.empty(0, dtype=np.uint8)
+        store._offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        store._docs = self._docs[positions]
+        store._pages = self._pages[positions]
+        store._sources = self._sources[positions]
+        store._n = len(positions)
+        store._n_bytes = len(store._text)
+        return store
+
+    def nbytes(self):
+        """
+        Memory held by the chunk arrays, excluding unused capacity
+
+        Returns:
+            int: Bytes of text, offsets, documents, pages and sources
+        """
+        return self._n_bytes + 8 * (self._n + 1) + 3 * 4 * self._n
+
+    def save(self, path, suffix=""):
+        """
+        Write the store to a directory as .npy files and a JSON table file
+
+        Args:
+            path (Path): Existing directory
+            suffix (str): Appended to every file name, so callers can write to
+                temporary names and rename them into place
+
+        Returns:
+            list: Names of the files written, without the suffix
+        """
+        path = Path(path)
+        arrays = {
+            self.TEXT_FILE: self._text[:self._n_bytes],
+            self.OFFSETS_FILE: self._offsets[:self._n + 1],
+            self.DOCS_FILE: self.docs,
+            self.PAGES_FILE: self.pages,
+            self.SOURCES_FILE: self.sources,
+        }
+        for name, array in arrays.items():
+            # A file object stops np.save from appending ".npy" to the suffix
+            with open(path / (name + suffix), "wb") as f:
+                np.save(f, array)
+        with open(path / (self.TABLES_FILE + suffix), "w", encoding="utf-8") as f:
+            json.dump({"doc_ids": self.doc_table, "doc_added": self.doc_added, "sources": self.source_table}, f)
+        return list(self.FILES)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a store written by save()
+
+        With mmap enabled the arrays stay in their files and are shared
+        through the OS page cache; they are copied into memory on the first
+        append.
+
+        Args:
+            path (str | Path): Directory written by save()
+            mmap (bool): Memory-map the arrays instead of reading them
+
+        Returns:
+            ChunkStore: The loaded store
+        """
+        path = Path(path)
+        mmap_mode = "r" if mmap else None
+        store = cls()
+        store._text = np.load(path / cls.TEXT_FILE, mmap_mode=mmap_mode)
+        store._offsets = np.load(path / cls.OFFSETS_FILE, mmap_mode=mmap_mode)
+        store._docs = np.load(path / cls.DOCS_FILE, mmap_mode=mmap_mode)
+        store._pages = np.load(path / cls.PAGES_FILE, mmap_mode=mmap_mode)
+        store._sources = np.load(path / cls.SOURCES_FILE, mmap_mode=mmap_mode)
+        with open(path / cls.TABLES_FILE, "r", encoding="utf-8") as f:
+            tables = json.load(f)
+        store.doc_table = tables["doc_ids"]
+        store.doc_added = tables.get("doc_added", [float("nan")] * len(store.doc_table))
+        store.source_table = tables["sources"]
+        store._doc_index = {doc_id: i for i, doc_id in enumerate(store.doc_table)}
+        store._source_index = {source: i for i, source in enumerate(store.source_table)}
+        store._n = len(store._docs)
+        store._n_bytes = len(store._text)
+        return store
+
+    @staticmethod
+    def _intern(value, table, index):
+        """
+        Index of a value in a table of distinct values, adding it if new
+        """
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(table)
+            table.append(value)
+        return position
+
+    def _reserve(self, n_chunks, n_bytes):
+        """
+        Make room for n_chunks chunks of n_bytes bytes in total
+
+        Arrays are reallocated at double the size when they run out, or when
+        they are read-only memory maps.
+        """
+        def grow(array, size, extra=0):
+            if len(array) >= size + extra and array.flags.writeable:
+                return array
+            capacity = max(size, 2 * len(array), 1024) + extra
+            grown = np.empty(capacity, dtype=array.dtype)
+            used = min(len(array), capacity)
+            grown[:used] = array[:used]
+            return grown
+
+        self._text = grow(self._text, n_bytes)
+        self._offsets = grow(self._offsets, n_chunks, extra=1)
+        self._docs = grow(self._docs, n_chunks)
+        self._pages = grow(self._pages, n_chunks)
+        self._sources = grow(self._sources, n_chunks)
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+import hashlib
+import re
+import sqlite3
+import threading
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    A cache of chunk embeddings keyed by normalized text and model name
+
+    This class:
+    1. Encodes each distinct chunk text only once, even when it repeats within a batch
+    2. Reuses embeddings of chunks seen in earlier documents (headers, footers, disclaimers)
+    3. Keeps recent embeddings in an in-memory LRU and optionally writes them through
+       to a SQLite file, so evicted entries and restarts still hit
+    4. Counts hits, misses and in-batch duplicates to measure the encoder time saved
+    """
+
+    def __init__(self, model_name, max_entries=100_000, sqlite_path=None):
+        """
+        Initialize the embedding cache
+
+        Args:
+            model_name (str): Name of the embedding model, part of every key
+            max_entries (int): Maximum number of embeddings held in memory
+            sqlite_path (str | Path): Optional SQLite file backing the memory cache
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0          # Chunks served from the cache
+        self.duplicates = 0    # Chunks that repeated another chunk of the same batch
+        self.misses = 0        # Chunks that had to be encoded
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path is not None:
+            self._db = sqlite3.connect(str(sqlite_path), check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB)")
+            self._db.commit()
+
+    @staticmethod
+    def normalize(text):
+        """
+        Normalize chunk text so trivially different copies share one key
+
+        Args:
+            text (str): Chunk text
+
+        Returns:
+            str: Text with whitespace runs collapsed and the ends stripped
+        """
+        return re.sub(r"\s+", " ", text).strip()
+
+    def key(self, text):
+        """
+        Cache key of a chunk
+
+        Args:
+            text (str): Chunk text
+
+        Returns:
+            bytes: SHA-256 digest of the model name and normalized text
+        """
+        return hashlib.sha256(f"{self.model_name}\0{self.normalize(text)}".encode("utf-8")).digest()
+
+    def encode(self, embedding_model, texts):
+        """
+        Embed texts, encoding only those not seen before
+
+        Args:
+            embedding_model: SentenceTransformer model for creating embeddings
+            texts (list): Chunk texts
+
+        Returns:
+            np.ndarray: float32 embeddings, one row per text
+        """
+        keys = [self.key(text) for text in texts]
+
+        # Unique keys in first-seen order, with the text to encode for each
+        unique = {}
+        for key, text in zip(keys, texts):
+            unique.setdefault(key, text)
+
+        with self._lock:
+            found = self._lookup(list(unique))
+            missing = [key for key in unique if key not in found]
+            self.duplicates += len(keys) - len(unique)
+            self.hits += len(unique) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            encoded = np.asarray(embedding_model.encode([unique[key] for key in missing]), dtype='float32')
+            # Copy rows so cached entries do not keep the whole batch alive
+            new_entries = {key: row.copy() for key, row in zip(missing, encoded)}
+            with self._lock:
+                self._store(new_entries)
+            found.update(new_entries)
+
+        return np.stack([found[key] for key in keys]) if keys else np.empty((0, 0), dtype='float32')
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            dict: Hits, in-batch duplicates, misses and the hit ratio, i.e. the
+                fraction of chunks that did not need the encoder
+        """
+        total = self.hits + self.duplicates + self.misses
+        saved = total - self.misses
+        return {
+            "hits": self.hits,
+            "duplicates": self.duplicates,
+            "misses": self.misses,
+            "hit_ratio": saved / total if total else 0.0,
+            "entries_in_memory": len(self._memory),
+        }
+
+    def close(self):
+        """
+        Close the SQLite connection, if any
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _lookup(self, keys):
+        """
+        Find cached embeddings, in memory first and then in SQLite
+
+        Args:
+            keys (list): Cache keys
+
+        Returns:
+            dict: Key -> embedding for every key that was found
+        """
+        found = {}
+        for key in keys:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+
+        remaining = [key for key in keys if key not in found]
+        if remaining and self._db is not None:
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(remaining), 500):
+                batch = remaining[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype='float32')
+                    self._remember(key, found[key])
+        return found
+
+    def _store(self, entries):
+        """
+        Add new embeddings to memory and write them through to SQLite
+
+        Args:
+            entries (dict): Key -> embedding
+        """
+        for key, vector in entries.items():
+            self._remember(key, vector)
+        if self._db is not None:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype='float32').tobytes()) for key, vector in entries.items()],
+            )
+            self._db.commit()
+
+    def _remember(self, key, vector):
+        """
+        Put one embedding in the in-memory LRU, evicting the oldest if full
+
+        Args:
+            key (bytes): Cache key
+            vector (np.ndarray): Embedding
+        """
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
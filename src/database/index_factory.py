@@ -0,0 +1,534 @@
+from pathlib import Path
+import argparse
+import json
+import math
+import time
+
+import faiss
+import numpy as np
+
+
+class IndexFactory:
+    """
+    Builds the FAISS index behind LocalVectorStore
+
+    This class:
+    1. Maps an index type (flat, ivf_flat, ivf_pq, hnsw) to a FAISS factory string
+    2. Picks an index type automatically from the number of chunks
+    3. Knows how many vectors each type needs before it can be trained
+    4. Stores vectors as float32, float16 or int8 codes, optionally after a PCA
+       projection fitted on the corpus
+    5. Benchmarks recall@k, query latency and memory per chunk against exact search
+    """
+
+    INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+    # How flat, HNSW and IVF-flat indexes encode each vector
+    STORAGE_CODECS = {"float32": "Flat", "float16": "SQfp16", "int8": "SQ8"}
+
+    # Chunk counts above which "auto" moves to the next index type
+    AUTO_HNSW_MIN_CHUNKS = 20_000
+    AUTO_IVF_FLAT_MIN_CHUNKS = 200_000
+    AUTO_IVF_PQ_MIN_CHUNKS = 2_000_000
+
+    # FAISS wants roughly 39 training points per IVF list / PQ centroid
+    TRAINING_POINTS_PER_LIST = 39
+    # Fewer lists than this and IVF is no faster than a flat scan
+    MIN_IVF_LISTS = 16
+    PQ_CENTROIDS = 256
+
+    # int8 ranges are widened by this fraction on each side, so a corpus that
+    # grows a little past its first batch does not force a retrain
+    INT8_RANGE_MARGIN = 0.1
+
+    HNSW_M = 32
+    HNSW_EF_SEARCH = 64
+
+    @staticmethod
+    def choose_index_type(n_chunks):
+        """
+        Pick an index type for a corpus size
+
+        Args:
+            n_chunks (int): Number of chunks the index will hold
+
+        Returns:
+            str: One of INDEX_TYPES
+        """
+        if n_chunks >= IndexFactory.AUTO_IVF_PQ_MIN_CHUNKS:
+            return "ivf_pq"
+        if n_chunks >= IndexFactory.AUTO_IVF_FLAT_MIN_CHUNKS:
+            return "ivf_flat"
+        if n_chunks >= IndexFactory.AUTO_HNSW_MIN_CHUNKS:
+            return "hnsw"
+        return "flat"
+
+    @staticmethod
+    def nlist_for(n_chunks):
+        """
+        Number of IVF lists for a corpus size
+
+        About 4 * sqrt(n), capped so that every list gets enough training points.
+
+        Args:
+            n_chunks (int): Number of chunks the index will hold
+
+        Returns:
+            int: Number of inverted lists
+        """
+        nlist = min(int(4 * math.sqrt(n_chunks)), n_chunks // IndexFactory.TRAINING_POINTS_PER_LIST)
+        return max(1, nlist)
+
+    @staticmethod
+    def min_training_points(index_type, n_chunks):
+        """
+        Number of vectors needed before an index type can be trained
+
+        Args:
+            index_type (str): One of INDEX_TYPES
+            n_chunks (int): Number of chunks the index will hold
+
+        Returns:
+            int: Minimum number of training vectors (0 if no training is needed)
+        """
+        ivf_points = IndexFactory.MIN_IVF_LISTS * IndexFactory.TRAINING_POINTS_PER_LIST
+        if index_type == "ivf_flat":
+            return ivf_points
+        if index_type == "ivf_pq":
+            # The PQ codebooks need 256 centroids per sub-quantizer as well
+            return max(ivf_points, IndexFactory.PQ_CENTROIDS * IndexFactory.TRAINING_POINTS_PER_LIST)
+        return 0
+
+    @staticmethod
+    def resolve_index_type(index_type, n_chunks):
+        """
+        Turn a configured index type into the one that can actually be built
+
+        "auto" is resolved from the chunk count, and types that need training
+        fall back to "flat" until enough vectors are available.
+
+        Args:
+            index_type (str): One of INDEX_TYPES or "auto"
+            n_chunks (int): Number of chunks the index will hold
+
+        Returns:
+            str: One of INDEX_TYPES
+        """
+        if index_type == "auto":
+            index_type = IndexFactory.choose_index_type(n_chunks)
+        if index_type not in IndexFactory.INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+        if n_chunks < IndexFactory.min_training_points(index_type, n_chunks):
+            return "flat"
+        return index_type
+
+    @staticmethod
+    def resolve_pca_dim(pca_dim, dimension, n_chunks):
+        """
+        Decide whether a PCA projection can be fitted yet
+
+        Args:
+            pca_dim (int | None): Requested output dimension
+            dimension (int): Embedding dimension
+            n_chunks (int): Number of chunks the index will hold
+
+        Returns:
+            int | None: pca_dim once there are at least that many vectors to
+                fit it on, otherwise None (no projection)
+        """
+        if not pca_dim or pca_dim >= dimension or n_chunks < pca_dim:
+            return None
+        return pca_dim
+
+    @staticmethod
+    def factory_string(index_type, dimension, n_chunks, storage="float32", pca_dim=None):
+        """
+        FAISS index_factory description for an index type
+
+        Args:
+            index_type (str): One of INDEX_TYPES
+            dimension (int): Embedding dimension
+            n_chunks (int): Number of chunks the index will hold
+            storage (str): One of STORAGE_CODECS; ivf_pq is always PQ-encoded
+            pca_dim (int | None): Project vectors to this many dimensions first
+
+        Returns:
+            str: Factory string such as "IVF1024,Flat" or "PCA128,SQ8"
+        """
+        if storage not in IndexFactory.STORAGE_CODECS:
+            raise ValueError(f"Unknown storage: {storage}")
+        codec = IndexFactory.STORAGE_CODECS[storage]
+        prefix = f"PCA{pca_dim}," if pca_dim else ""
+        dimension = pca_dim or dimension
+
+        if index_type == "flat":
+            return prefix + codec
+        if index_type == "hnsw":
+            return prefix + f"HNSW{IndexFactory.HNSW_M}" + ("" if codec == "Flat" else f",{codec}")
+        nlist = IndexFactory.nlist_for(n_chunks)
+        if index_type == "ivf_flat":
+            return prefix + f"IVF{nlist},{codec}"
+        if index_type == "ivf_pq":
+            # One 8-bit sub-quantizer per 8 dimensions; it must divide the dimension
+            m = max(d for d in range(1, dimension // 8 + 1) if dimension % d == 0) if dimension >= 8 else 1
+            return prefix + f"IVF{nlist},PQ{m}x8"
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    @staticmethod
+    def build(index_type, embeddings, ids, storage="float32", pca_dim=None):
+        """
+        Build, train and fill an ID-mapped index
+
+        Args:
+            index_type (str): One of INDEX_TYPES or "auto"
+            embeddings (np.ndarray): float32 matrix of shape (n, dimension)
+            ids (np.ndarray): int64 ids, one per row of embeddings
+            storage (str): One of STORAGE_CODECS
+            pca_dim (int | None): Requested PCA output dimension
+
+        Returns:
+            tuple: (faiss.IndexIDMap2, resolved index type)
+        """
+        n_chunks, dimension = embeddings.shape
+        index_type = IndexFactory.resolve_index_type(index_type, n_chunks)
+        pca_dim = IndexFactory.resolve_pca_dim(pca_dim, dimension, n_chunks)
+        base = faiss.index_factory(
+            dimension, IndexFactory.factory_string(index_type, dimension, n_chunks, storage, pca_dim)
+        )
+        sq = IndexFactory.int8_quantizer(base)
+        if sq is not None:
+            sq.rangestat_arg = IndexFactory.INT8_RANGE_MARGIN
+        if not base.is_trained:
+            base.train(embeddings)
+
+        core = IndexFactory.core_index(base)
+        if index_type in ("ivf_flat", "ivf_pq"):
+            nlist = IndexFactory.nlist_for(n_chunks)
+            core.nprobe = max(1, nlist // 16)
+            # Lets the vectors be reconstructed when the store rebuilds the index
+            core.make_direct_map()
+        elif index_type == "hnsw":
+            core.hnsw.efSearch = IndexFactory.HNSW_EF_SEARCH
+
+        index = faiss.IndexIDMap2(base)
+        if n_chunks:
+            index.add_with_ids(embeddings, ids)
+        return index, index_type
+
+    @staticmethod
+    def core_index(index):
+        """
+        Unwrap the ID map and PCA transform around an index
+
+        Args:
+            index (faiss.Index): Index built by build(), or its base
+
+        Returns:
+            faiss.Index: The innermost index, downcast to its concrete type
+        """
+        index = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else faiss.downcast_index(index)
+        if isinstance(index, faiss.IndexPreTransform):
+            index = faiss.downcast_index(index.index)
+        return index
+
+    @staticmethod
+    def pca_dim_of(index):
+        """
+        Args:
+            index (faiss.Index): Index built by build()
+
+        Returns:
+            int | None: Output dimension of the PCA projection, None without one
+        """
+        base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+        return base.index.d if isinstance(base, faiss.IndexPreTransform) else None
+
+    @staticmethod
+    def int8_quantizer(index):
+        """
+        The scalar quantizer of an index that stores int8 codes
+
+        Args:
+            index (faiss.Index): Index built by build(), or its base
+
+        Returns:
+            faiss.ScalarQuantizer | None: The quantizer, None for other storage
+        """
+        core = IndexFactory.core_index(index)
+        if isinstance(core, faiss.IndexHNSW):
+            core = faiss.downcast_index(core.storage)
+        sq = getattr(core, "sq", None)
+        if sq is None or sq.qtype != faiss.ScalarQuantizer.QT_8bit:
+            return None
+        return sq
+
+    @staticmethod
+    def fits_int8_range(index, embeddings):
+        """
+        Check that vectors can be added without being clipped
+
+        int8 codes cover the per-dimension range the index was trained on;
+        values outside it are clipped, and a rebuild from the decoded vectors
+        would make that error permanent. Vectors are checked in the space the
+        codes are taken in: after the PCA projection and, for IVF, as
+        residuals to their list centroid.
+
+        Args:
+            index (faiss.IndexIDMap2): Index built by build()
+            embeddings (np.ndarray): float32 vectors about to be added
+
+        Returns:
+            bool: False if an int8 index would clip any of them
+        """
+        sq = IndexFactory.int8_quantizer(index)
+        if sq is None or not len(embeddings):
+            return True
+        base = faiss.downcast_index(index.index)
+        vectors = np.ascontiguousarray(embeddings, dtype='float32')
+        if isinstance(base, faiss.IndexPreTransform):
+            for i in range(base.chain.size()):
+                vectors = base.chain.at(i).apply(vectors)
+        core = IndexFactory.core_index(base)
+        if isinstance(core, faiss.IndexIVF) and core.by_residual:
+            _, lists = core.quantizer.search(vectors, 1)
+            vectors = vectors - core.quantizer.reconstruct_batch(lists.ravel())
+
+        # QT_8bit keeps the minimum of every dimension, then its width
+        trained = faiss.vector_to_array(sq.trained)
+        low, width = trained[:sq.d], trained[sq.d:]
+        return bool(np.all(vectors >= low) and np.all(vectors <= low + width))
+
+    @staticmethod
+    def reconstruct_all(index):
+        """
+        Decode every vector of an index, in insertion order
+
+        Exact for float32 storage; float16, int8, PCA and PQ storage return the
+        approximation the index searches with.
+
+        Args:
+            index (faiss.IndexIDMap2): Index built by build()
+
+        Returns:
+            np.ndarray: float32 matrix of shape (ntotal, dimension)
+        """
+        base = faiss.downcast_index(index.index)
+        if index.ntotal == 0:
+            return np.empty((0, index.d), dtype='float32')
+        core = IndexFactory.core_index(base)
+        if isinstance(core, faiss.IndexIVF) and core.direct_map.type == faiss.DirectMap.NoMap:
+            # Indexes saved before direct maps were added at build time
+            core.make_direct_map()
+        return base.reconstruct_n(0, index.ntotal)
+
+    @staticmethod
+    def search_positions(index, queries, positions, k):
+        """
+        Exact search over a subset of an index's vectors
+
+        The vectors at the given insertion positions are decoded, one
+        contiguous run at a time, and searched by brute force in the space
+        the index searches in (after its PCA projection, if any). The cost
+        grows with the size of the subset rather than of the index, and unlike
+        an IVF or HNSW search with a selector it never misses matching
+        vectors.
+
+        Args:
+            index (faiss.IndexIDMap2): Index built by build()
+            queries (np.ndarray): float32 query matrix
+            positions (np.ndarray): Sorted insertion positions to search
+            k (int): Neighbours per query
+
+        Returns:
+            tuple: (squared L2 distances, positions), both of shape
+                (n_queries, k), padded with inf and -1 when the subset holds
+                fewer than k vectors
+        """
+        base = faiss.downcast_index(index.index)
+        core = IndexFactory.core_index(base)
+        if isinstance(core, faiss.IndexIVF) and core.direct_map.type == faiss.DirectMap.NoMap:
+            core.make_direct_map()
+        if isinstance(base, faiss.IndexPreTransform):
+            for i in range(base.chain.size()):
+                queries = base.chain.at(i).apply(queries)
+
+        positions = np.asarray(positions, dtype='int64')
+        found = min(k, len(positions))
+        distances = np.full((len(queries), k), np.inf, dtype='float32')
+        chosen = np.full((len(queries), k), -1, dtype='int64')
+        if not found:
+            return distances, chosen
+
+        breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+        run_starts = np.concatenate([[0], breaks])
+        run_ends = np.concatenate([breaks, [len(positions)]])
+        vectors = np.vstack([
+            core.reconstruct_n(int(positions[a]), int(b - a)) for a, b in zip(run_starts, run_ends)
+        ])
+        distances[:, :found], local = faiss.knn(np.ascontiguousarray(queries, dtype='float32'), vectors, found)
+        chosen[:, :found] = positions[local]
+        return distances, chosen
+
+    @staticmethod
+    def index_type_of(index):
+        """
+        Detect which index type an ID-mapped index wraps
+
+        Args:
+            index (faiss.Index): Index built by build(), possibly loaded from disk
+
+        Returns:
+            str: One of INDEX_TYPES
+        """
+        base = IndexFactory.core_index(index)
+        if isinstance(base, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(base, faiss.IndexIVF):
+            return "ivf_flat"
+        if isinstance(base, faiss.IndexHNSW):
+            return "hnsw"
+        return "flat"
+
+    @staticmethod
+    def search_parameters(index, selector=None):
+        """
+        Search parameters of the right type for an index
+
+        IVF and HNSW indexes reject the generic SearchParameters, and typed
+        parameters replace the index's own nprobe / efSearch, so those are
+        copied over.
+
+        Args:
+            index (faiss.Index): Index built by build()
+            selector (faiss.IDSelector): Optional selector restricting the search
+
+        Returns:
+            faiss.SearchParameters: Parameters to pass to index.search
+        """
+        base = IndexFactory.core_index(index)
+        if isinstance(base, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+        if isinstance(base, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+        return faiss.SearchParameters(sel=selector)
+
+    @staticmethod
+    def benchmark(embeddings, queries, index_types=INDEX_TYPES, k=4):
+        """
+        Compare index types against exact Flat search on the same data
+
+        Args:
+            embeddings (np.ndarray): Corpus vectors, float32 (n, dimension)
+            queries (np.ndarray): Query vectors, float32 (q, dimension)
+            index_types (tuple): Index types to measure
+            k (int): Number of neighbours per query
+
+        Returns:
+            dict: Per index type: resolved type, build seconds, recall@k and
+                p50/p99 single-query latency in milliseconds
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+        queries = np.ascontiguousarray(queries, dtype='float32')
+        ids = np.arange(len(embeddings), dtype='int64')
+
+        exact, _ = IndexFactory.build("flat", embeddings, ids)
+        _, truth = exact.search(queries, k)
+
+        results = {}
+        for index_type in index_types:
+            start = time.perf_counter()
+            index, resolved = IndexFactory.build(index_type, embeddings, ids)
+            build_seconds = time.perf_counter() - start
+
+            latencies = []
+            found = np.empty_like(truth)
+            for i, query in enumerate(queries):
+                start = time.perf_counter()
+                _, found[i:i + 1] = index.search(query[None, :], k)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            hits = sum(len(set(found[i]) & set(truth[i])) for i in range(len(queries)))
+            results[index_type] = {
+                "resolved_type": resolved,
+                "build_seconds": build_seconds,
+                f"recall@{k}": hits / truth.size,
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p99_ms": float(np.percentile(latencies, 99)),
+            }
+        return results
+
+    @staticmethod
+    def benchmark_storage(embeddings, queries, storages=tuple(STORAGE_CODECS), pca_dims=(None,), k=4):
+        """
+        Compare storage modes of a flat index against exact float32 search
+
+        Args:
+            embeddings (np.ndarray): Corpus vectors, float32 (n, dimension)
+            queries (np.ndarray): Query vectors, float32 (q, dimension)
+            storages (tuple): Storage modes to measure
+            pca_dims (tuple): PCA output dimensions to combine them with, None for none
+            k (int): Number of neighbours per query
+
+        Returns:
+            dict: Per "storage" or "storage+pcaN": recall@k and bytes per chunk
+                of the serialized index
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+        queries = np.ascontiguousarray(queries, dtype='float32')
+        ids = np.arange(len(embeddings), dtype='int64')
+
+        exact, _ = IndexFactory.build("flat", embeddings, ids)
+        _, truth = exact.search(queries, k)
+
+        results = {}
+        for pca_dim in pca_dims:
+            for storage in storages:
+                index, _ = IndexFactory.build("flat", embeddings, ids, storage, pca_dim)
+                _, found = index.search(queries, k)
+                hits = sum(len(set(found[i]) & set(truth[i])) for i in range(len(queries)))
+                name = storage if not pca_dim else f"{storage}+pca{pca_dim}"
+                results[name] = {
+                    f"recall@{k}": hits / truth.size,
+                    "bytes_per_chunk": faiss.serialize_index(index).nbytes / len(embeddings),
+                }
+        return results
+
+
+def main():
+    """
+    Command line entry point: benchmark index types on a saved store or random data
+    """
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against exact search")
+    parser.add_argument("--store", help="Directory written by LocalVectorStore.save; random data if omitted")
+    parser.add_argument("--n", type=int, default=100_000, help="Number of random vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of random vectors")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of queries")
+    parser.add_argument("--k", type=int, default=4, help="Neighbours per query")
+    parser.add_argument("--types", default=",".join(IndexFactory.INDEX_TYPES), help="Comma-separated index types")
+    parser.add_argument("--storage", help="Compare comma-separated storage modes (float32,float16,int8) instead")
+    parser.add_argument("--pca-dims", default="", help="Comma-separated PCA dimensions to combine with --storage")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.store:
+        from .vectorstore import LocalVectorStore
+        embeddings = LocalVectorStore.load(Path(args.store), None, mmap=False).embeddings
+    else:
+        embeddings = rng.standard_normal((args.n, args.dim)).astype('float32')
+
+    # Queries are perturbed corpus vectors, like questions close to a passage
+    sample = embeddings[rng.integers(0, len(embeddings), size=args.queries)]
+    queries = sample + 0.1 * rng.standard_normal(sample.shape).astype('float32')
+
+    if args.storage:
+        pca_dims = (None,) + tuple(int(d) for d in args.pca_dims.split(",") if d)
+        results = IndexFactory.benchmark_storage(
+            embeddings, queries, tuple(args.storage.split(",")), pca_dims, k=args.k
+        )
+    else:
+        results = IndexFactory.benchmark(embeddings, queries, tuple(args.types.split(",")), k=args.k)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
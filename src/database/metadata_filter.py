@@ -0,0 +1,132 @@
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+
+import numpy as np
+
+
+@dataclass
+class MetadataFilter:
+    """
+    Restricts a search to the chunks whose metadata match
+
+    Fields left as None match everything; the fields that are set must all
+    match.
+
+    Attributes:
+        doc_ids (list): Document ids to search
+        sources (list): Source file names to search
+        pages (tuple): (first, last) page numbers as stored in the chunk
+            metadata (0-based for PDFs), inclusive; either end may be None for
+            an open range. Chunks without a page never match
+        uploaded_after (float | datetime | date | str): Only documents added at
+            or after this time, as epoch seconds, a datetime or an ISO string
+        uploaded_before (float | datetime | date | str): Only documents added
+            before this time
+    """
+    doc_ids: list = None
+    sources: list = None
+    pages: tuple = None
+    uploaded_after: object = None
+    uploaded_before: object = None
+
+    @classmethod
+    def from_dict(cls, spec):
+        """
+        Build a filter from a JSON-style dict
+
+        "doc_id" and "source" are accepted for a single value, and "pages"
+        may be a two-element list.
+
+        Args:
+            spec (dict): Filter fields, e.g. {"source": "a.pdf", "pages": [3, 9]}
+
+        Returns:
+            MetadataFilter | None: The filter, None for an empty spec
+
+        Raises:
+            ValueError: On unknown fields or a malformed page range or date
+        """
+        if not spec:
+            return None
+        spec = dict(spec)
+        for single, plural in (("doc_id", "doc_ids"), ("source", "sources")):
+            if single in spec:
+                spec[plural] = [spec.pop(single)]
+        unknown = set(spec) - {field.name for field in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+        if spec.get("pages") is not None:
+            if len(spec["pages"]) != 2:
+                raise ValueError("pages must be [first, last]")
+            spec["pages"] = tuple(spec["pages"])
+        metadata_filter = cls(**spec)
+        # Fail on bad dates now rather than at search time
+        for value in (metadata_filter.uploaded_after, metadata_filter.uploaded_before):
+            if value is not None:
+                cls.timestamp(value)
+        return metadata_filter
+
+    @staticmethod
+    def timestamp(value):
+        """
+        Convert a time to epoch seconds
+
+        Args:
+            value (float | datetime | date | str): Epoch seconds, a datetime, a
+                date (midnight, local time) or an ISO 8601 string
+
+        Returns:
+            float: Epoch seconds
+
+        Raises:
+            ValueError: If a string is not an ISO 8601 date or time
+        """
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if isinstance(value, datetime):
+            return value.timestamp()
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day).timestamp()
+        return float(value)
+
+    def mask(self, chunks):
+        """
+        Find the chunks that match
+
+        Document and source conditions are evaluated once per distinct
+        document or source and then gathered, so the per-chunk work is a few
+        vectorized array operations.
+
+        Args:
+            chunks (ChunkStore): Chunks to filter
+
+        Returns:
+            np.ndarray: One bool per chunk position
+        """
+        docs_ok = np.ones(len(chunks.doc_table), dtype=bool)
+        if self.doc_ids is not None:
+            wanted = set(self.doc_ids)
+            docs_ok &= np.array([doc_id in wanted for doc_id in chunks.doc_table], dtype=bool)
+        if self.uploaded_after is not None or self.uploaded_before is not None:
+            # Unknown times are NaN, which fails both comparisons
+            added = np.asarray(chunks.doc_added, dtype='float64')
+            with np.errstate(invalid="ignore"):
+                if self.uploaded_after is not None:
+                    docs_ok &= added >= self.timestamp(self.uploaded_after)
+                if self.uploaded_before is not None:
+                    docs_ok &= added < self.timestamp(self.uploaded_before)
+        mask = docs_ok[chunks.docs] if len(docs_ok) else np.zeros(len(chunks), dtype=bool)
+
+        if self.sources is not None:
+            wanted = set(self.sources)
+            sources_ok = np.array([source in wanted for source in chunks.source_table], dtype=bool)
+            mask &= sources_ok[chunks.sources]
+        if self.pages is not None:
+            first, last = self.pages
+            pages = chunks.pages
+            mask &= pages != chunks.NO_PAGE
+            if first is not None:
+                mask &= pages >= first
+            if last is not None:
+                mask &= pages <= last
+        return mask
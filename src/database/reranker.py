@@ -0,0 +1,115 @@
+from collections import OrderedDict
+import dataclasses
+import hashlib
+import re
+import threading
+import time
+
+
+class Reranker:
+    """
+    Reorders retrieved chunks with a local cross-encoder
+
+    This class:
+    1. Scores (query, chunk) pairs in batches with a CrossEncoder on the CPU
+    2. Caches scores by query and chunk text, so follow-up questions that
+       retrieve the same chunks only pay for new pairs
+    3. Stops once a per-query latency budget is exceeded and keeps the original
+       retrieval order, so a slow machine never delays the answer by much
+    4. Reports the time spent and how many pairs were scored or cached
+    """
+
+    def __init__(self, model, batch_size=16, latency_budget=0.5, max_entries=10_000):
+        """
+        Initialize the reranker
+
+        Args:
+            model: sentence_transformers CrossEncoder, or anything with a
+                predict(pairs) method returning one relevance score per pair
+            batch_size (int): Pairs scored per predict call
+            latency_budget (float): Seconds a single rerank may take
+            max_entries (int): Maximum number of cached scores
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.latency_budget = latency_budget
+        self.max_entries = max_entries
+
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query, text):
+        """
+        Cache key of a (query, chunk) pair
+
+        Args:
+            query (str): User question
+            text (str): Chunk text
+
+        Returns:
+            bytes: SHA-256 digest of the normalized question and the chunk text
+        """
+        query = re.sub(r"\s+", " ", query).strip().lower()
+        return hashlib.sha256(f"{query}\0{text}".encode("utf-8")).digest()
+
+    def rerank(self, query, hits, top_k=None, min_score=None, stats=None):
+        """
+        Reorder hits by cross-encoder relevance
+
+        Args:
+            query (str): User question
+            hits (list): SearchHit objects in retrieval order
+            top_k (int): Number of hits to keep, defaults to all
+            min_score (float): Drop hits the cross-encoder scores below this
+            stats (dict): Optional dict that receives "seconds", "scored",
+                "cached" and "fallback"
+
+        Returns:
+            list: SearchHit objects with the cross-encoder score as score, best
+                first; on fallback all hits unchanged, in their original order
+        """
+        start = time.perf_counter()
+        keys = [self.key(query, hit.text) for hit in hits]
+        with self._lock:
+            scores = {key: self._scores[key] for key in keys if key in self._scores}
+            for key in scores:
+                self._scores.move_to_end(key)
+        n_cached = len(scores)
+
+        # Distinct uncached pairs, in retrieval order
+        pending = list({key: hit for key, hit in zip(keys, hits) if key not in scores}.items())
+        fallback = False
+        for batch_start in range(0, len(pending), self.batch_size):
+            if time.perf_counter() - start > self.latency_budget:
+                fallback = True
+                break
+            batch = pending[batch_start:batch_start + self.batch_size]
+            predicted = self.model.predict([(query, hit.text) for _, hit in batch])
+            new_scores = {key: float(score) for (key, _), score in zip(batch, predicted)}
+            scores.update(new_scores)
+            with self._lock:
+                for key, score in new_scores.items():
+                    self._scores[key] = score
+                    self._scores.move_to_end(key)
+                while len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+        fallback = fallback or time.perf_counter() - start > self.latency_budget
+
+        if fallback:
+            # Scores computed so far stay cached for the next question
+            result = list(hits)
+        else:
+            result = [
+                dataclasses.replace(hit, score=scores[key])
+                for key, hit in sorted(zip(keys, hits), key=lambda pair: -scores[pair[0]])
+            ]
+            if min_score is not None:
+                result = [hit for hit in result if hit.score >= min_score]
+
+        if stats is not None:
+            stats["seconds"] = time.perf_counter() - start
+            stats["scored"] = len(scores) - n_cached
+            stats["cached"] = n_cached
+            stats["fallback"] = fallback
+        return result[:top_k] if top_k is not None and not fallback else result
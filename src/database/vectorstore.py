@@ -1,47 +1,140 @@
-
 from  pathlib import Path
 
 # Get the parent directory of the current file
 parent_dir = Path(__file__).resolve().parent
 
+from dataclasses import dataclass
+import json
+import os
+import threading
+import time
+import uuid
+
 import faiss
 import numpy as np
 
+from .bm25_index import BM25Index
+from .chunk_store import ChunkStore
+from .index_factory import IndexFactory
+from .metadata_filter import MetadataFilter
+
 from langchain.schema import Document
 
+
+@dataclass
+class SearchHit:
+    """
+    One similarity search result
+
+    Attributes:
+        text (str): Chunk text
+        score (float): L2 distance to the query, lower is more similar; for
+            hybrid search the fused RRF score, higher is more similar
+        chunk_id (int): FAISS id of the chunk
+        doc_id (str): Document id the chunk was added under
+        source (str | None): Source file name from the chunk metadata
+        page (int | None): Page number from the chunk metadata
+    """
+    text: str
+    score: float
+    chunk_id: int
+    doc_id: str
+    source: str = None
+    page: int = None
+
+
 class LocalVectorStore:
     """
     A local vector store using FAISS for similarity search
-    
+
     This class:
-    1. Stores document chunks and their embeddings
+    1. Stores document chunks in a compact ChunkStore, with their embeddings
+       held only by the FAISS index as float32, float16 or int8 codes
+       (optionally PCA-projected)
     2. Creates a FAISS index for fast similarity search
     3. Provides methods to add documents and search for similar content
+    4. Supports incremental additions and deletions by document id
+    5. Saves to and loads from disk, optionally memory-mapping the vectors
+       and chunks
+    6. Keeps a BM25 index next to FAISS for hybrid lexical + dense search
+    7. Holds many documents side by side and restricts searches to the chunks
+       matching a MetadataFilter (document, source, page range, upload time)
+       inside the FAISS search itself
     """
-    
-    def __init__(self, embedding_model):
+
+    # Settings; the chunks themselves are ChunkStore.FILES
+    CHUNKS_FILE = "chunks.json"
+    INDEX_FILE = "index.faiss"
+
+    # Rebuild a trained index once the corpus has grown this many times over
+    REBUILD_GROWTH_FACTOR = 4
+
+    # Reciprocal-rank fusion constant; larger values flatten the rank weighting
+    RRF_K = 60
+
+    # Filters matching at most this many chunks are answered by an exact scan
+    # of just those vectors; broader ones by the index with an ID selector
+    FILTER_EXACT_MAX = 8192
+
+    def __init__(self, embedding_model, compact_threshold=0.25, index_type="flat", embedding_cache=None,
+                 query_cache=None, lexical=True, storage="float32", pca_dim=None):
         """
         Initialize the vector store
-        
+
         Args:
             embedding_model: SentenceTransformer model for creating embeddings
+            compact_threshold (float): Fraction of deleted chunks that triggers a
+                background compaction of the index
+            index_type (str): "flat", "ivf_flat", "ivf_pq", "hnsw" or "auto" to
+                pick one from the number of chunks (see IndexFactory)
+            embedding_cache (EmbeddingCache): Optional cache so repeated chunk
+                texts are only encoded once
+            query_cache (EmbeddingCache): Optional small LRU of query embeddings,
+                so repeated questions skip the encoder
+            lexical (bool): Also maintain a BM25 index for hybrid_search_batch
+            storage (str): "float32", "float16" or "int8" codes per vector
+            pca_dim (int): Optionally project vectors to this many dimensions,
+                with a PCA fitted on the corpus once it has that many chunks
         """
         self.embedding_model = embedding_model
-        self.chunks = []           # Store original text chunks
-        self.embeddings = None     # Store embedding vectors
-        self.index = None          # FAISS search index
-    
-    def add_documents(self, documents):
+        self.compact_threshold = compact_threshold
+        self.index_type = index_type
+        self.embedding_cache = embedding_cache
+        self.query_cache = query_cache
+        self.storage = storage
+        self.pca_dim = pca_dim
+        self.chunks = ChunkStore()  # Text, document id, source and page of every chunk
+        self._ids = np.empty(0, dtype='int64')  # Backs chunk_ids, grown geometrically
+        self._n_ids = 0
+        self.index = None          # FAISS search index (ID-mapped), the only copy of the vectors
+        self.lexical_index = BM25Index() if lexical else None
+        self._lexical_stale = False  # Restored chunks not yet in the BM25 index
+
+        self._next_id = 0
+        self._deleted = set()      # FAISS ids deleted but not yet compacted away
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()  # One compaction at a time
+        self._compaction_thread = None
+        self._index_is_mmapped = False  # Memory-mapped FAISS indexes cannot grow
+        self._built_for = 0        # Number of chunks the current index was built for
+
+    def add_documents(self, documents, doc_id=None, added_at=None):
         """
         Add documents to the vector store and create embeddings
-        
+
         This method:
         1. Extracts text content from document objects
-        2. Creates embeddings for each chunk using the local model
-        3. Builds a FAISS index for fast similarity search
-        
+        2. Creates embeddings for the new chunks only using the local model
+        3. Appends them to the existing FAISS index for fast similarity search
+
         Args:
             documents (list): List of LangChain document objects
+            doc_id (str): Identifier used to delete these chunks later. A random
+                id is generated when omitted.
+            added_at (float): Upload time in epoch seconds, now if omitted
+
+        Returns:
+            str: The document id the chunks were stored under
         """
 
         # Ensure that we are dealing with a list of Document objects
@@ -51,45 +144,740 @@ class LocalVectorStore:
                 documents = [Document(page_content=doc) for doc in documents]
             elif not isinstance(documents[0], Document):
                 raise ValueError("documents must be a list of strings or Document objects")
-        
+
         # Extract text content from LangChain document objects
-        self.chunks = [doc.page_content for doc in documents]
-        
+        new_chunks = [doc.page_content for doc in documents]
+
         # Create embeddings locally (no API calls!)
-        embeddings = self.embedding_model.encode(self.chunks)
-        self.embeddings = np.array(embeddings).astype('float32')
-        
-        # Create FAISS index for fast similarity search
-        # IndexFlatL2 uses L2 (Euclidean) distance for similarity
-        dimension = self.embeddings.shape[1]  # 384 for all-MiniLM-L6-v2
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(self.embeddings)
-    
-    def similarity_search(self, query, k=4):
+        embeddings = self.encode_chunks(new_chunks)
+        return self.add_embeddings(documents, embeddings, doc_id, added_at)
+
+    def encode_chunks(self, texts):
+        """
+        Embed chunk texts, going through the embedding cache when there is one
+
+        Args:
+            texts (list): Chunk texts
+
+        Returns:
+            np.ndarray: One embedding row per text
+        """
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(self.embedding_model, texts)
+        return self.embedding_model.encode(texts)
+
+    def encode_queries(self, queries):
+        """
+        Embed queries, going through the query cache when there is one
+
+        Args:
+            queries (list): Questions
+
+        Returns:
+            np.ndarray: float32 embeddings, one row per query
+        """
+        if self.query_cache is not None:
+            embeddings = self.query_cache.encode(self.embedding_model, queries)
+        else:
+            embeddings = self.embedding_model.encode(queries)
+        return np.array(embeddings).astype('float32')
+
+    def add_embeddings(self, documents, embeddings, doc_id=None, added_at=None):
+        """
+        Add documents whose embeddings have already been computed
+
+        Used by add_documents and by the ingestion pipeline, which encodes
+        chunks in micro-batches on a separate thread.
+
+        Args:
+            documents (list): List of LangChain document objects
+            embeddings (np.ndarray): One embedding row per document
+            doc_id (str): Identifier used to delete these chunks later. A random
+                id is generated when omitted.
+            added_at (float): Upload time in epoch seconds, now if omitted
+
+        Returns:
+            str: The document id the chunks were stored under
+        """
+        new_chunks = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        return self._add_encoded(
+            len(new_chunks), embeddings, doc_id,
+            lambda doc_id: self.chunks.extend(new_chunks, doc_id, metadatas, added_at),
+            new_chunks,
+        )
+
+    def add_page_chunks(self, page_chunks, embeddings, doc_id=None, added_at=None):
+        """
+        Add chunks held as offsets into their page texts
+
+        Used by the ingestion pipeline with the PageChunks of an
+        OffsetTextSplitter: chunk bytes are copied from the pages straight
+        into the chunk store, without a Document per chunk.
+
+        Args:
+            page_chunks (PageChunks): Page texts and chunk offsets
+            embeddings (np.ndarray): One embedding row per chunk
+            doc_id (str): Identifier used to delete these chunks later. A random
+                id is generated when omitted.
+            added_at (float): Upload time in epoch seconds, now if omitted
+
+        Returns:
+            str: The document id the chunks were stored under
+        """
+        return self._add_encoded(
+            len(page_chunks), embeddings, doc_id,
+            lambda doc_id: self.chunks.extend_offsets(
+                page_chunks.texts, page_chunks.metadatas, page_chunks.pages,
+                page_chunks.starts, page_chunks.ends, doc_id, added_at,
+            ),
+            (page_chunks.text(i) for i in range(len(page_chunks))),
+        )
+
+    def _add_encoded(self, n_new, embeddings, doc_id, extend_chunks, texts):
+        """
+        Body of add_embeddings and add_page_chunks
+
+        Args:
+            n_new (int): Number of chunks being added
+            embeddings (np.ndarray): One embedding row per chunk
+            doc_id (str): Document id, random if omitted
+            extend_chunks (callable): Appends the chunks to the chunk store,
+                given the document id; called with the lock held
+            texts (iterable): Chunk texts for the BM25 index
+
+        Returns:
+            str: The document id the chunks were stored under
+        """
+        doc_id = doc_id or uuid.uuid4().hex
+        embeddings = np.array(embeddings).astype('float32')
+
+        with self._lock:
+            self._ensure_writable()
+
+            new_ids = np.arange(self._next_id, self._next_id + n_new, dtype='int64')
+            self._next_id += n_new
+
+            extend_chunks(doc_id)
+            self._append_ids(new_ids)
+            if self.lexical_index is not None and not self._lexical_stale:
+                self.lexical_index.add(new_ids, texts)
+
+            if self._needs_rebuild(embeddings):
+                # Create FAISS index for fast similarity search. The ID map lets
+                # us remove chunks without renumbering the others. Earlier
+                # vectors are decoded from the old index, which is their only copy
+                if self.index is not None:
+                    embeddings = np.vstack([IndexFactory.reconstruct_all(self.index), embeddings])
+                self.index, _ = IndexFactory.build(
+                    self.index_type, embeddings, self.chunk_ids, self.storage, self.pca_dim
+                )
+                self._built_for = len(self.chunks)
+            else:
+                self.index.add_with_ids(embeddings, new_ids)
+
+        return doc_id
+
+    @property
+    def chunk_ids(self):
+        """
+        FAISS id of every chunk, ascending
+
+        Returns:
+            np.ndarray: int64 view in chunk order
+        """
+        return self._ids[:self._n_ids]
+
+    @chunk_ids.setter
+    def chunk_ids(self, chunk_ids):
+        self._ids = np.asarray(chunk_ids, dtype='int64')
+        self._n_ids = len(self._ids)
+
+    def _append_ids(self, new_ids):
+        """
+        Append chunk ids, doubling the backing array when it is full so that
+        adding a batch costs its own size rather than the size of the store
+        """
+        n_ids = self._n_ids + len(new_ids)
+        if n_ids > len(self._ids):
+            grown = np.empty(max(n_ids, 2 * len(self._ids), 1024), dtype='int64')
+            grown[:self._n_ids] = self._ids[:self._n_ids]
+            self._ids = grown
+        self._ids[self._n_ids:n_ids] = new_ids
+        self._n_ids = n_ids
+
+    @property
+    def doc_ids(self):
+        """
+        Document id of every chunk
+
+        Returns:
+            list: Document ids in chunk order
+        """
+        return [self.chunks.doc_table[i] for i in self.chunks.docs]
+
+    @property
+    def metadatas(self):
+        """
+        Metadata of every chunk
+
+        Returns:
+            list: "source" and "page" dicts in chunk order
+        """
+        return [self.chunks.metadata(pos) for pos in range(len(self.chunks))]
+
+    def _positions(self, chunk_ids):
+        """
+        Positions of chunks in the store, found by binary search on chunk_ids
+
+        Args:
+            chunk_ids (np.ndarray): FAISS ids, -1 for empty result slots
+
+        Returns:
+            np.ndarray: Position of every id, -1 where the id is not stored
+        """
+        chunk_ids = np.asarray(chunk_ids, dtype='int64')
+        if not len(self.chunk_ids):
+            return np.full(chunk_ids.shape, -1, dtype='int64')
+        positions = np.minimum(np.searchsorted(self.chunk_ids, chunk_ids), len(self.chunk_ids) - 1)
+        return np.where(self.chunk_ids[positions] == chunk_ids, positions, -1)
+
+    def _hit(self, pos, chunk_id, score):
+        """
+        Build the SearchHit of the chunk at a position; caller holds the lock
+        """
+        metadata = self.chunks.metadata(pos)
+        return SearchHit(
+            text=self.chunks.text(pos),
+            score=score,
+            chunk_id=chunk_id,
+            doc_id=self.chunks.doc_id(pos),
+            source=metadata.get("source"),
+            page=metadata.get("page"),
+        )
+
+    def _needs_rebuild(self, embeddings):
+        """
+        Decide whether the index must be rebuilt rather than appended to
+
+        This is the case when there is no index yet, when the configured type
+        or PCA projection resolves differently at the current size (e.g. enough
+        vectors have arrived to train an IVF index), when an index trained on
+        the data (IVF or PCA) has been outgrown, or when int8 codes would clip
+        the new vectors. The rebuild then trains on the new vectors as they
+        are, and on old ones that were never clipped.
+
+        Args:
+            embeddings (np.ndarray): float32 vectors about to be added
+
+        Returns:
+            bool: True if the index should be rebuilt from all embeddings
+        """
+        if self.index is None:
+            return True
+        current = IndexFactory.index_type_of(self.index)
+        if IndexFactory.resolve_index_type(self.index_type, len(self.chunks)) != current:
+            return True
+        pca_dim = IndexFactory.pca_dim_of(self.index)
+        if IndexFactory.resolve_pca_dim(self.pca_dim, embeddings.shape[1], len(self.chunks)) != pca_dim:
+            return True
+        if not IndexFactory.fits_int8_range(self.index, embeddings):
+            return True
+        if current in ("ivf_flat", "ivf_pq") or pca_dim:
+            return len(self.chunks) >= self.REBUILD_GROWTH_FACTOR * max(self._built_for, 1)
+        return False
+
+    @property
+    def embeddings(self):
+        """
+        Embedding of every chunk, decoded from the index
+
+        The store keeps no float32 copy next to the index, so this is the
+        approximation the index searches with when storage is compressed.
+
+        Returns:
+            np.ndarray | None: float32 matrix in chunk order, None when empty
+        """
+        with self._lock:
+            if self.index is None:
+                return None
+            return IndexFactory.reconstruct_all(self.index)
+
+    def memory_per_chunk(self):
+        """
+        Bytes of index per chunk, measured from the serialized index
+
+        Returns:
+            float: Index size divided by the number of chunks
+        """
+        with self._lock:
+            if self.index is None or not self.index.ntotal:
+                return 0.0
+            return faiss.serialize_index(self.index).nbytes / self.index.ntotal
+
+    def restore(self, chunks, index, doc_ids=None, metadatas=None):
+        """
+        Restore previously built state without re-encoding anything
+
+        Args:
+            chunks (ChunkStore | list): Chunk store, or text chunks in index order
+            index (faiss.IndexIDMap2): ID-mapped FAISS index over the embeddings
+            doc_ids (list): Document id of every chunk, when chunks is a list
+            metadatas (list): Metadata dict of every chunk, when chunks is a list
+        """
+        if not isinstance(chunks, ChunkStore):
+            chunks = ChunkStore.from_lists(list(chunks), list(doc_ids), metadatas)
+        with self._lock:
+            self.chunks = chunks
+            self.index = index
+            self.chunk_ids = faiss.vector_to_array(index.id_map).astype('int64')
+            self._next_id = int(self.chunk_ids.max()) + 1 if len(self.chunk_ids) else 0
+            self._deleted = set()
+            self._index_is_mmapped = False
+            self._built_for = index.ntotal
+            if self.lexical_index is not None:
+                # Rebuilt from the text by the first hybrid search, so loading a
+                # cached document does not tokenize every chunk up front
+                self.lexical_index = BM25Index()
+                self._lexical_stale = True
+
+    def save(self, path):
+        """
+        Save the vector store to a directory
+
+        The directory holds the chunk store's arrays, the settings as JSON and
+        the serialized FAISS index, which is the only copy of the embeddings.
+        Each file is written to a temporary name first so a concurrent reader
+        never sees half a file.
+
+        Args:
+            path (str | Path): Directory to write to, created if missing
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        # Deleted chunks are not worth persisting
+        self.compact()
+
+        with self._lock:
+            if self.index is None:
+                raise ValueError("Vector store is empty")
+
+            tmp_suffix = f".tmp-{uuid.uuid4().hex}"
+            names = self.chunks.save(path, tmp_suffix)
+            with open(path / (self.CHUNKS_FILE + tmp_suffix), "w", encoding="utf-8") as f:
+                json.dump({
+                    "index_type": self.index_type,
+                    "storage": self.storage,
+                    "pca_dim": self.pca_dim,
+                }, f)
+            faiss.write_index(self.index, str(path / (self.INDEX_FILE + tmp_suffix)))
+
+        for name in (*names, self.CHUNKS_FILE, self.INDEX_FILE):
+            os.replace(path / (name + tmp_suffix), path / name)
+
+    @classmethod
+    def load(cls, path, embedding_model, mmap=True):
+        """
+        Load a vector store written by save()
+
+        With mmap enabled the FAISS index is read with IO_FLAG_MMAP_IFC and the
+        chunk arrays with numpy's mmap_mode, so vectors and text stay in the
+        files. Loading is then almost instant and several processes opening
+        the same files share one copy in the OS page cache. Both are copied
+        into memory the first time new documents are added. Stores saved with
+        their chunks inside the JSON file still load.
+
+        Args:
+            path (str | Path): Directory written by save()
+            embedding_model: SentenceTransformer model used for future queries
+            mmap (bool): Memory-map the index and chunks instead of reading them
+
+        Returns:
+            LocalVectorStore: The loaded vector store
+        """
+        path = Path(path)
+        with open(path / cls.CHUNKS_FILE, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+
+        if mmap:
+            index = faiss.read_index(str(path / cls.INDEX_FILE), faiss.IO_FLAG_MMAP_IFC)
+        else:
+            index = faiss.read_index(str(path / cls.INDEX_FILE))
+
+        vector_store = cls(
+            embedding_model,
+            index_type=stored.get("index_type", "flat"),
+            storage=stored.get("storage", "float32"),
+            pca_dim=stored.get("pca_dim"),
+        )
+        if "chunks" in stored:
+            vector_store.restore(stored["chunks"], index, stored["doc_ids"], stored.get("metadatas"))
+        else:
+            vector_store.restore(ChunkStore.load(path, mmap=mmap), index)
+        vector_store._index_is_mmapped = mmap
+        return vector_store
+
+    def _ensure_lexical(self):
+        """
+        Index restored chunks in BM25 on first use; caller holds the lock
+
+        Returns:
+            BM25Index | None: The lexical index, None when disabled
+        """
+        if self._lexical_stale:
+            self.lexical_index.add(self.chunk_ids, self.chunks)
+            self._lexical_stale = False
+        return self.lexical_index
+
+    def _ensure_writable(self):
+        """
+        Copy a memory-mapped index into memory so it can be modified
+        """
+        if self._index_is_mmapped:
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            self._index_is_mmapped = False
+
+    def delete_document(self, doc_id):
+        """
+        Delete every chunk of a document
+
+        The chunks are excluded from search results immediately. The index itself
+        is compacted in a background thread once enough deletions pile up.
+
+        Args:
+            doc_id (str): Document id returned by add_documents
+
+        Returns:
+            int: Number of chunks deleted
+        """
+        with self._lock:
+            removed = [
+                int(chunk_id)
+                for chunk_id in self.chunk_ids[self.chunks.doc_positions(doc_id)]
+                if int(chunk_id) not in self._deleted
+            ]
+            self._deleted.update(removed)
+
+            if self.index is not None and self.index.ntotal:
+                if len(self._deleted) / self.index.ntotal >= self.compact_threshold:
+                    self._start_compaction()
+
+        return len(removed)
+
+    def document_ids(self):
+        """
+        List the documents currently held by the store
+
+        Returns:
+            list: Document ids in insertion order
+        """
+        with self._lock:
+            docs = self.chunks.docs
+            if self._deleted:
+                docs = docs[~np.isin(self.chunk_ids, np.fromiter(self._deleted, dtype='int64'))]
+            _, first = np.unique(docs, return_index=True)
+            return [self.chunks.doc_table[i] for i in docs[np.sort(first)]]
+
+    def document_info(self):
+        """
+        Describe the documents currently held by the store
+
+        Returns:
+            list: One dict per document, in insertion order, with "doc_id",
+                "sources", "chunks" and "uploaded_at" (epoch seconds or None)
+        """
+        with self._lock:
+            live = self._live_positions()
+            docs = self.chunks.docs[live]
+            doc_index = {doc_id: i for i, doc_id in enumerate(self.chunks.doc_table)}
+            info = []
+            for doc_id in self.document_ids():
+                in_doc = live[docs == doc_index[doc_id]]
+                sources = np.unique(self.chunks.sources[in_doc])
+                info.append({
+                    "doc_id": doc_id,
+                    "sources": [self.chunks.source_table[i] for i in sources if self.chunks.source_table[i] is not None],
+                    "chunks": len(in_doc),
+                    "uploaded_at": self.chunks.added_at(doc_id),
+                })
+            return info
+
+    def add_vector_store(self, other, added_at=None):
+        """
+        Copy every document of another store into this one
+
+        Chunks keep their text, metadata and upload time, and their vectors
+        are decoded from the other store's index rather than re-encoded, so a
+        document processed on its own can join a shared corpus for the cost
+        of an index append. Documents this store already holds are skipped.
+
+        Args:
+            other (LocalVectorStore): Store to copy from, built with the same
+                embedding model
+            added_at (float): Upload time to record for the copied documents,
+                their time in the other store if omitted
+
+        Returns:
+            list: Document ids that were added
+        """
+        known = set(self.document_ids())
+        # Copy out under the other store's lock, then add under ours
+        copies = []
+        with other._lock:
+            if other.index is None:
+                return []
+            embeddings = IndexFactory.reconstruct_all(other.index)
+            live = other._live_positions()
+            docs = other.chunks.docs[live]
+            doc_index = {doc_id: i for i, doc_id in enumerate(other.chunks.doc_table)}
+            for doc_id in other.document_ids():
+                if doc_id in known:
+                    continue
+                positions = live[docs == doc_index[doc_id]]
+                documents = [
+                    Document(page_content=other.chunks.text(pos), metadata=other.chunks.metadata(pos))
+                    for pos in positions
+                ]
+                # The raw time, so an unknown one stays unknown rather than becoming now
+                doc_added = other.chunks.doc_added[doc_index[doc_id]] if added_at is None else added_at
+                copies.append((documents, embeddings[positions], doc_id, doc_added))
+
+        for documents, doc_embeddings, doc_id, doc_added in copies:
+            self.add_embeddings(documents, doc_embeddings, doc_id, doc_added)
+        return [doc_id for _, _, doc_id, _ in copies]
+
+    def _live_positions(self):
+        """
+        Positions of the chunks that are not deleted; caller holds the lock
+        """
+        if not self._deleted:
+            return np.arange(len(self.chunks))
+        return np.flatnonzero(~np.isin(self.chunk_ids, np.fromiter(self._deleted, dtype='int64')))
+
+    def _select(self, metadata_filter):
+        """
+        Positions of the live chunks a filter matches; caller holds the lock
+        """
+        mask = metadata_filter.mask(self.chunks)
+        if self._deleted:
+            mask &= ~np.isin(self.chunk_ids, np.fromiter(self._deleted, dtype='int64'))
+        return np.flatnonzero(mask)
+
+    def compact(self):
+        """
+        Rebuild the index without deleted chunks
+
+        Searches keep running against the current index while the new one is
+        built; only the final swap holds the lock.
+        """
+        with self._compaction_lock:
+            self._compact()
+
+    def _compact(self):
+        """
+        Body of compact(), called with the compaction lock held
+        """
+        with self._lock:
+            if not self._deleted or self.index is None:
+                return
+            deleted = set(self._deleted)
+            n_snapshot = len(self.chunks)
+            keep = np.array(
+                [int(chunk_id) not in deleted for chunk_id in self.chunk_ids],
+                dtype=bool,
+            )
+            kept_embeddings = IndexFactory.reconstruct_all(self.index)[keep]
+            kept_ids = self.chunk_ids[keep]
+
+        new_index, _ = IndexFactory.build(self.index_type, kept_embeddings, kept_ids, self.storage, self.pca_dim)
+
+        with self._lock:
+            # Carry over chunks that were added while the new index was built
+            positions = np.concatenate([np.flatnonzero(keep), np.arange(n_snapshot, len(self.chunks))])
+            if len(self.chunks) > n_snapshot:
+                added = faiss.downcast_index(self.index.index).reconstruct_n(n_snapshot, len(self.chunks) - n_snapshot)
+                if IndexFactory.fits_int8_range(new_index, added):
+                    new_index.add_with_ids(added, self.chunk_ids[n_snapshot:])
+                else:
+                    # Retrain on them too rather than clip them
+                    new_index, _ = IndexFactory.build(
+                        self.index_type, np.vstack([kept_embeddings, added]), self.chunk_ids[positions],
+                        self.storage, self.pca_dim,
+                    )
+
+            self.chunks = self.chunks.take(positions)
+            self.chunk_ids = self.chunk_ids[positions]
+            self._deleted -= deleted
+            if self.lexical_index is not None and not self._lexical_stale:
+                self.lexical_index.remove(deleted)
+            self.index = new_index
+            self._index_is_mmapped = False
+            self._built_for = len(kept_ids)
+
+    def wait_for_compaction(self):
+        """
+        Block until a running background compaction has finished
+        """
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join()
+
+    def _start_compaction(self):
+        """
+        Run compact() in a background thread unless one is already running
+        """
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self._compaction_thread.start()
+
+    def similarity_search(self, query, k=4, filter=None):
         """
         Find the most similar chunks to a query
-        
+
         Args:
             query (str): User's question
             k (int): Number of similar chunks to return
-            
+            filter (MetadataFilter | dict): Only search the matching chunks
+
         Returns:
             list: List of most similar text chunks
         """
-        if self.index is None:
-            return []
-        
-        # Create embedding for the query
-        query_embedding = self.embedding_model.encode([query])
-        query_embedding = np.array(query_embedding).astype('float32')
-        
-        # Search for similar chunks
-        distances, indices = self.index.search(query_embedding, k)
-        
-        # Return the actual text chunks
+        return [hit.text for hit in self.similarity_search_batch([query], k=k, filter=filter)[0]]
+
+    def similarity_search_batch(self, queries, k=4, timings=None, filter=None):
+        """
+        Find the most similar chunks for many queries at once
+
+        All queries are encoded in a single encode call and searched with a
+        single FAISS search over the query matrix, which removes the per-query
+        overhead when evaluating thousands of questions.
+
+        Args:
+            queries (list): List of questions
+            k (int): Number of similar chunks to return per question
+            timings (dict): Optional dict that receives "encode" and "search"
+                times in seconds
+            filter (MetadataFilter | dict): Only search the matching chunks.
+                A filter matching at most FILTER_EXACT_MAX chunks is answered
+                by an exact scan of those vectors alone; a broader one is
+                passed to FAISS as an ID selector. Either way the cost follows
+                the matching subset rather than the whole corpus
+
+        Returns:
+            list: One list of SearchHit per query, most similar first
+        """
+        if isinstance(filter, dict):
+            filter = MetadataFilter.from_dict(filter)
+        if self.index is None or not queries:
+            return [[] for _ in queries]
+
+        # Create embeddings for all queries in one call
+        start = time.perf_counter()
+        query_embeddings = self.encode_queries(list(queries))
+        encoded = time.perf_counter()
+
+        with self._lock:
+            if filter is not None:
+                distances, indices = self._filtered_search(query_embeddings, k, filter)
+            # Search for similar chunks, skipping deleted ones inside FAISS
+            elif self._deleted:
+                deleted = faiss.IDSelectorBatch(np.fromiter(self._deleted, dtype='int64'))
+                selector = faiss.IDSelectorNot(deleted)
+                params = IndexFactory.search_parameters(self.index, selector)
+                distances, indices = self.index.search(query_embeddings, k, params=params)
+            else:
+                distances, indices = self.index.search(query_embeddings, k)
+
+            results = []
+            for row_distances, row_indices, row_positions in zip(distances, indices, self._positions(indices)):
+                results.append([
+                    self._hit(pos, int(chunk_id), float(distance))
+                    for distance, chunk_id, pos in zip(row_distances, row_indices, row_positions)
+                    if pos >= 0
+                ])
+
+        if timings is not None:
+            timings["encode"] = encoded - start
+            timings["search"] = time.perf_counter() - encoded
+        return results
+
+    def _filtered_search(self, query_embeddings, k, metadata_filter):
+        """
+        Search only the chunks a filter matches; caller holds the lock
+
+        Returns:
+            tuple: (distances, chunk ids) like index.search, -1 for empty slots
+        """
+        positions = self._select(metadata_filter)
+        if len(positions) <= self.FILTER_EXACT_MAX:
+            distances, found = IndexFactory.search_positions(self.index, query_embeddings, positions, k)
+            return distances, np.where(found >= 0, self.chunk_ids[found], -1)
+        selector = faiss.IDSelectorBatch(self.chunk_ids[positions])
+        params = IndexFactory.search_parameters(self.index, selector)
+        return self.index.search(query_embeddings, k, params=params)
+
+    def hybrid_search_batch(self, queries, k=4, fetch_k=None, timings=None, filter=None):
+        """
+        Find the best chunks for many queries using BM25 and dense search
+
+        Both retrievers return their own ranking, which are merged with
+        reciprocal-rank fusion: every chunk scores the sum of 1 / (RRF_K + rank)
+        over the rankings it appears in. Exact identifiers and names that the
+        embedding model blurs together are still found by the lexical side.
+
+        Args:
+            queries (list): List of questions
+            k (int): Number of chunks to return per question
+            fetch_k (int): Candidates taken from each retriever, defaults to 4 * k
+            timings (dict): Optional dict that receives "dense" (made up of
+                "encode" and "search"), "lexical" and "fusion" times in seconds
+            filter (MetadataFilter | dict): Only search the matching chunks, on
+                both the dense and the lexical side
+
+        Returns:
+            list: One list of SearchHit per query, best first, scored by RRF
+        """
+        fetch_k = fetch_k or 4 * k
+        if isinstance(filter, dict):
+            filter = MetadataFilter.from_dict(filter)
+
+        start = time.perf_counter()
+        dense = self.similarity_search_batch(queries, k=fetch_k, timings=timings, filter=filter)
+        dense_done = time.perf_counter()
+
+        with self._lock:
+            lexical_index = self._ensure_lexical()
+            if lexical_index is not None and len(lexical_index):
+                include = self.chunk_ids[self._select(filter)] if filter is not None else None
+                lexical = lexical_index.search_batch(queries, fetch_k, exclude=self._deleted, include=include)
+            else:
+                lexical = [[] for _ in queries]
+        lexical_done = time.perf_counter()
+
         results = []
-        for i in indices[0]:
-            if i < len(self.chunks):
-                results.append(self.chunks[i])
-        
-        return results
\ No newline at end of file
+        with self._lock:
+            for dense_hits, lexical_hits in zip(dense, lexical):
+                fused = {}
+                for rank, hit in enumerate(dense_hits):
+                    fused[hit.chunk_id] = fused.get(hit.chunk_id, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+                for rank, (chunk_id, _) in enumerate(lexical_hits):
+                    fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+
+                hits = []
+                ranked = sorted(fused.items(), key=lambda item: -item[1])
+                positions = self._positions([chunk_id for chunk_id, _ in ranked])
+                for (chunk_id, score), pos in zip(ranked, positions):
+                    if pos < 0:
+                        continue
+                    hits.append(self._hit(pos, chunk_id, score))
+                    if len(hits) == k:
+                        break
+                results.append(hits)
+
+        if timings is not None:
+            timings["dense"] = dense_done - start
+            timings["lexical"] = lexical_done - dense_done
+            timings["fusion"] = time.perf_counter() - lexical_done
+        return results
@@ -0,0 +1,191 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+from .offset_splitter import PageChunks
+from .pdf_loader import PdfLoader
+
+
+class IngestionPipeline:
+    """
+    Streams a PDF through parse -> split -> embed -> index with overlapping stages
+
+    This class:
+    1. Runs parsing, splitting and embedding on their own threads, connected by
+       bounded queues, so early pages are embedded while later pages are parsed
+    2. Encodes chunks in fixed-size micro-batches
+    3. Applies backpressure: a full queue blocks the stage feeding it, which caps
+       how many pages and chunks are held in memory at once
+    4. Adds each embedded batch to the vector store on the calling thread and
+       reports progress after every batch
+    5. With an OffsetTextSplitter, passes chunks along as offsets into their
+       pages (PageChunks) and copies them into the store from the pages, so no
+       Document is built per chunk
+    """
+
+    _DONE = object()
+
+    def __init__(self, vector_store, text_splitter, batch_size=64, max_queued_pages=32, max_queued_batches=4):
+        """
+        Initialize the pipeline
+
+        Args:
+            vector_store (LocalVectorStore): Store the chunks are added to
+            text_splitter: OffsetTextSplitter, or a LangChain text splitter,
+                applied to each page
+            batch_size (int): Chunks per embedding micro-batch
+            max_queued_pages (int): Parsed pages allowed to wait for the splitter
+            max_queued_batches (int): Batches allowed to wait for the embedder
+                and for the indexer
+        """
+        self.vector_store = vector_store
+        self.text_splitter = text_splitter
+        self.batch_size = batch_size
+        self.max_queued_pages = max_queued_pages
+        self.max_queued_batches = max_queued_batches
+
+    def run(self, pdf_bytes, source, doc_id=None, progress_callback=None, max_workers=None, timings=None):
+        """
+        Ingest a PDF into the vector store
+
+        Args:
+            pdf_bytes (bytes): Raw PDF file
+            source (str): File name stored as "source" metadata
+            doc_id (str): Document id for the vector store
+            progress_callback (callable): Called on the calling thread with
+                (pages_done, total_pages, chunks_done) after every batch
+            max_workers (int): Worker processes for PDF parsing
+            timings (dict): Optional dict that receives the seconds each stage
+                spent working ("parse", "split", "embed", "index"; they overlap,
+                so they can add up to more than "total") and "pages"
+
+        Returns:
+            int: Number of chunks added
+
+        Raises:
+            ValueError: If the PDF cannot be read
+        """
+        start = time.perf_counter()
+        total_pages = PdfLoader.count_pages(pdf_bytes)
+        # Time each stage spends working, not waiting on its queues
+        busy = {"parse": 0.0, "split": 0.0, "embed": 0.0, "index": 0.0}
+        pages = queue.Queue(maxsize=self.max_queued_pages)
+        chunk_batches = queue.Queue(maxsize=self.max_queued_batches)
+        embedded_batches = queue.Queue(maxsize=self.max_queued_batches)
+        stop = threading.Event()
+        errors = []
+
+        def put(target, item):
+            # Block while the next stage is busy, but give up once the pipeline stops
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(source_queue):
+            while not stop.is_set():
+                try:
+                    return source_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return self._DONE
+
+        def stage(body, output):
+            def target():
+                try:
+                    body()
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+                finally:
+                    put(output, self._DONE)
+            return threading.Thread(target=target, daemon=True)
+
+        def parse():
+            started = time.perf_counter()
+            for page in PdfLoader.iter_load(pdf_bytes, source, max_workers=max_workers):
+                busy["parse"] += time.perf_counter() - started
+                if not put(pages, page):
+                    return
+                started = time.perf_counter()
+
+        def split():
+            if hasattr(self.text_splitter, "split_pages"):
+                return split_pages()
+            batch = []
+            while (page := get(pages)) is not self._DONE:
+                started = time.perf_counter()
+                batch.extend(self.text_splitter.split_documents([page]))
+                busy["split"] += time.perf_counter() - started
+                while len(batch) >= self.batch_size:
+                    if not put(chunk_batches, batch[:self.batch_size]):
+                        return
+                    batch = batch[self.batch_size:]
+            if batch:
+                put(chunk_batches, batch)
+
+        def split_pages():
+            # Batches are PageChunks that share the parsed page texts
+            batch = PageChunks.concat([])
+            while (page := get(pages)) is not self._DONE:
+                started = time.perf_counter()
+                batch = PageChunks.concat([batch, self.text_splitter.split_pages([page])])
+                busy["split"] += time.perf_counter() - started
+                while len(batch) >= self.batch_size:
+                    if not put(chunk_batches, batch.take(0, self.batch_size)):
+                        return
+                    batch = batch.take(self.batch_size)
+            if len(batch):
+                put(chunk_batches, batch)
+
+        def embed():
+            while (batch := get(chunk_batches)) is not self._DONE:
+                started = time.perf_counter()
+                if isinstance(batch, PageChunks):
+                    texts = [batch.text(i) for i in range(len(batch))]
+                else:
+                    texts = [doc.page_content for doc in batch]
+                embeddings = self.vector_store.encode_chunks(texts)
+                busy["embed"] += time.perf_counter() - started
+                if not put(embedded_batches, (batch, np.asarray(embeddings))):
+                    return
+
+        threads = [stage(parse, pages), stage(split, chunk_batches), stage(embed, embedded_batches)]
+        for thread in threads:
+            thread.start()
+
+        chunks_done = 0
+        try:
+            while (item := get(embedded_batches)) is not self._DONE:
+                batch, embeddings = item
+                started = time.perf_counter()
+                if isinstance(batch, PageChunks):
+                    doc_id = self.vector_store.add_page_chunks(batch, embeddings, doc_id)
+                    last_page = batch.metadatas[batch.pages[-1]]
+                else:
+                    doc_id = self.vector_store.add_embeddings(batch, embeddings, doc_id)
+                    last_page = batch[-1].metadata
+                busy["index"] += time.perf_counter() - started
+                chunks_done += len(batch)
+                if progress_callback is not None:
+                    pages_done = last_page.get("page", total_pages - 1) + 1
+                    progress_callback(pages_done, total_pages, chunks_done)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+        if timings is not None:
+            timings.update(busy)
+            timings["total"] = time.perf_counter() - start
+            timings["pages"] = total_pages
+        if progress_callback is not None:
+            progress_callback(total_pages, total_pages, chunks_done)
+        return chunks_done
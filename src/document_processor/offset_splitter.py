@@ -0,0 +1,416 @@
+from pathlib import Path
+import sys
+
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+import argparse
+import json
+import re
+import time
+import tracemalloc
+
+import numpy as np
+
+from langchain.schema import Document
+
+
+class PageChunks:
+    """
+    Chunks of a document held as offsets into its page texts
+
+    This class:
+    1. Keeps every page's text once, as parsed
+    2. Stores each chunk as a (page, start, end) row of three NumPy arrays
+    3. Slices a chunk's text out of its page only when it is asked for
+    """
+
+    def __init__(self, texts, metadatas, pages, starts, ends):
+        """
+        Args:
+            texts (list): Text of every page
+            metadatas (list): Metadata dict of every page
+            pages (np.ndarray): Page index (into texts) of every chunk
+            starts (np.ndarray): Start offset of every chunk in its page
+            ends (np.ndarray): End offset of every chunk in its page
+        """
+        self.texts = texts
+        self.metadatas = metadatas
+        self.pages = pages
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text(self, i):
+        """
+        Text of one chunk
+
+        Args:
+            i (int): Chunk position
+
+        Returns:
+            str: The chunk, sliced from its page
+        """
+        return self.texts[self.pages[i]][self.starts[i]:self.ends[i]]
+
+    def take(self, start=0, stop=None):
+        """
+        A range of the chunks, sharing the page texts
+
+        Only the pages the range uses are kept, so a range does not hold on
+        to the rest of the document.
+
+        Args:
+            start (int): First chunk position
+            stop (int): Position after the last chunk, the end if omitted
+
+        Returns:
+            PageChunks: The chunks in the range
+        """
+        used, pages = np.unique(self.pages[start:stop], return_inverse=True)
+        return PageChunks(
+            [self.texts[page] for page in used],
+            [self.metadatas[page] for page in used],
+            pages.astype(np.int32),
+            self.starts[start:stop],
+            self.ends[start:stop],
+        )
+
+    @staticmethod
+    def concat(parts):
+        """
+        Join the chunks of several PageChunks, keeping their order
+
+        Only the page lists and offset arrays are joined; no text is copied.
+
+        Args:
+            parts (list): PageChunks to join
+
+        Returns:
+            PageChunks: All of their chunks
+        """
+        texts, metadatas, pages = [], [], []
+        for part in parts:
+            pages.append(part.pages + len(texts))
+            texts.extend(part.texts)
+            metadatas.extend(part.metadatas)
+        return PageChunks(
+            texts,
+            metadatas,
+            np.concatenate(pages).astype(np.int32) if pages else np.empty(0, dtype=np.int32),
+            np.concatenate([part.starts for part in parts]) if parts else np.empty(0, dtype=np.int64),
+            np.concatenate([part.ends for part in parts]) if parts else np.empty(0, dtype=np.int64),
+        )
+
+    def documents(self, start=0, stop=None, add_start_index=False):
+        """
+        Materialize chunks as LangChain Documents
+
+        Args:
+            start (int): First chunk position
+            stop (int): Position after the last chunk, the end if omitted
+            add_start_index (bool): Add the chunk's offset in its page as
+                "start_index" metadata
+
+        Returns:
+            list: Documents carrying their page's metadata
+        """
+        documents = []
+        for page, chunk_start, chunk_end in zip(self.pages[start:stop], self.starts[start:stop], self.ends[start:stop]):
+            metadata = dict(self.metadatas[page])
+            if add_start_index:
+                metadata["start_index"] = int(chunk_start)
+            documents.append(Document(page_content=self.texts[page][chunk_start:chunk_end], metadata=metadata))
+        return documents
+
+
+class OffsetTextSplitter:
+    """
+    A single-pass text splitter that works on offsets instead of copies
+
+    This class:
+    1. Splits text recursively on paragraphs, lines, words and characters like
+       LangChain's RecursiveCharacterTextSplitter, but every piece is a
+       (start, end) pair into the original text, so no substring is built
+       until a chunk is asked for
+    2. In "compat" mode produces exactly the chunks of
+       RecursiveCharacterTextSplitter with the same chunk_size and chunk_overlap
+    3. In "sentence" mode prefers sentence ends over line breaks, so chunks of
+       PDF text (which breaks lines mid-sentence) start and end on sentences
+    4. Splits whole documents into PageChunks, which keep each page once
+    """
+
+    MODES = ("compat", "sentence")
+    # Tried in order; a piece that is still too long is split with the next one
+    COMPAT_SEPARATORS = ["\n\n", "\n", " ", ""]
+    SENTENCE_SEPARATORS = [r"\n\s*\n", r"(?<=[.!?])\s+", r"\n", r" ", ""]
+
+    def __init__(self, chunk_size=1000, chunk_overlap=200, mode="compat", add_start_index=False):
+        """
+        Initialize the splitter
+
+        Args:
+            chunk_size (int): Maximum chunk length in characters
+            chunk_overlap (int): Characters repeated between neighbouring chunks
+            mode (str): "compat" or "sentence"
+            add_start_index (bool): split_documents adds each chunk's offset in
+                its page as "start_index" metadata
+
+        Raises:
+            ValueError: On an unknown mode or an overlap larger than the chunk
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown splitter mode {mode!r}, expected one of {self.MODES}")
+        if chunk_size <= 0 or not 0 <= chunk_overlap <= chunk_size:
+            raise ValueError(f"Invalid chunk_size {chunk_size} / chunk_overlap {chunk_overlap}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.mode = mode
+        self.add_start_index = add_start_index
+        if mode == "compat":
+            separators = self.COMPAT_SEPARATORS
+            self._patterns = [(separator, re.compile(re.escape(separator))) for separator in separators]
+        else:
+            separators = self.SENTENCE_SEPARATORS
+            self._patterns = [(separator, re.compile(separator)) for separator in separators]
+
+    def split_offsets(self, text):
+        """
+        Split a text into chunk offsets
+
+        Args:
+            text (str): Text to split
+
+        Returns:
+            list: (start, end) offsets of every chunk, in order
+        """
+        chunks = []
+        self._split(text, 0, len(text), self._patterns, chunks)
+        return chunks
+
+    def split_text(self, text):
+        """
+        Split a text into chunk strings
+
+        Args:
+            text (str): Text to split
+
+        Returns:
+            list: Chunk texts
+        """
+        return [text[start:end] for start, end in self.split_offsets(text)]
+
+    def split_pages(self, pages):
+        """
+        Split a document into chunks without copying any text
+
+        Chunks never cross a page, so every chunk keeps its page's metadata.
+
+        Args:
+            pages (list): LangChain Documents, one per page
+
+        Returns:
+            PageChunks: Page texts and the (page, start, end) of every chunk
+        """
+        texts = [page.page_content for page in pages]
+        page_numbers = []
+        offsets = []
+        for number, text in enumerate(texts):
+            spans = self.split_offsets(text)
+            page_numbers.extend([number] * len(spans))
+            offsets.extend(spans)
+        bounds = np.array(offsets, dtype=np.int64).reshape(-1, 2)
+        return PageChunks(
+            texts,
+            [page.metadata for page in pages],
+            np.array(page_numbers, dtype=np.int32),
+            bounds[:, 0],
+            bounds[:, 1],
+        )
+
+    def split_documents(self, documents):
+        """
+        Split Documents into chunk Documents, like LangChain's splitters
+
+        Args:
+            documents (list): LangChain Documents, usually one per page
+
+        Returns:
+            list: One Document per chunk with a copy of its page's metadata
+        """
+        return self.split_pages(documents).documents(add_start_index=self.add_start_index)
+
+    def _split(self, text, start, end, patterns, chunks):
+        """
+        Split text[start:end] on the first separator found in it
+
+        Pieces shorter than chunk_size are merged into chunks; longer ones are
+        split again with the remaining separators.
+
+        Args:
+            text (str): Whole text
+            start (int): Start of the span to split
+            end (int): End of the span to split
+            patterns (list): (separator, compiled pattern) pairs still to try
+            chunks (list): Receives (start, end) chunk offsets
+        """
+        separator, pattern = patterns[-1]
+        remaining = []
+        for i, (candidate, candidate_pattern) in enumerate(patterns):
+            if candidate == "":
+                separator, pattern = candidate, candidate_pattern
+                break
+            if candidate_pattern.search(text, start, end):
+                separator, pattern = candidate, candidate_pattern
+                remaining = patterns[i + 1:]
+                break
+
+        # Each separator starts the piece after it, so the pieces tile the span
+        if separator:
+            cuts = [start]
+            cuts.extend(match.start() for match in pattern.finditer(text, start, end))
+            cuts.append(end)
+            pieces = [(a, b) for a, b in zip(cuts, cuts[1:]) if a < b]
+        else:
+            pieces = [(i, i + 1) for i in range(start, end)]
+
+        good = []
+        for piece_start, piece_end in pieces:
+            if piece_end - piece_start < self.chunk_size:
+                good.append((piece_start, piece_end))
+                continue
+            if good:
+                self._merge(text, good, chunks)
+                good = []
+            if remaining:
+                self._split(text, piece_start, piece_end, remaining, chunks)
+            else:
+                chunks.append((piece_start, piece_end))
+        if good:
+            self._merge(text, good, chunks)
+
+    def _merge(self, text, pieces, chunks):
+        """
+        Merge neighbouring pieces into chunks of at most chunk_size
+
+        Each new chunk starts with the trailing pieces of the previous one, up
+        to chunk_overlap characters. Chunks are stripped of surrounding
+        whitespace by moving their offsets.
+
+        Args:
+            text (str): Whole text
+            pieces (list): Contiguous (start, end) pieces
+            chunks (list): Receives (start, end) chunk offsets
+        """
+        first = 0       # First piece of the chunk being built
+        total = 0
+        for last, (piece_start, piece_end) in enumerate(pieces):
+            length = piece_end - piece_start
+            if total + length > self.chunk_size and first < last:
+                self._emit(text, pieces[first][0], pieces[last - 1][1], chunks)
+                while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                    total -= pieces[first][1] - pieces[first][0]
+                    first += 1
+            total += length
+        if first < len(pieces):
+            self._emit(text, pieces[first][0], pieces[-1][1], chunks)
+
+    @staticmethod
+    def _emit(text, start, end, chunks):
+        """
+        Add a chunk without its surrounding whitespace, unless nothing is left
+        """
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            chunks.append((start, end))
+
+    @staticmethod
+    def benchmark(pages, chunk_size=1000, chunk_overlap=200, repeats=3):
+        """
+        Compare split throughput and peak memory against LangChain
+
+        Peak memory is traced while splitting and holding the result: LangChain
+        Documents, this splitter's Documents, and offset-only PageChunks.
+
+        Args:
+            pages (list): LangChain Documents, one per page
+            chunk_size (int): Maximum chunk length in characters
+            chunk_overlap (int): Characters repeated between neighbouring chunks
+            repeats (int): Timed runs per splitter, the best one is reported
+
+        Returns:
+            dict: Per splitter pages_per_second, mb_per_second, chunks and
+                peak_mb, and whether compat mode matched LangChain
+        """
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        compat = OffsetTextSplitter(chunk_size, chunk_overlap)
+        splitters = {
+            "langchain": RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len
+            ).split_documents,
+            "offset_documents": compat.split_documents,
+            "offset_pages": compat.split_pages,
+            "sentence_pages": OffsetTextSplitter(chunk_size, chunk_overlap, mode="sentence").split_pages,
+        }
+        megabytes = sum(len(page.page_content.encode("utf-8")) for page in pages) / 1e6
+
+        results = {}
+        for name, split in splitters.items():
+            seconds = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                chunks = split(pages)
+                seconds.append(time.perf_counter() - start)
+            del chunks
+
+            tracemalloc.start()
+            chunks = split(pages)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = {
+                "pages_per_second": len(pages) / min(seconds),
+                "mb_per_second": megabytes / min(seconds),
+                "chunks": len(chunks),
+                "peak_mb": peak / 1e6,
+            }
+            del chunks
+
+        expected = splitters["langchain"](pages)
+        results["compat_matches_langchain"] = (
+            [(doc.page_content, doc.metadata) for doc in expected]
+            == [(doc.page_content, doc.metadata) for doc in compat.split_documents(pages)]
+        )
+        return results
+
+
+def main():
+    """
+    Command line entry point: benchmark splitting a large PDF
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the offset splitter against LangChain's")
+    parser.add_argument("pdf", nargs="?", help="PDF to split, a synthetic one if omitted")
+    parser.add_argument("--pages", type=int, default=1000, help="Pages of the synthetic PDF")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    from document_processor.pdf_loader import PdfLoader
+    from utils.pipeline_benchmark import make_synthetic_pdf
+
+    if args.pdf:
+        pages = PdfLoader.load(Path(args.pdf).read_bytes(), Path(args.pdf).name)
+    else:
+        pages = PdfLoader.load(make_synthetic_pdf(args.pages), "synthetic.pdf")
+    results = OffsetTextSplitter.benchmark(pages, args.chunk_size, args.chunk_overlap, args.repeats)
+    print(json.dumps({"pages": len(pages), **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
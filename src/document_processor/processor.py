@@ -6,20 +6,132 @@ sys.path.append(str(parent_dir))
 
 
 import streamlit as st
+from groq import RateLimitError
 from utils.utils import Utils
+from database.metadata_filter import MetadataFilter
 from database.vectorstore import LocalVectorStore
+from document_processor.ingestion import IngestionPipeline
+from document_processor.pdf_loader import PdfLoader
+from agents.summarizer import DocumentSummarizer
 
 class DocumentProcessor:
     def __init__(self):
         pass
 
+    def summarize_document(self, uploaded_file, groq_client):
+        """
+        Summarize the whole document instead of the chunks retrieved for a question
+
+        Every paragraph is summarized concurrently against the abstract, then
+        the summaries are merged level by level. Summaries are cached, so a
+        second run, or a run on a revised file, only pays for what changed.
+
+        Args:
+            uploaded_file: Streamlit uploaded file object
+            groq_client: Initialized Groq API client
+        """
+        model_name = st.session_state.get('selected_model', 'llama-3.1-8b-instant')
+        summarizer = DocumentSummarizer(groq_client, model_name, cache=Utils.load_summary_cache())
+        trace = Utils.load_tracer().trace("summary", source=uploaded_file.name)
+        st.session_state.question_trace = trace
+
+        progress_bar = st.progress(0.0, text="📝 Summarizing paragraphs...")
+
+        def show_progress(done, total):
+            progress_bar.progress(done / max(total, 1), text=f"📝 Summarized {done}/{total} parts...")
+
+        try:
+            with trace.span("summarize.parse"):
+                pages = PdfLoader.load(uploaded_file.getvalue(), uploaded_file.name)
+            result = summarizer.summarize(pages, progress_callback=show_progress)
+        except Exception as e:
+            progress_bar.empty()
+            st.error(f"❌ Could not summarize the document: {e}")
+            return
+        progress_bar.empty()
+
+        trace.record("summarize.map", result["timings"]["map"])
+        trace.record("summarize.reduce", result["timings"]["reduce"])
+        trace.count("chunks", result["paragraphs"])
+        trace.count("cache_hits", result["cached"], cache="summary")
+
+        st.write("**📝 Document summary:**")
+        st.write(result["summary"])
+        st.caption(
+            f"🧩 {result['paragraphs']} paragraphs · {result['llm_calls']} Groq calls, "
+            f"{result['cached']} summaries reused · {result['levels']} merge levels"
+            + (f" · ⚠️ {result['failed']} paragraphs failed" if result['failed'] else "")
+        )
+
+    def show_timing_breakdown(self):
+        """
+        Show where the time of the last upload and the last question went
+
+        Renders a collapsed expander (meant for the sidebar) with one row per
+        pipeline stage, the request's counters and a download of the
+        process-wide metrics in the Prometheus text format.
+        """
+        tracer = Utils.load_tracer()
+        if not tracer.enabled:
+            return
+
+        with st.expander("⏱️ Timing breakdown", expanded=False):
+            for key, title in (("ingest_trace", "📄 Last upload"), ("question_trace", "💬 Last question")):
+                trace = st.session_state.get(key)
+                if trace is None or not trace.spans:
+                    continue
+                st.write(f"**{title}** · {trace.total_seconds() * 1000:.0f} ms")
+                st.table([
+                    {"Stage": stage, "ms": round(seconds * 1000, 1), "Calls": calls}
+                    for stage, seconds, calls in trace.breakdown()
+                ])
+                if trace.counts:
+                    st.caption(" · ".join(f"{name}: {value}" for name, value in trace.counts.items()))
+            st.download_button(
+                "📈 Download metrics (Prometheus)",
+                tracer.prometheus_text(),
+                file_name="metrics.prom",
+                mime="text/plain"
+            )
+
+    def choose_search_scope(self, corpus, document_key):
+        """
+        Let the user pick which uploaded documents and pages a question searches
+
+        Args:
+            corpus (LocalVectorStore): Store holding every document of the session
+            document_key (str): Document id of the file currently uploaded
+
+        Returns:
+            MetadataFilter: Filter for the chosen documents and page range
+        """
+        documents = corpus.document_info()
+        labels = {info["doc_id"]: ", ".join(info["sources"]) or info["doc_id"][:12] for info in documents}
+        with st.expander("🗂️ Search scope", expanded=False):
+            doc_ids = st.multiselect(
+                "Documents",
+                options=list(labels),
+                default=[document_key],
+                format_func=labels.get,
+                help="Documents uploaded earlier in this session stay searchable"
+            )
+            pages = None
+            n_pages = int(corpus.chunks.pages.max()) + 1 if len(corpus.chunks) else 0
+            if n_pages > 1:
+                first, last = st.slider("Pages", 1, n_pages, (1, n_pages))
+                if (first, last) != (1, n_pages):
+                    # Chunk metadata numbers pages from 0
+                    pages = (first - 1, last - 1)
+        return MetadataFilter(doc_ids=doc_ids or [document_key], pages=pages)
+
     def process_document(self, uploaded_file, groq_client, embedding_model):
         """
         Main document processing pipeline with conversation memory
         
         This function orchestrates the entire RAG pipeline:
         1. Loads and splits the PDF
-        2. Creates embeddings and vector store
+        2. Creates embeddings and adds them to the session's corpus, which
+           keeps every document uploaded so far searchable
         3. Sets up the conversational Q&A interface
         4. Handles user questions with conversation context
         
@@ -29,22 +141,92 @@ class DocumentProcessor:
             embedding_model: Loaded sentence transformer model
         """
         st.write("📄 Processing your document...")
-        
-        # Step 1: Load and split PDF
-        with st.spinner("📖 Reading PDF..."):
-            chunks = Utils.load_and_split_pdf(uploaded_file)
-        
-        if not chunks:
-            st.error("❌ Could not extract text from PDF")
-            return
-        
-        st.success(f"✅ Document loaded! Found {len(chunks)} chunks")
-        
-        # Step 2: Create vector store with embeddings
-        with st.spinner("🧮 Kindly be patient, setting up..."):
-            vector_store = LocalVectorStore(embedding_model)
-            vector_store.add_documents(chunks)
-        
+
+        document_cache = Utils.load_document_cache()
+        document_key = Utils.document_cache_key(uploaded_file)
+        tracer = Utils.load_tracer()
+
+        # Reuse the chunks added on a previous run of this session for the same file
+        corpus = st.session_state.get('corpus')
+        in_corpus = corpus is not None and document_key in corpus.document_ids()
+        if in_corpus:
+            vector_store = corpus
+        else:
+            # Step 1 & 2: Load a previously processed copy from the on-disk cache
+            trace = tracer.trace("ingest", source=uploaded_file.name)
+            st.session_state.ingest_trace = trace
+            with trace.span("document_cache.get"):
+                vector_store = document_cache.get(document_key, embedding_model)
+            trace.count("cache_hits" if vector_store is not None else "cache_misses", cache="document")
+
+        if vector_store is None:
+            # Step 1 & 2: Parse, split, embed and index the PDF as one streaming
+            # pipeline, so embedding starts while later pages are still being read
+            progress_bar = st.progress(0.0, text="📖 Reading PDF...")
+
+            def show_progress(pages_done, total_pages, chunks_done):
+                progress_bar.progress(
+                    pages_done / max(total_pages, 1),
+                    text=f"🧮 Indexed {chunks_done} chunks from {pages_done}/{total_pages} pages..."
+                )
+
+            embedding_cache = Utils.load_embedding_cache()
+            vector_store = LocalVectorStore(
+                embedding_model,
+                embedding_cache=embedding_cache,
+                storage=Utils.EMBEDDING_STORAGE
+            )
+            ingest_timings = {}
+            embedding_hits = embedding_cache.stats()["hits"]
+            try:
+                with trace.span("ingest"):
+                    n_chunks = IngestionPipeline(vector_store, Utils.make_text_splitter()).run(
+                        uploaded_file.getvalue(),
+                        uploaded_file.name,
+                        doc_id=document_key,
+                        progress_callback=show_progress,
+                        timings=ingest_timings
+                    )
+            except ValueError as e:
+                progress_bar.empty()
+                st.error(f"❌ Could not read PDF: {e}")
+                return
+            progress_bar.empty()
+
+            # The stages overlap, so each one reports the time it spent working
+            for stage in ("parse", "split", "embed", "index"):
+                trace.record(f"ingest.{stage}", ingest_timings[stage])
+            trace.count("pages", ingest_timings["pages"])
+            trace.count("chunks", n_chunks)
+            trace.count("cache_hits", embedding_cache.stats()["hits"] - embedding_hits, cache="embedding")
+
+            if not n_chunks:
+                st.error("❌ Could not extract text from PDF")
+                return
+
+            st.success(f"✅ Document loaded! Found {n_chunks} chunks")
+            with trace.span("document_cache.put"):
+                document_cache.put(document_key, vector_store)
+        else:
+            n_chunks = len(vector_store.chunks.doc_positions(document_key))
+            st.success(f"✅ Document loaded from cache! Found {n_chunks} chunks")
+
+        # The first document's store becomes the corpus; later ones are copied
+        # in with their vectors, so nothing is embedded twice
+        if corpus is None:
+            corpus = vector_store
+        elif not in_corpus:
+            corpus.add_vector_store(vector_store)
+        if len(corpus.document_ids()) > 1:
+            st.caption(f"🗂️ {len(corpus.document_ids())} documents searchable in this session")
+
+        cache_stats = document_cache.stats()
+        embedding_stats = Utils.load_embedding_cache().stats()
+        st.caption(
+            f"🗄️ Document cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses · "
+            f"Chunk embeddings reused: {embedding_stats['hit_ratio']:.0%}"
+        )
+
         st.success("✅ Document ready for questions!")
         
         # Step 3: Initialize conversation history if not exists
@@ -52,7 +234,9 @@ class DocumentProcessor:
             st.session_state.conversation_history = []
         
         # Step 4: Store everything in session state for persistence
-        st.session_state.vector_store = vector_store
+        corpus.query_cache = Utils.load_query_cache()
+        st.session_state.corpus = corpus
+        st.session_state.document_key = document_key
         st.session_state.groq_client = groq_client
         st.session_state.ready = True
 
@@ -77,6 +261,10 @@ class DocumentProcessor:
                     st.session_state.question = "What are the key findings or conclusions?"
                 if st.button("📊 Can you elaborate on that?"):
                     st.session_state.question = "Can you elaborate on that?"
+
+            # Questions only see a few chunks; a summary covers every paragraph
+            if st.button("📝 Summarize the whole document"):
+                self.summarize_document(uploaded_file, groq_client)
             
             # Clear conversation button
             if st.session_state.conversation_history:
@@ -85,6 +273,8 @@ class DocumentProcessor:
                     st.success("Conversation history cleared!")
                     st.rerun()
             
+            search_scope = self.choose_search_scope(corpus, document_key)
+
             # Main question input
             question = st.text_input(
                 "Your question:", 
@@ -97,40 +287,144 @@ class DocumentProcessor:
             
             # Process question when user enters one
             if question:
+                trace = tracer.trace("question", model=st.session_state.get('selected_model'))
+                st.session_state.question_trace = trace
                 try:
-                    with st.spinner("🤔 Thinking... (using conversation context + Groq's lightning-fast API)"):
-                        # Step 5a: Find relevant chunks using similarity search
-                        relevant_chunks = st.session_state.vector_store.similarity_search(question, k=4)
+                    with st.spinner("🔎 Searching the document..."):
+                        # Step 5a: Find relevant chunks, over-fetching so chunks
+                        # that do not fit the model's budget can be replaced
+                        model_name = st.session_state.get('selected_model', 'llama-3.1-8b-instant')
+                        context_builder = Utils.make_context_builder(
+                            embedding_model,
+                            max_exchanges=st.session_state.get('max_history', 10)
+                        )
+                        retrieval_timings = {}
+                        query_cache = Utils.load_query_cache()
+                        query_hits = query_cache.stats()["hits"]
+                        candidates = st.session_state.corpus.hybrid_search_batch(
+                            [question],
+                            k=context_builder.max_chunks * 2,
+                            timings=retrieval_timings,
+                            filter=search_scope
+                        )[0]
+                        trace.record("retrieval.encode", retrieval_timings["encode"])
+                        trace.record("retrieval.faiss", retrieval_timings["search"])
+                        trace.record("retrieval.bm25", retrieval_timings["lexical"])
+                        trace.record("retrieval.fusion", retrieval_timings["fusion"])
+                        trace.count("cache_hits", query_cache.stats()["hits"] - query_hits, cache="query")
                         
-                        if not relevant_chunks:
+                        if not candidates:
                             st.warning("🤷 No relevant information found. Try rephrasing your question.")
                             return
                         
-                        # Step 5b: Combine chunks into context
-                        context = "\n\n".join(relevant_chunks)
-                        
-                        # Step 5c: Get conversation history
-                        conversation_history = Utils.manage_conversation_context(
-                            st.session_state.conversation_history, 
-                            max_exchanges=10
-                        )
+                        # Optionally rerank with a cross-encoder, so fewer but
+                        # better chunks go into the prompt
+                        rerank_stats = {}
+                        retrieved = candidates
+                        if st.session_state.get('rerank_chunks', False):
+                            with trace.span("rerank"):
+                                candidates = Utils.load_reranker().rerank(
+                                    question, candidates, top_k=Utils.RERANK_TOP_K, stats=rerank_stats
+                                )
                         
-                        # Step 5d: Get response with conversation memory
-                        answer = Utils.get_groq_response(
-                            st.session_state.groq_client, 
-                            context, 
-                            question, 
-                            conversation_history,
-                            st.session_state.get('selected_model', 'llama-3.1-8b-instant')
-                        )
+                        # Step 5b & 5c: Pack chunks and conversation history into
+                        # the model's context window, leaving room for the answer
+                        with trace.span("pack"):
+                            packed = context_builder.pack(
+                                question,
+                                candidates,
+                                st.session_state.conversation_history,
+                                model_name,
+                                system_prompt=Utils.SYSTEM_PROMPT
+                            )
+                        hits = packed.hits
+                        trace.count("chunks", len(hits))
+                        trace.count("tokens_in", packed.prompt_tokens)
+                        context = packed.context
+                        conversation_history = packed.conversation_history
+                        if rerank_stats:
+                            unranked = context_builder.pack(
+                                question,
+                                retrieved,
+                                st.session_state.conversation_history,
+                                model_name,
+                                system_prompt=Utils.SYSTEM_PROMPT
+                            )
+                            rerank_stats["tokens_saved"] = unranked.prompt_tokens - packed.prompt_tokens
                         
-                        # Step 5e: Store this Q&A in conversation history
-                        st.session_state.conversation_history.append((question, answer))
+                    # Step 5d: Get response with conversation memory
+                    timings = {}
+                    answer_cache = Utils.load_answer_cache()
+                    answer_key = answer_cache.make_key(
+                        "+".join(sorted(search_scope.doc_ids)),
+                        model_name,
+                        question,
+                        answer_cache.chunk_keys(hits),
+                        conversation_history
+                    )
+                    answer = answer_cache.get(answer_key)
+                    answered_from_cache = answer is not None
+                    trace.count("cache_hits" if answered_from_cache else "cache_misses", cache="answer")
+                    if answered_from_cache:
+                        # Same document, model, question, chunks and history: reuse the answer
+                        st.write("**🎯 Answer:**")
+                        st.write(answer)
+                    elif st.session_state.get('stream_answers', True):
+                        # Render tokens as they arrive; write_stream returns the full answer
+                        st.write("**🎯 Answer:**")
+                        with trace.span("llm") as span:
+                            answer = st.write_stream(Utils.stream_groq_response(
+                                st.session_state.groq_client,
+                                context,
+                                question,
+                                conversation_history,
+                                model_name,
+                                timings
+                            ))
+                            span["time_to_first_token"] = timings.get("time_to_first_token")
+                    else:
+                        with st.spinner("🤔 Thinking... (using conversation context + Groq's lightning-fast API)"):
+                            with trace.span("llm"):
+                                answer = Utils.get_groq_response(
+                                    st.session_state.groq_client, 
+                                    context, 
+                                    question, 
+                                    conversation_history,
+                                    model_name
+                                )
+                        st.write("**🎯 Answer:**")
+                        st.write(answer)
 
-                    
-                    # Step 5f: Display results
-                    st.write("**🎯 Answer:**")
-                    st.write(answer)
+                    # Step 5e: Store this Q&A in conversation history
+                    st.session_state.conversation_history.append((question, answer))
+                    if not answered_from_cache:
+                        answer_cache.put(answer_key, answer)
+                        trace.count("tokens_out", context_builder.count_tokens(answer))
+
+                    if 'time_to_first_token' in timings:
+                        st.caption(
+                            f"⏱️ First token after {timings['time_to_first_token'] * 1000:.0f} ms, "
+                            f"full answer after {timings['total_time'] * 1000:.0f} ms"
+                        )
+                    st.caption(
+                        f"🧾 Prompt: ~{packed.prompt_tokens} of {packed.budget} tokens · "
+                        f"{len(hits)} chunks, {len(conversation_history)} past exchanges · "
+                        f"Retrieval: dense {retrieval_timings['dense'] * 1000:.1f} ms, "
+                        f"BM25 {retrieval_timings['lexical'] * 1000:.1f} ms"
+                    )
+                    if rerank_stats:
+                        st.caption(
+                            f"🏅 Reranking took {rerank_stats['seconds'] * 1000:.0f} ms "
+                            f"({rerank_stats['scored']} scored, {rerank_stats['cached']} cached)"
+                            + (" but ran over budget; kept retrieval order" if rerank_stats['fallback']
+                               else f" and saved ~{rerank_stats['tokens_saved']} prompt tokens")
+                        )
+                    answer_stats = answer_cache.stats()
+                    query_stats = Utils.load_query_cache().stats()
+                    st.caption(
+                        f"♻️ Answer cache hit rate: {answer_stats['hit_ratio']:.0%} · "
+                        f"Query embeddings reused: {query_stats['hit_ratio']:.0%}"
+                    )
                     
                     # Show performance info
                     st.success("⚡ Powered by Groq's blazing-fast inference + conversation memory!")
@@ -155,7 +449,7 @@ class DocumentProcessor:
                     
                 except Exception as e:
                     # Handle different types of errors gracefully
-                    if "rate limit" in str(e).lower():
+                    if isinstance(e, RateLimitError) or "rate limit" in str(e).lower():
                         st.error("🕐 Rate limit reached. Please wait a moment and try again.")
                         st.info("💡 Free tier limits are generous but not unlimited!")
                     elif "context_length" in str(e).lower():
@@ -0,0 +1,278 @@
+from pathlib import Path
+import sys
+
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import time
+
+from database.vectorstore import LocalVectorStore
+from document_processor.ingestion import IngestionPipeline
+from document_processor.offset_splitter import OffsetTextSplitter
+from utils.context_builder import ContextBuilder
+from utils.groq_chat import GroqChat
+
+
+class QAPipeline:
+    """
+    Document question answering without a user interface
+
+    This class:
+    1. Ingests many PDFs into one vector store, several documents at a time
+    2. Retrieves chunks for a whole list of questions with one batched search
+    3. Packs each question's chunks into the model's token budget and asks
+       Groq for all answers concurrently
+    4. Returns every answer with its sources and per-stage timings
+    """
+
+    EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+    CHUNK_SIZE = 1000
+    CHUNK_OVERLAP = 200
+    # "compat" chunks exactly like RecursiveCharacterTextSplitter, "sentence"
+    # prefers sentence ends over PDF line breaks
+    CHUNK_BOUNDARIES = os.getenv("CHUNK_BOUNDARIES", "compat")
+
+    def __init__(self, embedding_model, client=None, model_name="llama-3.1-8b-instant",
+                 vector_store=None, context_builder=None, max_llm_workers=8):
+        """
+        Initialize the pipeline
+
+        Args:
+            embedding_model: SentenceTransformer model for creating embeddings
+            client: Groq client (or GroqPool); None answers nothing and only
+                retrieves sources
+            model_name (str): Groq model to use
+            vector_store (LocalVectorStore): Store to ingest into, a new one if omitted
+            context_builder (ContextBuilder): Packs chunks into the prompt, a
+                builder using the embedding model's tokenizer if omitted
+            max_llm_workers (int): Groq requests in flight at once
+        """
+        self.embedding_model = embedding_model
+        self.client = client
+        self.model_name = model_name
+        self.vector_store = vector_store or LocalVectorStore(embedding_model)
+        self.context_builder = context_builder or ContextBuilder(
+            tokenizer=getattr(embedding_model, "tokenizer", None),
+            max_tokens=GroqChat.MAX_ANSWER_TOKENS,
+        )
+        self.max_llm_workers = max_llm_workers
+
+    @staticmethod
+    def make_text_splitter():
+        """
+        Create the text splitter used for every document
+
+        Returns:
+            OffsetTextSplitter: Splitter with the app's chunk settings
+        """
+        return OffsetTextSplitter(
+            chunk_size=QAPipeline.CHUNK_SIZE,
+            chunk_overlap=QAPipeline.CHUNK_OVERLAP,
+            mode=QAPipeline.CHUNK_BOUNDARIES,
+        )
+
+    def ingest(self, pdf_bytes, source, doc_id=None, timings=None):
+        """
+        Parse, split, embed and index one PDF
+
+        Args:
+            pdf_bytes (bytes): Raw PDF file
+            source (str): File name stored with every chunk
+            doc_id (str): Document id, defaults to source
+            timings (dict): Optional dict that receives per-stage seconds, see
+                IngestionPipeline.run
+
+        Returns:
+            dict: source, doc_id, chunks and seconds
+
+        Raises:
+            ValueError: If the PDF cannot be read
+        """
+        start = time.perf_counter()
+        doc_id = doc_id or source
+        n_chunks = IngestionPipeline(self.vector_store, self.make_text_splitter()).run(
+            pdf_bytes, source, doc_id=doc_id, timings=timings
+        )
+        return {"source": source, "doc_id": doc_id, "chunks": n_chunks, "seconds": time.perf_counter() - start}
+
+    def ingest_files(self, paths, max_workers=4):
+        """
+        Ingest several PDF files concurrently
+
+        Each document runs its own parse/split/embed pipeline; PDF parsing is
+        spread over the shared process pool and embedding releases the GIL, so
+        documents overlap instead of waiting for each other.
+
+        Args:
+            paths (list): PDF file paths
+            max_workers (int): Documents ingested at once
+
+        Returns:
+            list: One dict per file, in input order, as returned by ingest();
+                unreadable files get an "error" entry instead of failing the batch
+        """
+        def ingest_path(path):
+            path = Path(path)
+            try:
+                return self.ingest(path.read_bytes(), path.name, doc_id=str(path))
+            except (OSError, ValueError) as e:
+                return {"source": path.name, "doc_id": str(path), "chunks": 0, "error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(ingest_path, paths))
+
+    def retrieve(self, questions, conversation_history=None, filter=None):
+        """
+        Retrieve and pack the context for a list of questions
+
+        Args:
+            questions (list): Questions
+            conversation_history (list): Earlier exchanges sent with every question
+            filter (MetadataFilter | dict): Only retrieve chunks matching it
+
+        Returns:
+            tuple: (list of PackedContext in input order, retrieval seconds per question)
+        """
+        if not questions:
+            return [], 0.0
+
+        # One encode call and one FAISS/BM25 search for every question
+        start = time.perf_counter()
+        candidates = self.vector_store.hybrid_search_batch(
+            questions, k=self.context_builder.max_chunks * 2, filter=filter
+        )
+        # Shared by the batch, so every question is charged an equal share
+        retrieval_seconds = (time.perf_counter() - start) / len(questions)
+
+        packed = [
+            self.context_builder.pack(
+                question, hits, conversation_history or [], self.model_name,
+                system_prompt=GroqChat.SYSTEM_PROMPT,
+            )
+            for question, hits in zip(questions, candidates)
+        ]
+        return packed, retrieval_seconds
+
+    @staticmethod
+    def sources(packed):
+        """
+        Describe the chunks a packed prompt was built from
+
+        Args:
+            packed (PackedContext): Packed prompt
+
+        Returns:
+            list: One dict per chunk with source, page, doc_id, chunk_id and score
+        """
+        return [
+            {"source": hit.source, "page": hit.page, "doc_id": hit.doc_id,
+             "chunk_id": hit.chunk_id, "score": hit.score}
+            for hit in packed.hits
+        ]
+
+    def answer_questions(self, questions, conversation_history=None):
+        """
+        Answer a list of questions against everything ingested so far
+
+        Args:
+            questions (list): Questions
+            conversation_history (list): Earlier exchanges sent with every question
+
+        Returns:
+            list: One dict per question, in input order, with the question, the
+                answer (None without a client), its sources and timings in
+                seconds. A failed Groq call sets "error" instead of "answer".
+        """
+        packed_contexts, retrieval_seconds = self.retrieve(questions, conversation_history)
+
+        def answer(question, packed):
+            result = {
+                "question": question,
+                "answer": None,
+                "sources": self.sources(packed),
+                "timings": {"retrieval": retrieval_seconds},
+                "prompt_tokens": packed.prompt_tokens,
+            }
+            if self.client is not None and packed.hits:
+                llm_start = time.perf_counter()
+                try:
+                    result["answer"] = GroqChat.get_response(
+                        self.client, packed.context, question, packed.conversation_history, self.model_name
+                    )
+                except Exception as e:
+                    result["error"] = str(e)
+                result["timings"]["llm"] = time.perf_counter() - llm_start
+            return result
+
+        if not questions:
+            return []
+        with ThreadPoolExecutor(max_workers=self.max_llm_workers) as executor:
+            return list(executor.map(answer, questions, packed_contexts))
+
+
+def read_questions(path):
+    """
+    Read questions from a text file (one per line) or a JSONL file
+
+    Args:
+        path (str | Path): File path; .jsonl lines need a "question" field
+
+    Returns:
+        list: Non-empty questions in file order
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    if path.suffix == ".jsonl":
+        return [json.loads(line)["question"] for line in lines]
+    return lines
+
+
+def main():
+    """
+    Command line entry point: answer a question file over a folder of PDFs as JSONL
+    """
+    parser = argparse.ArgumentParser(description="Answer questions about a folder of PDFs")
+    parser.add_argument("pdf_dir", help="Folder containing the PDFs")
+    parser.add_argument("questions", help="Question file: one question per line, or JSONL with a question field")
+    parser.add_argument("-o", "--output", help="JSONL file to write, stdout if omitted")
+    parser.add_argument("--model", default="llama-3.1-8b-instant", help="Groq model")
+    parser.add_argument("--workers", type=int, default=4, help="Documents ingested at once")
+    parser.add_argument("--llm-workers", type=int, default=8, help="Groq requests in flight at once")
+    parser.add_argument("--retrieval-only", action="store_true", help="Skip Groq and only report sources")
+    args = parser.parse_args()
+
+    client = None
+    if not args.retrieval_only:
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            parser.error("GROQ_API_KEY is not set (use --retrieval-only to skip answering)")
+        from utils.groq_pool import GroqPool
+        client = GroqPool(api_key, base_url=os.getenv("GROQ_BASE_URL"))
+
+    from sentence_transformers import SentenceTransformer
+    embedding_model = SentenceTransformer(QAPipeline.EMBEDDING_MODEL_NAME)
+    pipeline = QAPipeline(embedding_model, client, args.model, max_llm_workers=args.llm_workers)
+
+    paths = sorted(Path(args.pdf_dir).glob("*.pdf"))
+    for result in pipeline.ingest_files(paths, max_workers=args.workers):
+        print(json.dumps({"ingested": result}), file=sys.stderr)
+
+    results = pipeline.answer_questions(read_questions(args.questions))
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+    finally:
+        if args.output:
+            output.close()
+        if client is not None:
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+from pathlib import Path
+import sys
+
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+import time
+
+from aiohttp import web
+
+from database.cache import DocumentCache
+from database.metadata_filter import MetadataFilter
+from database.vectorstore import LocalVectorStore
+from document_processor.qa_pipeline import QAPipeline
+from utils.groq_chat import GroqChat
+from utils.tracing import Tracer
+
+
+class QAService:
+    """
+    An asyncio HTTP service for document question answering
+
+    This class:
+    1. Shares one embedding model and one corpus of ingested documents
+       between every request; each document is processed (or loaded from the
+       document cache) on its own and then merged into the corpus store
+    2. Ingests PDFs posted to /documents; parsing, splitting and embedding run
+       in a thread pool so the event loop keeps serving other requests, and
+       concurrent uploads of the same file are processed once
+    3. Answers questions about one document or the whole corpus as JSON, or
+       streams the answer token by token as server-sent events; an optional
+       metadata filter narrows the search to some files, pages or upload dates
+    4. Calls Groq, or any client with the same interface such as LocalLLM,
+       on a separate pool so slow answers never hold up retrieval
+    5. Traces every stage and serves the totals to Prometheus on /metrics
+
+    Endpoints:
+        GET    /health                        Model status and document count
+        GET    /metrics                       Stage timings and counters, Prometheus text format
+        GET    /documents                     Ingested documents
+        POST   /documents?name=file.pdf       Ingest the PDF in the request body
+        DELETE /documents/{doc_id}            Forget a document
+        POST   /documents/{doc_id}/query      {"question", "history", "filter"} -> answer and sources
+        POST   /documents/{doc_id}/stream     Same request, answer as server-sent events
+        POST   /query                         Same request over every document
+        POST   /stream                        Same request over every document, as server-sent events
+
+    A filter is a JSON object with any of "doc_ids", "sources", "pages"
+    ([first, last]), "uploaded_after" and "uploaded_before" (ISO 8601 or
+    epoch seconds); see MetadataFilter.
+    """
+
+    MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+    def __init__(self, model_warmup, client, model_name="llama-3.1-8b-instant", document_cache=None,
+                 storage="float32", max_workers=4, max_llm_workers=8, tracer=None):
+        """
+        Initialize the service
+
+        Args:
+            model_warmup (ModelWarmup): Loads the shared embedding model
+            client: Groq client, GroqPool or LocalLLM used for every answer
+            model_name (str): Groq model to use
+            document_cache (DocumentCache): Optional on-disk cache of processed documents
+            storage (str): Embedding storage of new vector stores
+            max_workers (int): Threads for ingestion and retrieval
+            max_llm_workers (int): Groq requests in flight at once
+            tracer (Tracer): Records stage timings, a new enabled tracer if omitted
+        """
+        self.model_warmup = model_warmup
+        self.client = client
+        self.model_name = model_name
+        self.document_cache = document_cache
+        self.storage = storage
+        self.tracer = tracer or Tracer()
+        self.documents = {}  # doc_id -> {"source", "chunks", "ingested_at"}
+        self.corpus = None   # QAPipeline over the store holding every document
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="qa-cpu")
+        self._llm_executor = ThreadPoolExecutor(max_workers=max_llm_workers, thread_name_prefix="qa-llm")
+        self._ingesting = {}  # doc_id -> Future of an ingestion in progress
+
+    def make_app(self):
+        """
+        Build the aiohttp application
+
+        Returns:
+            web.Application: Application serving the endpoints above
+        """
+        app = web.Application(client_max_size=self.MAX_UPLOAD_BYTES)
+        app.add_routes([
+            web.get("/health", self.health),
+            web.get("/metrics", self.metrics),
+            web.get("/documents", self.list_documents),
+            web.post("/documents", self.ingest),
+            web.delete("/documents/{doc_id}", self.delete_document),
+            web.post("/documents/{doc_id}/query", self.query),
+            web.post("/documents/{doc_id}/stream", self.stream),
+            web.post("/query", self.query),
+            web.post("/stream", self.stream),
+        ])
+        app.on_cleanup.append(self._shutdown)
+        return app
+
+    async def _run(self, function, *args, executor=None):
+        """
+        Run a blocking function in a worker thread
+
+        Args:
+            function (callable): Function to run
+            *args: Its arguments
+            executor (ThreadPoolExecutor): Pool to use, the CPU pool if omitted
+
+        Returns:
+            Whatever the function returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor or self._executor, function, *args)
+
+    async def _shutdown(self, app):
+        """
+        Stop the worker threads when the application shuts down
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._llm_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def health(self, request):
+        """
+        GET /health
+        """
+        return web.json_response({
+            "status": "ok",
+            "model_ready": self.model_warmup.is_ready(),
+            "documents": len(self.documents),
+        })
+
+    async def metrics(self, request):
+        """
+        GET /metrics
+        """
+        return web.Response(text=self.tracer.prometheus_text(), content_type="text/plain", charset="utf-8")
+
+    async def list_documents(self, request):
+        """
+        GET /documents
+        """
+        return web.json_response([
+            {"doc_id": doc_id, "source": entry["source"], "chunks": entry["chunks"],
+             "ingested_at": entry["ingested_at"]}
+            for doc_id, entry in self.documents.items()
+        ])
+
+    async def ingest(self, request):
+        """
+        POST /documents?name=file.pdf with the PDF as the request body
+
+        Returns 201 with doc_id, source, chunks, seconds and whether the
+        document was already known; 400 if the PDF cannot be read.
+        """
+        pdf_bytes = await request.read()
+        if not pdf_bytes:
+            raise web.HTTPBadRequest(text="Request body must be a PDF file")
+        source = request.query.get("name", "document.pdf")
+        doc_id = DocumentCache.make_key(
+            pdf_bytes, QAPipeline.CHUNK_SIZE, QAPipeline.CHUNK_OVERLAP, QAPipeline.EMBEDDING_MODEL_NAME,
+            QAPipeline.CHUNK_BOUNDARIES, self.storage,
+        )
+
+        if doc_id in self.documents:
+            entry = self.documents[doc_id]
+            return web.json_response(
+                {"doc_id": doc_id, "source": entry["source"], "chunks": entry["chunks"], "seconds": 0.0, "cached": True}
+            )
+
+        # A second upload of a file still being processed waits for the first
+        if doc_id not in self._ingesting:
+            self._ingesting[doc_id] = asyncio.ensure_future(self._ingest(pdf_bytes, source, doc_id))
+        try:
+            result = await asyncio.shield(self._ingesting[doc_id])
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=f"Error processing PDF: {e}")
+        return web.json_response(result, status=201)
+
+    async def _ingest(self, pdf_bytes, source, doc_id):
+        """
+        Build the vector store of one document and add it to the registry
+
+        Args:
+            pdf_bytes (bytes): Raw PDF file
+            source (str): File name
+            doc_id (str): Content-derived document id
+
+        Returns:
+            dict: doc_id, source, chunks, seconds and cached
+
+        Raises:
+            ValueError: If the PDF cannot be read
+        """
+        trace = self.tracer.trace("ingest", source=source)
+        try:
+            start = time.perf_counter()
+            with trace.span("model_wait"):
+                embedding_model = await self._run(self.model_warmup.get)
+
+            vector_store = None
+            if self.document_cache is not None:
+                with trace.span("document_cache.get"):
+                    vector_store = await self._run(self.document_cache.get, doc_id, embedding_model)
+            cached = vector_store is not None
+            trace.count("cache_hits" if cached else "cache_misses", cache="document")
+            if not cached:
+                vector_store = LocalVectorStore(embedding_model, storage=self.storage)
+
+            pipeline = QAPipeline(embedding_model, self.client, self.model_name, vector_store=vector_store)
+            if not cached:
+                timings = {}
+                with trace.span("ingest"):
+                    await self._run(pipeline.ingest, pdf_bytes, source, doc_id, timings)
+                for stage in ("parse", "split", "embed", "index"):
+                    trace.record(f"ingest.{stage}", timings[stage])
+                trace.count("pages", timings["pages"])
+                trace.count("chunks", len(vector_store.chunks))
+                if self.document_cache is not None:
+                    with trace.span("document_cache.put"):
+                        await self._run(self.document_cache.put, doc_id, vector_store)
+
+            if self.corpus is None:
+                self.corpus = QAPipeline(
+                    embedding_model, self.client, self.model_name,
+                    vector_store=LocalVectorStore(embedding_model, storage=self.storage),
+                )
+            with trace.span("corpus.add"):
+                # Now, not when the cached store was built, so a re-upload gets a new time
+                await self._run(self.corpus.vector_store.add_vector_store, vector_store, time.time())
+
+            self.documents[doc_id] = {
+                "source": source,
+                "chunks": len(vector_store.chunks),
+                "ingested_at": self.corpus.vector_store.chunks.added_at(doc_id),
+            }
+            return {"doc_id": doc_id, "source": source, "chunks": len(vector_store.chunks),
+                    "seconds": time.perf_counter() - start, "cached": cached}
+        finally:
+            self._ingesting.pop(doc_id, None)
+
+    async def delete_document(self, request):
+        """
+        DELETE /documents/{doc_id}
+        """
+        doc_id = request.match_info["doc_id"]
+        if self.documents.pop(doc_id, None) is None:
+            raise web.HTTPNotFound(text="Unknown document")
+        await self._run(self.corpus.vector_store.delete_document, doc_id)
+        return web.json_response({"deleted": request.match_info["doc_id"]})
+
+    async def _read_question(self, request):
+        """
+        Parse a query request
+
+        Args:
+            request (web.Request): Request with a JSON body holding "question",
+                optionally "history" as a list of [question, answer] pairs and
+                "filter" as a MetadataFilter dict. Under /documents/{doc_id}
+                the filter is narrowed to that document
+
+        Returns:
+            tuple: (question, conversation history, MetadataFilter or None)
+
+        Raises:
+            web.HTTPNotFound: If the document is not ingested, or nothing is
+            web.HTTPBadRequest: If the body has no question or a bad filter
+        """
+        doc_id = request.match_info.get("doc_id")
+        if doc_id is not None and doc_id not in self.documents:
+            raise web.HTTPNotFound(text="Unknown document")
+        if self.corpus is None:
+            raise web.HTTPNotFound(text="No documents ingested")
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            raise web.HTTPBadRequest(text="Request body must be JSON")
+        question = str(body.get("question", "")).strip()
+        if not question:
+            raise web.HTTPBadRequest(text="Missing question")
+        history = [tuple(exchange) for exchange in body.get("history", [])]
+        try:
+            metadata_filter = MetadataFilter.from_dict(body.get("filter"))
+        except (TypeError, ValueError) as e:
+            raise web.HTTPBadRequest(text=f"Invalid filter: {e}")
+
+        if doc_id is not None:
+            metadata_filter = metadata_filter or MetadataFilter()
+            wanted = metadata_filter.doc_ids
+            metadata_filter = dataclasses.replace(
+                metadata_filter, doc_ids=[doc_id] if wanted is None or doc_id in wanted else []
+            )
+        return question, history, metadata_filter
+
+    async def _retrieve(self, question, history, metadata_filter, trace):
+        """
+        Retrieve and pack the context of one question in a worker thread
+
+        Args:
+            question (str): Question
+            history (list): Earlier exchanges
+            metadata_filter (MetadataFilter): Chunks to search, all if None
+            trace (Trace): Trace of the request
+
+        Returns:
+            tuple: (PackedContext, retrieval seconds)
+        """
+        with trace.span("retrieval"):
+            [packed], retrieval_seconds = await self._run(
+                self.corpus.retrieve, [question], history, metadata_filter
+            )
+        trace.count("chunks", len(packed.hits))
+        trace.count("tokens_in", packed.prompt_tokens)
+        return packed, retrieval_seconds
+
+    async def query(self, request):
+        """
+        POST /documents/{doc_id}/query or POST /query
+
+        Returns the answer with its sources, prompt tokens and timings; 502 if
+        the LLM call fails.
+        """
+        question, history, metadata_filter = await self._read_question(request)
+        trace = self.tracer.trace("question", model=self.model_name)
+        packed, retrieval_seconds = await self._retrieve(question, history, metadata_filter, trace)
+
+        result = {
+            "question": question,
+            "answer": None,
+            "sources": QAPipeline.sources(packed),
+            "prompt_tokens": packed.prompt_tokens,
+            "timings": {"retrieval": retrieval_seconds},
+        }
+        if packed.hits:
+            start = time.perf_counter()
+            try:
+                with trace.span("llm"):
+                    result["answer"] = await self._run(
+                        GroqChat.get_response, self.client, packed.context, question,
+                        packed.conversation_history, self.model_name, executor=self._llm_executor,
+                    )
+            except Exception as e:
+                raise web.HTTPBadGateway(text=f"Error generating answer: {e}")
+            result["timings"]["llm"] = time.perf_counter() - start
+            trace.count("tokens_out", self.corpus.context_builder.count_tokens(result["answer"]))
+        return web.json_response(result)
+
+    async def stream(self, request):
+        """
+        POST /documents/{doc_id}/stream or POST /stream
+
+        Streams server-sent events: one "data" event per answer token, then a
+        "done" event with the sources and timings, or an "error" event if the
+        LLM call fails part way.
+        """
+        question, history, metadata_filter = await self._read_question(request)
+        trace = self.tracer.trace("question", model=self.model_name)
+        packed, retrieval_seconds = await self._retrieve(question, history, metadata_filter, trace)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        timings = {"retrieval": retrieval_seconds}
+        try:
+            if packed.hits:
+                tokens = GroqChat.stream_response(
+                    self.client, packed.context, question, packed.conversation_history,
+                    self.model_name, timings=timings,
+                )
+                answer = []
+                with trace.span("llm") as span:
+                    # Closed explicitly so a disconnect stops the worker and the upstream stream
+                    async with contextlib.aclosing(self._iterate_in_thread(tokens)) as stream:
+                        async for token in stream:
+                            await response.write(f"data: {json.dumps(token)}\n\n".encode("utf-8"))
+                            answer.append(token)
+                    span["time_to_first_token"] = timings.get("time_to_first_token")
+                trace.count("tokens_out", self.corpus.context_builder.count_tokens("".join(answer)))
+            done = {"sources": QAPipeline.sources(packed), "prompt_tokens": packed.prompt_tokens, "timings": timings}
+            await response.write(f"event: done\ndata: {json.dumps(done)}\n\n".encode("utf-8"))
+        except ConnectionResetError:
+            return response  # The client went away; aclosing stopped the LLM stream
+        except Exception as e:
+            await response.write(f"event: error\ndata: {json.dumps(str(e))}\n\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    async def _iterate_in_thread(self, iterator):
+        """
+        Consume a blocking iterator on the LLM pool without blocking the loop
+
+        Items are handed over through an asyncio queue as they arrive; when the
+        consumer stops early (e.g. the client disconnects) the worker stops too.
+
+        Args:
+            iterator (Iterator): Blocking iterator, such as a Groq stream
+
+        Yields:
+            The iterator's items
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+        cancelled = False
+
+        def pump():
+            try:
+                for item in iterator:
+                    if cancelled:
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+                loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+
+        worker = loop.run_in_executor(self._llm_executor, pump)
+        try:
+            while True:
+                item, error = await queue.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    break
+                yield item
+        finally:
+            cancelled = True
+            await worker
+
+
+def make_client(llm, latency=0.0, tokens_per_second=None):
+    """
+    Create the LLM client the service answers with
+
+    Args:
+        llm (str): "groq" for the Groq API (needs GROQ_API_KEY) or "local" for
+            the LocalLLM stand-in
+        latency (float): Stand-in time to first token in seconds
+        tokens_per_second (float): Stand-in generation speed
+
+    Returns:
+        GroqPool | LocalLLM: The client
+
+    Raises:
+        ValueError: If Groq is requested without GROQ_API_KEY
+    """
+    if llm == "local":
+        from utils.local_llm import LocalLLM
+        return LocalLLM(latency=latency, tokens_per_second=tokens_per_second)
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY is not set (use --llm local for the stand-in model)")
+    from utils.groq_pool import GroqPool
+    return GroqPool(api_key, base_url=os.getenv("GROQ_BASE_URL"))
+
+
+def main():
+    """
+    Command line entry point: serve the question answering API over HTTP
+    """
+    parser = argparse.ArgumentParser(description="Serve document question answering over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--model", default="llama-3.1-8b-instant", help="Groq model")
+    parser.add_argument("--llm", choices=["groq", "local"], default=os.getenv("QA_LLM", "groq"),
+                        help="Answer with Groq or the local stand-in model")
+    parser.add_argument("--local-latency", type=float, default=0.0, help="Stand-in time to first token (s)")
+    parser.add_argument("--local-tokens-per-second", type=float, help="Stand-in generation speed")
+    parser.add_argument("--cache-dir", help="Reuse processed documents from this on-disk cache")
+    parser.add_argument("--storage", default=os.getenv("EMBEDDING_STORAGE", "float32"),
+                        choices=["float32", "float16", "int8"], help="Embedding storage")
+    parser.add_argument("--workers", type=int, default=4, help="Threads for ingestion and retrieval")
+    parser.add_argument("--llm-workers", type=int, default=8, help="LLM requests in flight at once")
+    parser.add_argument("--no-tracing", action="store_true", help="Do not record stage timings")
+    parser.add_argument("--embedding-batch-wait-ms", type=float, default=5.0,
+                        help="How long a query encode may wait for others to batch with")
+    args = parser.parse_args()
+
+    try:
+        client = make_client(args.llm, args.local_latency, args.local_tokens_per_second)
+    except ValueError as e:
+        parser.error(str(e))
+
+    from utils.embedding_batcher import EmbeddingBatcher
+    from utils.model_warmup import ModelWarmup
+
+    def load_model():
+        # Requests encode through one batcher, so concurrent queries share model calls
+        from sentence_transformers import SentenceTransformer
+        return EmbeddingBatcher(SentenceTransformer(QAPipeline.EMBEDDING_MODEL_NAME),
+                                max_wait=args.embedding_batch_wait_ms / 1000)
+
+    # Start loading now so /health answers while the model is still on its way
+    model_warmup = ModelWarmup(load_model, warmup=lambda model: model.encode(["warmup"])).start()
+    document_cache = DocumentCache(args.cache_dir) if args.cache_dir else None
+    service = QAService(model_warmup, client, args.model, document_cache=document_cache,
+                        storage=args.storage, max_workers=args.workers, max_llm_workers=args.llm_workers,
+                        tracer=Tracer(enabled=not args.no_tracing))
+    web.run_app(service.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+import hashlib
+import json
+import re
+import threading
+import time
+
+
+class AnswerCache:
+    """
+    An in-memory cache of generated answers
+
+    This class:
+    1. Keys answers by document, model, normalized question, the retrieved
+       chunks and the conversation history, so a cached answer is only reused
+       when the prompt would have been the same
+    2. Expires entries after a time-to-live and evicts the least recently used
+       entries beyond a size limit
+    3. Counts hits and misses so the hit rate can be reported
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=3600):
+        """
+        Initialize the answer cache
+
+        Args:
+            max_entries (int): Maximum number of cached answers
+            ttl_seconds (float): Seconds after which a cached answer expires
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key -> (expires_at, answer)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_question(question):
+        """
+        Normalize a question so trivially different phrasings share one key
+
+        Args:
+            question (str): User question
+
+        Returns:
+            str: Lower-cased question with whitespace collapsed
+        """
+        return re.sub(r"\s+", " ", question).strip().lower()
+
+    @staticmethod
+    def chunk_keys(hits):
+        """
+        Identify retrieved chunks independently of the corpus they came from
+
+        Chunk ids are positions in one session's vector store, so two sessions
+        that uploaded the same documents in a different order give the same id
+        to different chunks. The document id and a hash of the chunk text mean
+        the same thing in every session.
+
+        Args:
+            hits (list): SearchHit objects, in prompt order
+
+        Returns:
+            list: [doc_id, text digest] pairs for make_key
+        """
+        return [[hit.doc_id, hashlib.sha256(hit.text.encode("utf-8")).hexdigest()] for hit in hits]
+
+    @staticmethod
+    def make_key(document_key, model_name, question, chunk_ids, conversation_history):
+        """
+        Build the cache key of a question
+
+        Args:
+            document_key (str): Cache key of the document being asked about
+            model_name (str): Groq model answering the question
+            question (str): User question
+            chunk_ids (list): Identifiers of the retrieved chunks, in prompt
+                order; use chunk_keys() for chunks shared across sessions
+            conversation_history (list): (question, answer) pairs sent with the prompt
+
+        Returns:
+            str: Hex digest identifying the prompt
+        """
+        context = hashlib.sha256(
+            json.dumps({"chunks": list(chunk_ids), "history": list(conversation_history)}).encode("utf-8")
+        ).hexdigest()
+        parts = [document_key, model_name, AnswerCache.normalize_question(question), context]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached answer
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            str | None: The cached answer, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, answer):
+        """
+        Store an answer, evicting the least recently used ones beyond max_entries
+
+        Args:
+            key (str): Key from make_key
+            answer (str): Generated answer
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            dict: Hits, misses, hit ratio and number of cached answers
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
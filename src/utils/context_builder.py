@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field
+import math
+
+
+@dataclass
+class PackedContext:
+    """
+    The chunks and history chosen for one prompt
+    """
+    hits: list                      # Retrieved chunks that fit, in rank order
+    conversation_history: list      # (question, answer) pairs that fit, oldest first
+    prompt_tokens: int              # Estimated tokens of the whole prompt
+    budget: int                     # Tokens the prompt was allowed to use
+    dropped_chunks: int = 0
+    dropped_exchanges: int = 0
+    chunk_tokens: list = field(default_factory=list)
+
+    @property
+    def context(self):
+        """
+        Returns:
+            str: The kept chunks joined into one context string
+        """
+        return "\n\n".join(hit.text for hit in self.hits)
+
+
+class ContextBuilder:
+    """
+    Packs retrieved chunks and conversation history into a model's context window
+
+    This class:
+    1. Counts tokens with a local tokenizer (the embedding model's, when given),
+       falling back to a characters-per-token estimate
+    2. Knows the context window of every selectable Groq model
+    3. Reserves room for the system prompt, the question and max_tokens of answer
+    4. Greedily adds chunks in rank order, then the most recent exchanges,
+       until the budget is used up
+    """
+
+    MODEL_CONTEXT_WINDOWS = {
+        "llama-3.1-8b-instant": 131_072,
+        "llama-3.3-70b-versatile": 131_072,
+        "gemma2-9b-it": 8_192,
+    }
+    DEFAULT_CONTEXT_WINDOW = 8_192
+
+    # Rough chat-format cost of each message (role markers, separators)
+    TOKENS_PER_MESSAGE = 4
+    # Used when no tokenizer is available
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, tokenizer=None, max_tokens=1000, max_prompt_tokens=None,
+                 max_chunks=4, max_exchanges=5, safety_margin=0.1):
+        """
+        Initialize the context builder
+
+        Args:
+            tokenizer: Optional Hugging Face tokenizer used to count tokens
+            max_tokens (int): Tokens reserved for the answer
+            max_prompt_tokens (int): Optional cap on prompt size below the
+                model's window, to keep prompts cheap on large models
+            max_chunks (int): Maximum number of chunks to include
+            max_exchanges (int): Maximum number of past exchanges to include
+            safety_margin (float): Fraction of the window left unused, since the
+                local tokenizer only approximates the model's own
+        """
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_chunks = max_chunks
+        self.max_exchanges = max_exchanges
+        self.safety_margin = safety_margin
+
+    def count_tokens(self, text):
+        """
+        Count the tokens of a text
+
+        Args:
+            text (str): Text to measure
+
+        Returns:
+            int: Token count (estimated when there is no tokenizer)
+        """
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False, verbose=False))
+        return math.ceil(len(text) / self.CHARS_PER_TOKEN)
+
+    def context_window(self, model_name):
+        """
+        Args:
+            model_name (str): Groq model name
+
+        Returns:
+            int: Context window of the model in tokens
+        """
+        return self.MODEL_CONTEXT_WINDOWS.get(model_name, self.DEFAULT_CONTEXT_WINDOW)
+
+    def prompt_budget(self, model_name):
+        """
+        Tokens available for the prompt of a model
+
+        Args:
+            model_name (str): Groq model name
+
+        Returns:
+            int: Window minus the safety margin and the answer's max_tokens,
+                capped by max_prompt_tokens
+        """
+        budget = int(self.context_window(model_name) * (1 - self.safety_margin)) - self.max_tokens
+        if self.max_prompt_tokens is not None:
+            budget = min(budget, self.max_prompt_tokens)
+        return max(budget, 0)
+
+    def pack(self, question, hits, conversation_history, model_name, system_prompt=""):
+        """
+        Choose the chunks and history that fit the model's budget
+
+        Chunks come first because answers must stay grounded in the document; a
+        chunk that does not fit is skipped in favour of smaller, lower-ranked
+        ones. History is then filled newest first and stops at the first
+        exchange that does not fit, so the kept history stays contiguous.
+
+        Args:
+            question (str): Current user question
+            hits (list): Retrieved SearchHit objects in rank order
+            conversation_history (list): Previous (question, answer) pairs
+            model_name (str): Groq model name
+            system_prompt (str): System prompt sent with every request
+
+        Returns:
+            PackedContext: The selected chunks and history with token counts
+        """
+        budget = self.prompt_budget(model_name)
+        used = (
+            self.count_tokens(system_prompt) + self.count_tokens(question)
+            + 2 * self.TOKENS_PER_MESSAGE
+        )
+
+        kept_hits, chunk_tokens = [], []
+        for hit in hits:
+            if len(kept_hits) == self.max_chunks:
+                break
+            tokens = self.count_tokens(hit.text)
+            if used + tokens <= budget:
+                kept_hits.append(hit)
+                chunk_tokens.append(tokens)
+                used += tokens
+
+        kept_history = []
+        for prev_q, prev_a in reversed(conversation_history[-self.max_exchanges:] if self.max_exchanges else []):
+            tokens = self.count_tokens(prev_q) + self.count_tokens(prev_a) + 2 * self.TOKENS_PER_MESSAGE
+            if used + tokens > budget:
+                break
+            kept_history.insert(0, (prev_q, prev_a))
+            used += tokens
+
+        return PackedContext(
+            hits=kept_hits,
+            conversation_history=kept_history,
+            prompt_tokens=used,
+            budget=budget,
+            dropped_chunks=min(len(hits), self.max_chunks) - len(kept_hits),
+            dropped_exchanges=len(conversation_history) - len(kept_history),
+            chunk_tokens=chunk_tokens,
+        )
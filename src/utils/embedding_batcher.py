@@ -0,0 +1,306 @@
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from .stats import percentile
+from .testing_models import HashingEmbeddingModel
+
+
+class _Request:
+    """
+    One encode call waiting for the worker
+    """
+
+    __slots__ = ("texts", "future", "enqueued")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class EmbeddingBatcher:
+    """
+    Shares one embedding model between sessions with dynamic micro-batching
+
+    This class:
+    1. Queues encode requests from every thread and returns a Future for each
+    2. Runs one worker thread that owns the model, so concurrent sessions no
+       longer fight over the GIL and torch's threads with batch-size-1 encodes
+    3. Merges queued requests into one model call, flushed once it holds
+       max_batch_size texts or the oldest request has waited max_wait seconds
+    4. Has the same encode() as the model, so it can be passed anywhere the
+       model is used; other attributes (e.g. tokenizer) come from the model
+    """
+
+    _STOP = object()
+
+    def __init__(self, model, max_batch_size=64, max_wait=0.005, name="embedding-batcher"):
+        """
+        Initialize the batcher and start its worker
+
+        Args:
+            model: SentenceTransformer (or anything with encode(texts))
+            max_batch_size (int): Texts per model call; a larger request is
+                encoded on its own
+            max_wait (float): Seconds the oldest request may wait for more
+                requests to join its batch
+            name (str): Name of the worker thread
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name):
+        # Only called for attributes the batcher does not have itself
+        model = self.__dict__.get("model")
+        if model is None:
+            raise AttributeError(name)
+        return getattr(model, name)
+
+    def submit(self, texts):
+        """
+        Queue texts for encoding
+
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            Future: Resolves to an np.ndarray with one embedding row per text
+
+        Raises:
+            RuntimeError: If the batcher has been closed
+        """
+        request = _Request(list(texts))
+        if not request.texts:
+            request.future.set_result(np.empty((0, 0), dtype='float32'))
+            return request.future
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is closed")
+            self._queue.put(request)
+        return request.future
+
+    def encode(self, texts, **kwargs):
+        """
+        Embed texts, waiting for the batch they join
+
+        Calls with keyword arguments (batch_size, normalize_embeddings, ...)
+        cannot share a batch and go straight to the model.
+
+        Args:
+            texts (list | str): Texts to embed, or a single text
+
+        Returns:
+            np.ndarray: One embedding row per text, or one row for a single text
+        """
+        if kwargs:
+            return self.model.encode(texts, **kwargs)
+        if isinstance(texts, str):
+            return self.submit([texts]).result()[0]
+        return self.submit(texts).result()
+
+    def stats(self):
+        """
+        Report how well requests are being batched
+
+        Returns:
+            dict: Requests, texts and batches so far, mean texts per batch and
+                requests still queued
+        """
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self):
+        """
+        Encode what is already queued, then stop the worker
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self):
+        """
+        Body of the worker thread: collect a batch, encode it, repeat
+        """
+        carried = None
+        while True:
+            first = carried if carried is not None else self._queue.get()
+            carried = None
+            if first is self._STOP:
+                return
+
+            batch = [first]
+            size = len(first.texts)
+            # The deadline counts from when the oldest request arrived, so
+            # requests that queued behind a long batch are not held any longer
+            deadline = first.enqueued + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    request = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if request is self._STOP or size + len(request.texts) > self.max_batch_size:
+                    carried = request
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            self._encode(batch)
+
+    def _encode(self, batch):
+        """
+        Encode a batch of requests with one model call and resolve their futures
+
+        Args:
+            batch (list): _Request objects
+        """
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [text for request in batch for text in request.texts]
+        try:
+            embeddings = np.asarray(self.model.encode(texts))
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        self.requests += len(batch)
+        self.texts += len(texts)
+        self.batches += 1
+        start = 0
+        for request in batch:
+            request.future.set_result(embeddings[start:start + len(request.texts)])
+            start += len(request.texts)
+
+
+class SimulatedEmbeddingModel:
+    """
+    A stand-in for a transformer encoder on one device
+
+    Every call costs a fixed overhead plus a cost per text, sleeping (and so
+    releasing the GIL) like torch does, and only one call runs at a time.
+    Embeddings come from HashingEmbeddingModel.
+    """
+
+    def __init__(self, call_seconds=0.004, text_seconds=0.0002, dimension=384):
+        """
+        Args:
+            call_seconds (float): Cost of one encode call
+            text_seconds (float): Extra cost of every text in the call
+            dimension (int): Embedding size
+        """
+        self.call_seconds = call_seconds
+        self.text_seconds = text_seconds
+        self.calls = 0
+        self._hashing = HashingEmbeddingModel(dimension)
+        self._device = threading.Lock()
+
+    def encode(self, texts, **kwargs):
+        with self._device:
+            self.calls += 1
+            time.sleep(self.call_seconds + self.text_seconds * len(texts))
+        return self._hashing.encode(texts)
+
+
+def load_test(model, clients=32, requests_per_client=50, max_batch_size=64, max_wait=0.005):
+    """
+    Compare concurrent single-query encodes with and without the batcher
+
+    Every client thread encodes one question at a time, like a session
+    embedding its query for similarity_search.
+
+    Args:
+        model: Embedding model shared by all clients
+        clients (int): Concurrent client threads
+        requests_per_client (int): Encodes per client
+        max_batch_size (int): Batcher setting
+        max_wait (float): Batcher setting, in seconds
+
+    Returns:
+        dict: For "direct" and "batched": texts_per_second, p50_seconds,
+            p99_seconds and max_seconds; the batcher's stats under "batcher"
+    """
+    def run(encode):
+        def client(number):
+            latencies = []
+            for i in range(requests_per_client):
+                start = time.perf_counter()
+                encode([f"question {i} from client {number} about pump maintenance"])
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            latencies = [latency for result in executor.map(client, range(clients)) for latency in result]
+        elapsed = time.perf_counter() - start
+        return {
+            "texts_per_second": len(latencies) / elapsed,
+            "p50_seconds": percentile(latencies, 50),
+            "p99_seconds": percentile(latencies, 99),
+            "max_seconds": max(latencies),
+        }
+
+    results = {"direct": run(model.encode)}
+    batcher = EmbeddingBatcher(model, max_batch_size=max_batch_size, max_wait=max_wait)
+    try:
+        results["batched"] = run(batcher.encode)
+        results["batcher"] = batcher.stats()
+    finally:
+        batcher.close()
+    return results
+
+
+def main():
+    """
+    Command line entry point: load test the embedding batcher
+    """
+    parser = argparse.ArgumentParser(description="Load test concurrent query encodes with and without batching")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent client threads")
+    parser.add_argument("--requests", type=int, default=50, help="Encodes per client")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--embedding-model", choices=["minilm", "simulated"], default="minilm",
+                        help="Real embedding model, or an offline stand-in with per-call overhead")
+    args = parser.parse_args()
+
+    if args.embedding_model == "simulated":
+        model = SimulatedEmbeddingModel()
+    else:
+        from sentence_transformers import SentenceTransformer
+        sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+        from src.document_processor.qa_pipeline import QAPipeline
+        model = SentenceTransformer(QAPipeline.EMBEDDING_MODEL_NAME)
+        model.encode(["warmup"])
+
+    results = load_test(model, args.clients, args.requests, args.max_batch_size, args.max_wait_ms / 1000)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
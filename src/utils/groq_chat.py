@@ -0,0 +1,146 @@
+import time
+
+
+class GroqChat:
+    """
+    Builds prompts and calls Groq, without any Streamlit dependency
+
+    This class:
+    1. Holds the system prompt and answer length shared by the app and the CLI
+    2. Turns document context, a question and conversation history into chat messages
+    3. Gets a complete answer, or streams one token by token
+    """
+
+    MAX_ANSWER_TOKENS = 1000
+    SYSTEM_PROMPT = """You are a document analysis assistant with conversation memory. Your capabilities:
+
+            1. DOCUMENT GROUNDING: Always base answers on the provided document context
+            2. CONVERSATION AWARENESS: Remember and reference previous exchanges when relevant
+            3. REFERENCE RESOLUTION: When users say "that", "it", "the topic", understand what they're referring to
+            4. CLARITY: If a reference is ambiguous, ask for clarification
+            5. ACCURACY: Never make up information not in the document or conversation
+
+            You maintain context across the conversation while staying grounded in the document."""
+
+    @staticmethod
+    def get_response(client, context, question, conversation_history, model_name="llama-3.1-8b-instant"):
+        """
+        Get response from Groq API using RAG pattern with conversation memory
+        
+        This function:
+        1. Uses system prompts for better conversation awareness
+        2. Includes previous Q&A pairs as context
+        3. Handles references like "that", "it", "the topic we discussed"
+        4. Maintains document grounding while being conversational
+        
+        Args:
+            client (Groq): Initialized Groq client
+            context (str): Relevant document chunks as context
+            question (str): Current user question
+            conversation_history (list): Previous Q&A pairs
+            model_name (str): Groq model to use
+            
+        Returns:
+            str: Generated answer with conversation awareness
+
+        Raises:
+            groq.APIError: If the request fails after the client's retries, so
+                errors never end up in the conversation history as answers
+        """
+        
+        messages = GroqChat.build_messages(context, question, conversation_history)
+
+        # Make API call to Groq with conversation context
+        response = client.chat.completions.create(
+                    messages=messages,
+                    model=model_name,  # Using Llama 3.1 8B for speed and quality
+                    temperature=0.1,   # Low temperature for factual, consistent answers
+                    max_tokens=GroqChat.MAX_ANSWER_TOKENS    # Reasonable response length
+                )
+        return response.choices[0].message.content
+        
+    @staticmethod
+    def build_messages(context, question, conversation_history):
+        """
+        Build the chat messages sent to Groq
+
+        Args:
+            context (str): Relevant document chunks as context
+            question (str): Current user question
+            conversation_history (list): Previous Q&A pairs, all of which are sent
+
+        Returns:
+            list: Chat completion messages (system prompt, history, current question)
+        """
+        # Build conversation messages for better context management
+        messages = [
+                    {
+                        "role": "system",
+                        "content": GroqChat.SYSTEM_PROMPT
+                    }
+                ]
+        
+        # Add conversation history, already trimmed to the model's token budget
+        for prev_q, prev_a in conversation_history:
+            messages.append({"role": "user", "content": prev_q})
+            messages.append({"role": "assistant", "content": prev_a})
+
+        # Add current question with document context
+        current_message = f"""
+            Document Context:
+                {context}
+                    Current Question: 
+                        {question}
+            """
+        
+        messages.append({"role": "user", "content": current_message})
+        return messages
+
+    @staticmethod
+    def stream_response(client, context, question, conversation_history, model_name="llama-3.1-8b-instant", timings=None):
+        """
+        Stream a response from Groq token by token
+
+        Meant to be passed to st.write_stream, which renders tokens as they
+        arrive and returns the full answer once the stream ends.
+
+        Args:
+            client (Groq): Initialized Groq client
+            context (str): Relevant document chunks as context
+            question (str): Current user question
+            conversation_history (list): Previous Q&A pairs
+            model_name (str): Groq model to use
+            timings (dict): Optional dict that receives "time_to_first_token"
+                and "total_time" in seconds
+
+        Yields:
+            str: Pieces of the generated answer
+        """
+        messages = GroqChat.build_messages(context, question, conversation_history)
+
+        start = time.perf_counter()
+        stream = client.chat.completions.create(
+                    messages=messages,
+                    model=model_name,
+                    temperature=0.1,
+                    max_tokens=GroqChat.MAX_ANSWER_TOKENS,
+                    stream=True
+                )
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if not token:
+                    continue
+                if timings is not None and "time_to_first_token" not in timings:
+                    timings["time_to_first_token"] = time.perf_counter() - start
+                yield token
+        finally:
+            # Also reached when the consumer stops early: release the connection
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        if timings is not None:
+            timings["total_time"] = time.perf_counter() - start
@@ -0,0 +1,278 @@
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+import asyncio
+import datetime
+import hashlib
+import json
+import random
+import threading
+
+import groq
+import httpx
+
+
+class GroqPool:
+    """
+    A process-wide asynchronous Groq client shared by every session
+
+    This class:
+    1. Runs one AsyncGroq client with a pooled HTTP connection on a background event loop
+    2. Retries 429 and 5xx responses with jittered exponential backoff, honouring Retry-After
+    3. Coalesces identical in-flight requests from concurrent sessions into one API call
+    4. Exposes the same client.chat.completions.create interface as the Groq client,
+       so existing callers work unchanged
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    # Never wait longer than this for a single retry, even if Retry-After asks for it
+    MAX_RETRY_AFTER = 60.0
+
+    # Chunks a stream reads ahead of its consumer before waiting for it
+    STREAM_BUFFER = 64
+
+    def __init__(self, api_key, base_url=None, max_retries=5, backoff_base=0.5,
+                 backoff_max=20.0, max_connections=20, timeout=60.0):
+        """
+        Initialize the pool and start its event loop thread
+
+        Args:
+            api_key (str): Groq API key
+            base_url (str): Optional API base URL, e.g. a local fake server in tests
+            max_retries (int): Number of retries after the first attempt
+            backoff_base (float): Backoff ceiling in seconds for the first retry
+            backoff_max (float): Upper bound for the exponential backoff ceiling
+            max_connections (int): Size of the shared HTTP connection pool
+            timeout (float): Per-request timeout in seconds
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {"requests": 0, "api_calls": 0, "coalesced": 0, "retries": 0}
+
+        self._in_flight = {}  # request key -> asyncio.Task, only touched on the loop thread
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="groq-pool", daemon=True)
+        self._thread.start()
+
+        async def make_client():
+            http_client = groq.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            )
+            # Retries are handled here so they can be coalesced and honour Retry-After
+            return groq.AsyncGroq(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                timeout=timeout,
+                http_client=http_client,
+            )
+
+        self._client = self._run(make_client())
+
+        # Mirror the Groq client interface: pool.chat.completions.create(...)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @classmethod
+    def shared(cls, api_key, base_url=None, **kwargs):
+        """
+        Get the process-wide pool for an API key, creating it on first use
+
+        Args:
+            api_key (str): Groq API key
+            base_url (str): Optional API base URL
+
+        Returns:
+            GroqPool: The shared pool
+        """
+        with cls._instances_lock:
+            key = (api_key, base_url)
+            if key not in cls._instances:
+                cls._instances[key] = cls(api_key, base_url=base_url, **kwargs)
+            return cls._instances[key]
+
+    def create(self, **kwargs):
+        """
+        Create a chat completion from synchronous code
+
+        Args:
+            **kwargs: Arguments of groq's chat.completions.create
+
+        Returns:
+            ChatCompletion | Iterator: The completion, or an iterator of chunks when stream=True
+        """
+        if kwargs.get("stream"):
+            return self._iterate_stream(kwargs)
+        return self._run(self.acreate(**kwargs))
+
+    async def achat(self, **kwargs):
+        """
+        Create a chat completion from code running on another event loop
+
+        Args:
+            **kwargs: Arguments of groq's chat.completions.create (without stream)
+
+        Returns:
+            ChatCompletion: The completion
+        """
+        future = asyncio.run_coroutine_threadsafe(self.acreate(**kwargs), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def acreate(self, **kwargs):
+        """
+        Create a chat completion on the pool's event loop, coalescing duplicates
+
+        Args:
+            **kwargs: Arguments of groq's chat.completions.create
+
+        Returns:
+            ChatCompletion: The completion
+        """
+        self.stats["requests"] += 1
+        if kwargs.get("stream"):
+            return await self._with_retries(kwargs)
+
+        key = self._request_key(kwargs)
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._with_retries(kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield so one caller giving up does not cancel the others
+        return await asyncio.shield(task)
+
+    def close(self):
+        """
+        Close the HTTP pool and stop the event loop thread
+        """
+        with self._instances_lock:
+            for key in [key for key, pool in self._instances.items() if pool is self]:
+                del self._instances[key]
+        self._run(self._client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _with_retries(self, kwargs):
+        """
+        Call the API, retrying rate limits and server errors
+
+        Args:
+            kwargs (dict): Arguments of groq's chat.completions.create
+
+        Returns:
+            ChatCompletion | AsyncStream: The API response
+
+        Raises:
+            groq.APIStatusError: When the error is not retryable or retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.stats["api_calls"] += 1
+                return await self._client.chat.completions.create(**kwargs)
+            except (groq.RateLimitError, groq.InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._retry_delay(e.response, attempt))
+
+    def _retry_delay(self, response, attempt):
+        """
+        Seconds to wait before the next attempt
+
+        Uses the Retry-After header when the server sent one, otherwise
+        exponential backoff with full jitter.
+
+        Args:
+            response (httpx.Response): The failed response
+            attempt (int): Zero-based number of the failed attempt
+
+        Returns:
+            float: Delay in seconds
+        """
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    delay = (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.MAX_RETRY_AFTER)
+
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _iterate_stream(self, kwargs):
+        """
+        Bridge an async chunk stream from the pool's loop to a sync iterator
+
+        The pump reads at most STREAM_BUFFER chunks ahead of the consumer. When
+        the consumer stops early (the generator is closed or garbage
+        collected), the pump is cancelled and the upstream response closed, so
+        an abandoned answer does not keep downloading.
+
+        Args:
+            kwargs (dict): Arguments of groq's chat.completions.create with stream=True
+
+        Yields:
+            ChatCompletionChunk: Chunks as they arrive
+        """
+        chunks = asyncio.Queue(maxsize=self.STREAM_BUFFER)  # Only used on the loop
+        done = object()
+
+        async def pump():
+            stream = None
+            try:
+                stream = await self.acreate(**kwargs)
+                async for chunk in stream:
+                    await chunks.put(chunk)
+                await chunks.put(done)
+            except Exception as e:
+                await chunks.put(e)
+            finally:
+                if stream is not None:
+                    await stream.close()
+
+        pumping = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = self._run(chunks.get())
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            pumping.cancel()
+
+    def _run(self, coroutine):
+        """
+        Run a coroutine on the pool's loop and wait for its result
+
+        Args:
+            coroutine: Coroutine to run
+
+        Returns:
+            The coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    @staticmethod
+    def _request_key(kwargs):
+        """
+        Hash identifying identical requests
+
+        Args:
+            kwargs (dict): Arguments of groq's chat.completions.create
+
+        Returns:
+            str: Hex digest of the canonical JSON form of the arguments
+        """
+        canonical = json.dumps(kwargs, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
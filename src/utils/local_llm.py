@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+import re
+import threading
+import time
+
+
+class LocalLLM:
+    """
+    A local stand-in for the Groq client, for tests and benchmarks
+
+    This class:
+    1. Exposes the same client.chat.completions.create interface as Groq,
+       including stream=True, so it can replace the client anywhere
+    2. Answers with the first sentences of the document context, so answers
+       are deterministic and grounded in what was retrieved
+    3. Simulates a configurable time to first token and generation speed
+    4. Counts calls and tokens so callers can check what was sent
+    """
+
+    def __init__(self, latency=0.0, tokens_per_second=None, answer_sentences=2):
+        """
+        Initialize the stand-in
+
+        Args:
+            latency (float): Seconds before the first token
+            tokens_per_second (float): Generation speed, instant when None
+            answer_sentences (int): Sentences of context repeated in the answer
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_sentences = answer_sentences
+        self.stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._lock = threading.Lock()
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model=None, stream=False, **kwargs):
+        """
+        Create a chat completion
+
+        Args:
+            messages (list): Chat messages as built by GroqChat.build_messages
+            model (str): Model name, echoed back
+            stream (bool): Return an iterator of chunks instead of one completion
+            **kwargs: Other Groq arguments, ignored
+
+        Returns:
+            SimpleNamespace | Iterator: Groq-shaped completion or chunk iterator
+        """
+        answer = self.answer_for(messages)
+        tokens = re.findall(r"\S+\s*", answer)
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["prompt_tokens"] += sum(len(m["content"].split()) for m in messages)
+            self.stats["completion_tokens"] += len(tokens)
+
+        if stream:
+            return self._stream(tokens, model)
+        time.sleep(self.latency + self._generation_seconds(len(tokens)))
+        message = SimpleNamespace(role="assistant", content=answer)
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)])
+
+    def answer_for(self, messages):
+        """
+        The answer the stand-in gives to a conversation
+
+        Args:
+            messages (list): Chat messages; the last one holds the context
+
+        Returns:
+            str: The first sentences of the document context
+        """
+        content = messages[-1]["content"]
+        context = content.split("Document Context:", 1)[-1].split("Current Question:", 1)[0]
+        sentences = re.split(r"(?<=[.!?])\s+", " ".join(context.split()))
+        answer = " ".join(sentence for sentence in sentences[:self.answer_sentences] if sentence)
+        return answer or "I could not find this in the document."
+
+    def _stream(self, tokens, model):
+        """
+        Yield Groq-shaped chunks at the configured speed
+
+        Args:
+            tokens (list): Answer pieces
+            model (str): Model name
+
+        Yields:
+            SimpleNamespace: Chunks with choices[0].delta.content
+        """
+        time.sleep(self.latency)
+        for token in tokens:
+            time.sleep(self._generation_seconds(1))
+            delta = SimpleNamespace(role="assistant", content=token)
+            yield SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, delta=delta)])
+
+    def _generation_seconds(self, n_tokens):
+        """
+        Args:
+            n_tokens (int): Tokens to generate
+
+        Returns:
+            float: Seconds generating them takes
+        """
+        return n_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
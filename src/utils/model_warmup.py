@@ -0,0 +1,92 @@
+import threading
+import time
+
+
+class ModelWarmup:
+    """
+    Loads a model in a background thread so the first request does not wait for it
+
+    This class:
+    1. Runs the (slow) loader on a daemon thread as soon as start() is called
+    2. Warms the model up with a dummy call, so lazy initialisation inside the
+       model is paid before the first real query
+    3. Hands the model to every caller of get(), blocking only until it is ready
+    4. Records how long loading and warming up took
+    """
+
+    def __init__(self, loader, warmup=None, name="model-warmup"):
+        """
+        Initialize the warmup
+
+        Args:
+            loader (callable): Returns the loaded model; heavy imports belong inside it
+            warmup (callable): Optional function called once with the loaded model
+            name (str): Name of the background thread
+        """
+        self.loader = loader
+        self.warmup = warmup
+        self.timings = {}
+
+        self._model = None
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """
+        Start loading in the background; calling it again does nothing
+
+        Returns:
+            ModelWarmup: self, so it can be chained after the constructor
+        """
+        with self._start_lock:
+            if not self._thread.is_alive() and not self._ready.is_set():
+                self._thread.start()
+        return self
+
+    def is_ready(self):
+        """
+        Returns:
+            bool: True once loading has finished, successfully or not
+        """
+        return self._ready.is_set()
+
+    def get(self, timeout=None):
+        """
+        Get the loaded model, starting the load if nobody has yet
+
+        Args:
+            timeout (float): Seconds to wait, forever when None
+
+        Returns:
+            The loaded model
+
+        Raises:
+            TimeoutError: If the model is not ready within timeout
+            Exception: Whatever the loader or warmup raised
+        """
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Model is still loading")
+        if self._error is not None:
+            raise self._error
+        return self._model
+
+    def _run(self):
+        """
+        Body of the background thread
+        """
+        start = time.perf_counter()
+        try:
+            model = self.loader()
+            loaded = time.perf_counter()
+            self.timings["load_seconds"] = loaded - start
+            if self.warmup is not None:
+                self.warmup(model)
+                self.timings["warmup_seconds"] = time.perf_counter() - loaded
+            self._model = model
+        except Exception as e:
+            self._error = e
+        finally:
+            self._ready.set()
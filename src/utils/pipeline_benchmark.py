@@ -0,0 +1,232 @@
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from .stats import percentile
+from .testing_models import HashingEmbeddingModel
+
+# Repository root, so the suite imports the app the way main.py does
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+WORDS = (
+    "pump valve filter pressure flow sensor motor bearing seal housing inlet outlet "
+    "maintenance inspection interval torque voltage current frequency temperature "
+    "calibration tolerance assembly component operator procedure warning safety "
+    "system manual section figure table document report analysis result method"
+).split()
+
+
+def make_synthetic_pdf(pages, lines_per_page=40, seed=0):
+    """
+    Generate a PDF of made-up technical sentences
+
+    Args:
+        pages (int): Number of pages
+        lines_per_page (int): Lines of text on every page
+        seed (int): Random seed, the same seed gives the same bytes
+
+    Returns:
+        bytes: The PDF file
+    """
+    rng = random.Random(seed)
+
+    def sentence():
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 12))]
+        return " ".join(words).capitalize() + f" {rng.randint(1, 9999)}."
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = " T* ".join(f"({sentence()}) Tj" for _ in range(lines_per_page))
+        stream = f"BT /F1 10 Tf 12 TL 50 760 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+
+def run(embedding_model, pages=50, lines_per_page=40, queries=200, questions=20,
+        llm_latency=0.2, llm_tokens_per_second=None, repeats=3):
+    """
+    Measure every stage of the question answering pipeline
+
+    Metrics ending in _per_second or qps are higher-is-better, metrics ending
+    in _seconds are lower-is-better.
+
+    Args:
+        embedding_model: Model used for chunks and queries
+        pages (int): Pages of the synthetic PDF
+        lines_per_page (int): Lines of text per page
+        queries (int): Similarity searches to time
+        questions (int): Questions answered end to end
+        llm_latency (float): Fake Groq time to first token in seconds
+        llm_tokens_per_second (float): Fake Groq generation speed, instant when None
+        repeats (int): Runs of the throughput stages; the median is reported
+
+    Returns:
+        dict: "config", "environment" and "metrics"
+    """
+    sys.path.append(str(ROOT))
+    from src.utils.utils import Utils
+    from src.utils.local_llm import LocalLLM
+    from src.database.vectorstore import LocalVectorStore
+    from src.document_processor.pdf_loader import PdfLoader
+    from src.document_processor.qa_pipeline import QAPipeline
+
+    pdf_bytes = make_synthetic_pdf(pages, lines_per_page)
+    metrics = {}
+
+    # Parsing and splitting: the body of Utils.load_and_split_pdf, whose
+    # st.cache_data wrapper would answer every repeat from its cache
+    split_seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        page_chunks = Utils.make_text_splitter().split_pages(PdfLoader.load(pdf_bytes, "synthetic.pdf"))
+        split_seconds.append(time.perf_counter() - start)
+    metrics["load_and_split_pages_per_second"] = pages / statistics.median(split_seconds)
+    chunks = page_chunks.documents()
+
+    # Embedding and indexing, with a fresh store so nothing is cached
+    add_seconds = []
+    for _ in range(repeats):
+        vector_store = LocalVectorStore(embedding_model)
+        start = time.perf_counter()
+        vector_store.add_documents(chunks, doc_id="synthetic")
+        add_seconds.append(time.perf_counter() - start)
+    metrics["add_documents_chunks_per_second"] = len(chunks) / statistics.median(add_seconds)
+
+    # One query at a time, the way the app searches
+    rng = random.Random(1)
+    query_texts = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(queries)]
+    latencies = []
+    start = time.perf_counter()
+    for query in query_texts:
+        query_start = time.perf_counter()
+        vector_store.similarity_search(query, k=4)
+        latencies.append(time.perf_counter() - query_start)
+    metrics["similarity_search_qps"] = queries / (time.perf_counter() - start)
+    metrics["similarity_search_p50_seconds"] = percentile(latencies, 50)
+    metrics["similarity_search_p99_seconds"] = percentile(latencies, 99)
+
+    # Retrieval, packing and a fake Groq answer per question
+    client = LocalLLM(latency=llm_latency, tokens_per_second=llm_tokens_per_second)
+    pipeline = QAPipeline(embedding_model, client, vector_store=vector_store)
+    latencies = []
+    for question in query_texts[:questions]:
+        start = time.perf_counter()
+        pipeline.answer_questions([question + "?"])
+        latencies.append(time.perf_counter() - start)
+    metrics["question_p50_seconds"] = percentile(latencies, 50)
+    metrics["question_p99_seconds"] = percentile(latencies, 99)
+    # Time spent outside the fake LLM, which is what the app controls
+    metrics["question_overhead_p50_seconds"] = max(metrics["question_p50_seconds"] - llm_latency, 0.0)
+
+    return {
+        "config": {
+            "pages": pages, "lines_per_page": lines_per_page, "chunks": len(chunks),
+            "queries": queries, "questions": questions, "llm_latency": llm_latency,
+            "llm_tokens_per_second": llm_tokens_per_second, "repeats": repeats,
+            "embedding_model": type(embedding_model).__name__,
+        },
+        "environment": {
+            "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Flag metrics that got worse than a baseline run
+
+    Args:
+        results (dict): Output of run()
+        baseline (dict): An earlier output of run()
+        tolerance (float): Allowed relative slowdown, 0.2 allows 20%
+
+    Returns:
+        list: One dict per regression with metric, baseline, current and change
+            (relative, positive means worse)
+    """
+    regressions = []
+    for metric, current in results["metrics"].items():
+        previous = baseline.get("metrics", {}).get(metric)
+        if not previous:
+            continue
+        if metric.endswith("_seconds"):
+            change = current / previous - 1
+        else:
+            change = previous / current - 1 if current else float("inf")
+        if change > tolerance:
+            regressions.append({"metric": metric, "baseline": previous, "current": current, "change": change})
+    return regressions
+
+
+def main():
+    """
+    Command line entry point: benchmark the pipeline and compare with a baseline
+    """
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, search and answer latency")
+    parser.add_argument("--pages", type=int, default=50, help="Pages of the synthetic PDF")
+    parser.add_argument("--lines-per-page", type=int, default=40, help="Lines of text per page")
+    parser.add_argument("--queries", type=int, default=200, help="Similarity searches to time")
+    parser.add_argument("--questions", type=int, default=20, help="Questions answered end to end")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake Groq latency in seconds")
+    parser.add_argument("--llm-tokens-per-second", type=float, help="Fake Groq generation speed")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs of the throughput stages")
+    parser.add_argument("--embedding-model", choices=["minilm", "hashing"], default="minilm",
+                        help="Real embedding model, or an offline hashing stand-in")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    if args.embedding_model == "hashing":
+        embedding_model = HashingEmbeddingModel()
+    else:
+        from sentence_transformers import SentenceTransformer
+        sys.path.append(str(ROOT))
+        from src.document_processor.qa_pipeline import QAPipeline
+        embedding_model = SentenceTransformer(QAPipeline.EMBEDDING_MODEL_NAME)
+
+    results = run(
+        embedding_model, args.pages, args.lines_per_page, args.queries, args.questions,
+        args.llm_latency, args.llm_tokens_per_second, args.repeats,
+    )
+    print(json.dumps(results["metrics"], indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']:.4g} -> "
+                  f"{regression['current']:.4g} ({regression['change']:+.0%} worse)", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
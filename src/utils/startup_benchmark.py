@@ -0,0 +1,122 @@
+from pathlib import Path
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Repository root, so the child process can import the app the way main.py does
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def measure(pdf_path=None, question="What is this document about?"):
+    """
+    Measure one cold start in the current (fresh) interpreter
+
+    Times, all in seconds since the call started:
+    import_seconds: importing src.utils.utils
+    model_ready_seconds: the embedding model loaded and warmed up in the background
+    first_query_seconds: retrieval for the first question after the model is ready
+    time_to_first_answer: the first answer from Groq when GROQ_API_KEY is set,
+        otherwise the first retrieval (the LLM call is then skipped)
+
+    Args:
+        pdf_path (str): Optional PDF to ingest; a few sample chunks otherwise
+        question (str): Question to ask
+
+    Returns:
+        dict: The timings above
+    """
+    start = time.perf_counter()
+    sys.path.append(str(ROOT))
+    from src.utils.utils import Utils
+    from src.database.vectorstore import LocalVectorStore
+    results = {"import_seconds": time.perf_counter() - start}
+
+    warmup = Utils.embedding_model_warmup()
+    if pdf_path:
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+        from src.document_processor.pdf_loader import PdfLoader
+        chunks = Utils.make_text_splitter().split_documents(PdfLoader.load(pdf_bytes, Path(pdf_path).name))
+    else:
+        chunks = [f"Sample chunk {i} about startup latency and document question answering." for i in range(32)]
+
+    embedding_model = warmup.get()
+    results["model_ready_seconds"] = time.perf_counter() - start
+    results.update(warmup.timings)
+
+    vector_store = LocalVectorStore(embedding_model)
+    vector_store.add_documents(chunks)
+    query_start = time.perf_counter()
+    hits = vector_store.hybrid_search_batch([question], k=4)[0]
+    results["first_query_seconds"] = time.perf_counter() - query_start
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if api_key:
+        client = Utils.initialize_groq(api_key)
+        Utils.get_groq_response(client, "\n\n".join(hit.text for hit in hits), question, [])
+    results["llm_included"] = bool(api_key)
+    results["time_to_first_answer"] = time.perf_counter() - start
+    return results
+
+
+def run(repeats=3, pdf_path=None):
+    """
+    Measure several cold starts, each in a new Python process
+
+    Args:
+        repeats (int): Number of cold starts
+        pdf_path (str): Optional PDF to ingest
+
+    Returns:
+        dict: Median of every timing plus the individual runs
+
+    Raises:
+        RuntimeError: If a cold start fails, with the child's error output
+    """
+    command = [sys.executable, "-m", "src.utils.startup_benchmark", "--child"]
+    if pdf_path:
+        command += ["--pdf", str(pdf_path)]
+
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Cold start failed:\n{completed.stderr[-2000:]}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    medians = {
+        key: statistics.median(run[key] for run in runs)
+        for key, value in runs[0].items()
+        if isinstance(value, float)
+    }
+    return {"median": medians, "runs": runs}
+
+
+def main():
+    """
+    Command line entry point: report cold-start import time and time-to-first-answer
+    """
+    parser = argparse.ArgumentParser(description="Benchmark app cold start")
+    parser.add_argument("--pdf", help="PDF to ingest; sample chunks if omitted")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of cold starts")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.pdf)))
+        return
+
+    results = run(args.repeats, args.pdf)
+    print(json.dumps(results["median"], indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
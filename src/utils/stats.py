@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def percentile(values, q):
+    """
+    Args:
+        values (list): Measurements
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        float: The q-th percentile
+    """
+    return float(np.percentile(np.asarray(values, dtype="float64"), q))
@@ -0,0 +1,35 @@
+import hashlib
+
+import numpy as np
+
+
+class HashingEmbeddingModel:
+    """
+    A deterministic stand-in for the embedding model
+
+    Hashes words into a fixed number of dimensions, so benchmarks and tests
+    run offline and measure the pipeline rather than the model.
+    """
+
+    def __init__(self, dimension=384):
+        """
+        Args:
+            dimension (int): Embedding size, 384 like all-MiniLM-L6-v2
+        """
+        self.dimension = dimension
+
+    def encode(self, texts, **kwargs):
+        """
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            np.ndarray: One normalized float32 row per text
+        """
+        embeddings = np.zeros((len(texts), self.dimension), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                bucket = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "little")
+                embeddings[row, bucket % self.dimension] += 1.0
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
@@ -0,0 +1,277 @@
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+import json
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger("rag.trace")
+
+
+@dataclass
+class Span:
+    """
+    One timed pipeline stage
+
+    Attributes:
+        name (str): Stage name, e.g. "retrieval.faiss"
+        seconds (float): Duration
+        offset (float): Seconds between the start of the trace and the start of the stage
+        attributes (dict): Extra values such as chunk or token counts
+    """
+    name: str
+    seconds: float
+    offset: float = 0.0
+    attributes: dict = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Lightweight per-stage tracing and metrics for the RAG pipeline
+
+    This class:
+    1. Hands out one Trace per request (a document upload or a question),
+       which records a span for every stage and the counts that go with it
+    2. Keeps process-wide totals: a duration histogram per stage and counters
+       such as chunks, tokens in and out and cache hits
+    3. Exports the totals in the Prometheus text format and logs every span as
+       a JSON line on the "rag.trace" logger
+    4. When disabled, hands out a trace whose methods do nothing, so
+       instrumented code pays one method call per stage
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    PREFIX = "rag"
+
+    def __init__(self, enabled=True, log=True):
+        """
+        Initialize the tracer
+
+        Args:
+            enabled (bool): Record anything at all
+            log (bool): Log every span as a JSON line
+        """
+        self.enabled = enabled
+        self.log = log
+        self._histograms = {}  # stage -> [bucket counts..., sum, count]
+        self._counters = {}  # (name, labels) -> value
+        self._lock = threading.Lock()
+
+    def trace(self, name, **attributes):
+        """
+        Start recording one request
+
+        Args:
+            name (str): Request kind, e.g. "ingest" or "question"
+            **attributes: Values logged with every span, e.g. the document name
+
+        Returns:
+            Trace: A recording trace, or a no-op one when the tracer is disabled
+        """
+        if not self.enabled:
+            return NULL_TRACE
+        return Trace(self, name, attributes)
+
+    def observe(self, stage, seconds):
+        """
+        Add a stage duration to the histogram
+
+        Args:
+            stage (str): Stage name
+            seconds (float): Duration
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = [0] * len(self.BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+    def increment(self, name, value=1, **labels):
+        """
+        Add to a counter
+
+        Args:
+            name (str): Counter name, exported as rag_<name>_total
+            value (float): Amount to add
+            **labels: Prometheus labels, e.g. cache="answer"
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def prometheus_text(self):
+        """
+        Export every histogram and counter in the Prometheus text format
+
+        Returns:
+            str: Metrics page, ready to be served as /metrics
+        """
+        with self._lock:
+            histograms = {stage: list(values) for stage, values in self._histograms.items()}
+            counters = dict(self._counters)
+
+        metric = f"{self.PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {metric} Time spent in each pipeline stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        for stage, values in sorted(histograms.items()):
+            label = f'stage="{_escape(stage)}"'
+            for bound, count in zip(self.BUCKETS, values):
+                lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {values[-1]}')
+            lines.append(f"{metric}_sum{{{label}}} {values[-2]}")
+            lines.append(f"{metric}_count{{{label}}} {values[-1]}")
+
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{self.PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter, labels), value in sorted(counters.items()):
+                if counter != name:
+                    continue
+                label = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+                lines.append(f"{metric}{{{label}}} {value}" if label else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """
+    The spans and counts of one request
+
+    Spans may be recorded from several threads, e.g. the stages of the
+    ingestion pipeline.
+    """
+
+    def __init__(self, tracer, name, attributes=None):
+        """
+        Args:
+            tracer (Tracer): Tracer that keeps the totals
+            name (str): Request kind
+            attributes (dict): Values logged with every span
+        """
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes or {}
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.spans = []
+        self.counts = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Time a stage
+
+        Args:
+            name (str): Stage name
+            **attributes: Extra values stored with the span
+
+        Yields:
+            dict: The span's attributes, so counts known only at the end can be added
+        """
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            self.record(name, time.perf_counter() - start, offset=start - self._start, **attributes)
+
+    def record(self, name, seconds, offset=None, **attributes):
+        """
+        Add a stage that was timed elsewhere, e.g. through a timings dict
+
+        Args:
+            name (str): Stage name
+            seconds (float): Duration
+            offset (float): Start relative to the trace, defaults to now minus seconds
+            **attributes: Extra values stored with the span
+        """
+        if offset is None:
+            offset = max(time.perf_counter() - self._start - seconds, 0.0)
+        span = Span(name, seconds, offset, attributes)
+        with self._lock:
+            self.spans.append(span)
+        self.tracer.observe(name, seconds)
+        if self.tracer.log and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "trace_id": self.trace_id, "trace": self.name, "span": name,
+                "seconds": round(seconds, 6), "offset": round(offset, 6),
+                **self.attributes, **attributes,
+            }, default=str))
+
+    def count(self, name, value=1, **labels):
+        """
+        Add to a counter for this request and for the process
+
+        Args:
+            name (str): Counter name, e.g. "chunks", "tokens_in" or "cache_hits"
+            value (float): Amount to add
+            **labels: Prometheus labels, e.g. cache="answer"
+        """
+        key = name if not labels else f"{name}{{{','.join(f'{k}={v}' for k, v in sorted(labels.items()))}}}"
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + value
+        self.tracer.increment(name, value, **labels)
+
+    def breakdown(self):
+        """
+        Total time per stage, in the order stages first ran
+
+        Returns:
+            list: (stage, seconds, calls) tuples
+        """
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                seconds, calls = totals.get(span.name, (0.0, 0))
+                totals[span.name] = (seconds + span.seconds, calls + 1)
+        return [(name, seconds, calls) for name, (seconds, calls) in totals.items()]
+
+    def total_seconds(self):
+        """
+        Returns:
+            float: Seconds from the start of the trace to the end of its last span
+        """
+        with self._lock:
+            return max((span.offset + span.seconds for span in self.spans), default=0.0)
+
+
+class _NullTrace:
+    """
+    The trace handed out by a disabled tracer; records nothing
+    """
+
+    name = None
+    trace_id = None
+    spans = ()
+    counts = {}
+
+    def span(self, name, **attributes):
+        return nullcontext(attributes)
+
+    def record(self, name, seconds, offset=None, **attributes):
+        pass
+
+    def count(self, name, value=1, **labels):
+        pass
+
+    def breakdown(self):
+        return []
+
+    def total_seconds(self):
+        return 0.0
+
+
+NULL_TRACE = _NullTrace()
+
+
+def _escape(value):
+    """
+    Escape a Prometheus label value
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
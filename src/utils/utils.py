@@ -1,20 +1,46 @@
+from pathlib import Path
+import sys
+
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
 import streamlit as st
-from groq import Groq
-from langchain_community.document_loaders import PyPDFLoader
-from sentence_transformers import SentenceTransformer
-# from langchain_community.embeddings.sentence_transformer import SentenceTransformerEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains.question_answering import load_qa_chain
-from langchain_community.llms import HuggingFaceHub
-import faiss
-import numpy as np
-import tempfile
+# sentence_transformers (and torch) take seconds to import, so they are only
+# imported by the loaders below, on a background thread
 import os
 
+from agents.summary_cache import SummaryCache
+from database.cache import DocumentCache
+from database.embedding_cache import EmbeddingCache
+from database.reranker import Reranker
+from document_processor.offset_splitter import OffsetTextSplitter
+from document_processor.pdf_loader import PdfLoader
+from document_processor.qa_pipeline import QAPipeline
+from utils.answer_cache import AnswerCache
+from utils.context_builder import ContextBuilder
+from utils.embedding_batcher import EmbeddingBatcher
+from utils.groq_chat import GroqChat
+from utils.groq_pool import GroqPool
+from utils.model_warmup import ModelWarmup
+from utils.tracing import Tracer
+
 
 class Utils:
 
+    # Settings that determine how a document is chunked and embedded
+    EMBEDDING_MODEL_NAME = QAPipeline.EMBEDDING_MODEL_NAME
+    # How the index stores each embedding: float32, float16 or int8
+    EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float32")
+    RERANKER_MODEL_NAME = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+    RERANK_TOP_K = 3    # Chunks kept after reranking, instead of 4 without it
+    CHUNK_SIZE = QAPipeline.CHUNK_SIZE
+    CHUNK_OVERLAP = QAPipeline.CHUNK_OVERLAP
+    CHUNK_BOUNDARIES = QAPipeline.CHUNK_BOUNDARIES
+
+    # Settings shared by every Groq request
+    MAX_ANSWER_TOKENS = GroqChat.MAX_ANSWER_TOKENS
+    SYSTEM_PROMPT = GroqChat.SYSTEM_PROMPT
+
     def __init__(self):
         pass  
 
@@ -23,111 +49,93 @@ class Utils:
         """
             Initialize the Groq API client.
 
+            The client is shared by every session in the process, so Streamlit
+            reruns reuse its connection pool instead of opening a new one. Set
+            GROQ_BASE_URL to point it at another OpenAI-compatible server.
+
             Parameters:
             - api_key (str): Your Groq API key.
 
             Returns:
-            - Groq: An initialized Groq client instance.
+            - GroqPool: The shared client, with the same chat.completions.create interface as Groq.
         """
-        return Groq(api_key=api_key)
+        return GroqPool.shared(api_key=api_key, base_url=os.getenv("GROQ_BASE_URL"))
 
     @staticmethod
     @st.cache_data
     def load_and_split_pdf(uploaded_file):
         """
-        Load a PDF file and return a list of documents.
+        Load a PDF file and split it into chunks.
+
+        Pages are parsed straight from the uploaded bytes, in parallel worker
+        processes for larger documents. Chunks stay offsets into the page
+        texts; LocalVectorStore.add_page_chunks stores them without building
+        a Document per chunk, and PageChunks.documents() materializes them
+        when Documents are needed.
 
         Args:
             upload_file: Streamlit uploaded file object
 
         Returns:
-            list: List of text chunks as LangChain document objects
-        """
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(uploaded_file.getvalue())
-            temp_file_path = temp_file.name
-        try:
-            loader = PyPDFLoader(temp_file_path) # using LangChain's PyPDFLoader to load the PDF
-            documents = loader.load()
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                length_function=len,
-            )
-            split_docs = text_splitter.split_documents(documents)
+            PageChunks: Page texts and the offsets of every chunk, in page order
 
-            os.remove(temp_file_path)  # Clean up temporary file
-            return split_docs
-        except Exception as e:
-            os.remove(temp_file_path)
-            return str(e)
+        Raises:
+            ValueError: If the PDF cannot be read
+        """
+        documents = PdfLoader.load(uploaded_file.getvalue(), uploaded_file.name)
+        return Utils.make_text_splitter().split_pages(documents)
 
     @staticmethod
-    def get_groq_response(client, context, question, conversation_history, model_name="llama-3.1-8b-instant"):
+    def make_text_splitter():
         """
-        Get response from Groq API using RAG pattern with conversation memory
-        
-        This function:
-        1. Uses system prompts for better conversation awareness
-        2. Includes previous Q&A pairs as context
-        3. Handles references like "that", "it", "the topic we discussed"
-        4. Maintains document grounding while being conversational
-        
-        Args:
-            client (Groq): Initialized Groq client
-            context (str): Relevant document chunks as context
-            question (str): Current user question
-            conversation_history (list): Previous Q&A pairs
-            model_name (str): Groq model to use
-            
+        Create the text splitter used for every document.
+
+        Chunks are kept as offsets into the page texts until they are
+        embedded, and match RecursiveCharacterTextSplitter's unless
+        CHUNK_BOUNDARIES=sentence.
+
         Returns:
-            str: Generated answer with conversation awareness
+            OffsetTextSplitter: Splitter with the app's chunk settings
         """
-        
-        # Build conversation messages for better context management
-        messages = [
-                    {
-                        "role": "system",
-                        "content": """You are a document analysis assistant with conversation memory. Your capabilities:
-
-            1. DOCUMENT GROUNDING: Always base answers on the provided document context
-            2. CONVERSATION AWARENESS: Remember and reference previous exchanges when relevant
-            3. REFERENCE RESOLUTION: When users say "that", "it", "the topic", understand what they're referring to
-            4. CLARITY: If a reference is ambiguous, ask for clarification
-            5. ACCURACY: Never make up information not in the document or conversation
-
-            You maintain context across the conversation while staying grounded in the document."""
-                    }
-                ]
-        
-        # Add recent conversation history (last 5 exchanges to manage tokens)
-        for prev_q, prev_a in conversation_history[-5:]:
-            messages.append({"role": "user", "content": prev_q})
-            messages.append({"role": "assistant", "content": prev_a})
-            
-            # Add current question with document context
-            current_message = f"""
-                Document Context:
-                    {context}
-                        Current Question: 
-                            {question}
-                """
-            
-            messages.append({"role": "user", "content": current_message})
-            
-        try:
-            # Make API call to Groq with conversation context
-            response = client.chat.completions.create(
-                        messages=messages,
-                        model=model_name,  # Using Llama 3.1 8B for speed and quality
-                        temperature=0.1,   # Low temperature for factual, consistent answers
-                        max_tokens=1000    # Reasonable response length
-                    )
-            return response.choices[0].message.content
-        except Exception as e:
-            # Return user-friendly error message
-            return f"Error getting response: {str(e)}"
-        
+        return OffsetTextSplitter(
+            chunk_size=Utils.CHUNK_SIZE,
+            chunk_overlap=Utils.CHUNK_OVERLAP,
+            mode=Utils.CHUNK_BOUNDARIES,
+        )
+
+    # Prompting and Groq calls live in GroqChat so they can run without Streamlit
+    get_groq_response = staticmethod(GroqChat.get_response)
+    build_messages = staticmethod(GroqChat.build_messages)
+    stream_groq_response = staticmethod(GroqChat.stream_response)
+
+    @staticmethod
+    @st.cache_resource
+    def embedding_model_warmup():
+        """
+        Start loading the embedding model in a background thread.
+
+        Called when the app starts, so the model loads while the user enters
+        their API key and picks a file. A dummy encode runs once the model is
+        loaded so the first real query does not pay for lazy initialisation.
+
+        The model is wrapped in an EmbeddingBatcher, so encodes from all
+        sessions are merged into micro-batches on one worker thread. The
+        EMBEDDING_BATCH_SIZE and EMBEDDING_BATCH_WAIT_MS environment variables
+        tune when a batch is flushed.
+
+        Returns:
+            ModelWarmup: The process-wide warmup of the embedding model
+        """
+        def load():
+            from sentence_transformers import SentenceTransformer
+            return EmbeddingBatcher(
+                SentenceTransformer(Utils.EMBEDDING_MODEL_NAME),
+                max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+                max_wait=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5")) / 1000,
+            )
+
+        return ModelWarmup(load, warmup=lambda model: model.encode(["warmup"]), name="embedding-warmup").start()
+
     @staticmethod
     @st.cache_resource
     def load_embedding_model():
@@ -135,12 +143,182 @@ class Utils:
         Load sentence transformer model for creating embeddings locally.
 
         Uses streamlit's cache_resource decoratore to load the model only once
-        and reuse it across sessions for better performance.
+        and reuse it across sessions for better performance. Waits for the
+        background warmup when it is still running.
+
+        Returns:
+            EmbeddingBatcher: The loaded model behind the shared batcher
+        """
+        return Utils.embedding_model_warmup().get()
+
+    @staticmethod
+    @st.cache_resource
+    def load_reranker():
+        """
+        Load the cross-encoder used to rerank retrieved chunks.
+
+        The per-question latency budget can be changed with the
+        RERANK_LATENCY_BUDGET_MS environment variable.
+
+        Returns:
+            Reranker: Reranker wrapping a CPU cross-encoder
+        """
+        from sentence_transformers import CrossEncoder
+
+        return Reranker(
+            CrossEncoder(Utils.RERANKER_MODEL_NAME, device="cpu"),
+            latency_budget=float(os.getenv("RERANK_LATENCY_BUDGET_MS", "500")) / 1000,
+        )
+
+    @staticmethod
+    @st.cache_resource
+    def load_document_cache():
+        """
+        Open the on-disk cache of processed documents.
+
+        The size cap can be changed with the DOCUMENT_CACHE_MAX_MB environment
+        variable.
+
+        Returns:
+            DocumentCache: Cache shared across sessions
+        """
+        max_mb = int(os.getenv("DOCUMENT_CACHE_MAX_MB", "1024"))
+        return DocumentCache(Utils.cache_dir() / "documents", max_bytes=max_mb * 1024 * 1024)
+
+    @staticmethod
+    @st.cache_resource
+    def load_embedding_cache():
+        """
+        Open the cache of chunk embeddings shared by all documents.
+
+        Identical chunks (repeated headers, footers, disclaimers) are only
+        encoded once. Recent embeddings stay in memory and all of them are
+        kept in a SQLite file next to the document cache.
+
+        Returns:
+            EmbeddingCache: Cache shared across sessions
+        """
+        return EmbeddingCache(
+            Utils.EMBEDDING_MODEL_NAME,
+            sqlite_path=Utils.cache_dir() / "embeddings.sqlite3",
+        )
+
+    @staticmethod
+    @st.cache_resource
+    def load_summary_cache():
+        """
+        Open the cache of paragraph and section summaries shared by all documents.
+
+        Summaries are keyed by a hash of the text they summarize and kept in a
+        SQLite file next to the document cache, so re-summarizing a revised
+        document only pays for the paragraphs that changed.
+
+        Returns:
+            SummaryCache: Cache shared across sessions
+        """
+        return SummaryCache(sqlite_path=Utils.cache_dir() / "summaries.sqlite3")
+
+    @staticmethod
+    @st.cache_resource
+    def load_query_cache():
+        """
+        Create the LRU cache of query embeddings shared by all sessions.
+
+        Returns:
+            EmbeddingCache: In-memory cache of recent question embeddings
+        """
+        return EmbeddingCache(Utils.EMBEDDING_MODEL_NAME, max_entries=1024)
+
+    @staticmethod
+    @st.cache_resource
+    def load_answer_cache():
+        """
+        Create the cache of generated answers shared by all sessions.
+
+        Size and lifetime can be changed with the ANSWER_CACHE_MAX_ENTRIES and
+        ANSWER_CACHE_TTL_SECONDS environment variables.
+
+        Returns:
+            AnswerCache: In-memory answer cache
+        """
+        return AnswerCache(
+            max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512")),
+            ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")),
+        )
+
+    @staticmethod
+    @st.cache_resource
+    def load_tracer():
+        """
+        Create the tracer shared by all sessions.
+
+        Tracing can be switched off with TRACING_ENABLED=false, which leaves
+        only a no-op call per pipeline stage.
+
+        Returns:
+            Tracer: Per-stage spans and process-wide metrics
+        """
+        return Tracer(enabled=os.getenv("TRACING_ENABLED", "true").lower() not in ("0", "false", "no"))
+
+    @staticmethod
+    def make_context_builder(embedding_model, max_exchanges=5):
+        """
+        Create the token-budget-aware context builder for a question
+
+        Tokens are counted with the embedding model's tokenizer. The
+        CONTEXT_BUDGET_TOKENS environment variable caps prompt size below the
+        model's context window.
+
+        Args:
+            embedding_model (SentenceTransformer): Loaded embedding model
+            max_exchanges (int): Maximum number of past exchanges to include
+
+        Returns:
+            ContextBuilder: Builder reserving MAX_ANSWER_TOKENS for the answer
+        """
+        budget = os.getenv("CONTEXT_BUDGET_TOKENS")
+        return ContextBuilder(
+            tokenizer=getattr(embedding_model, "tokenizer", None),
+            max_tokens=Utils.MAX_ANSWER_TOKENS,
+            max_prompt_tokens=int(budget) if budget else None,
+            max_exchanges=max_exchanges,
+        )
+
+    @staticmethod
+    def cache_dir():
+        """
+        Directory holding the app's on-disk caches.
+
+        Defaults to ~/.cache/document_qa and can be changed with the
+        DOCUMENT_CACHE_DIR environment variable.
+
+        Returns:
+            Path: The cache directory, created if missing
+        """
+        path = Path(os.getenv("DOCUMENT_CACHE_DIR", str(Path.home() / ".cache" / "document_qa")))
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @staticmethod
+    def document_cache_key(uploaded_file):
+        """
+        Compute the cache key of an uploaded document.
+
+        Args:
+            uploaded_file: Streamlit uploaded file object
 
         Returns:
-            SentenceTransformer: Loaded embedding model
+            str: Key combining the file hash, splitter settings, embedding model
+                and embedding storage
         """
-        return SentenceTransformer('all-MiniLM-L6-v2')
+        return DocumentCache.make_key(
+            uploaded_file.getvalue(),
+            Utils.CHUNK_SIZE,
+            Utils.CHUNK_OVERLAP,
+            Utils.EMBEDDING_MODEL_NAME,
+            Utils.CHUNK_BOUNDARIES,
+            Utils.EMBEDDING_STORAGE,
+        )
     
     @staticmethod
     def manage_conversation_context(conversation_history, max_exchanges=10):
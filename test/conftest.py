@@ -0,0 +1,44 @@
+import hashlib
+import time
+
+import numpy as np
+
+class FakeEmbeddingModel:
+    """
+    A stand-in embedding model shared by the tests.
+
+    Embeds a text as [length, 1.0] followed by zeros up to `dimension`, or
+    [length, 1.0, checksum of its characters] with checksum=True, so texts of
+    different lengths stay apart; random=True gives every text a stable random
+    vector instead. Records every batch (and its keyword arguments) and can be
+    made slow or made to fail.
+    """
+    def __init__(self, dimension=3, checksum=False, random=False, latency=0.0):
+        self.dimension = dimension
+        self.checksum = checksum
+        self.random = random
+        self.latency = latency
+        self.fail = False
+        self.batches = []  # Texts of every encode call
+        self.kwargs = []   # Keyword arguments of every encode call
+
+    @property
+    def texts(self):
+        return [text for batch in self.batches for text in batch]
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        self.kwargs.append(kwargs)
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("encoder failed")
+        embeddings = np.zeros((len(texts), self.dimension))
+        for row, text in enumerate(texts):
+            if self.random:
+                seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=4).digest(), "little")
+                embeddings[row] = np.random.default_rng(seed).standard_normal(self.dimension)
+                continue
+            embeddings[row, :2] = len(text), 1.0
+            if self.checksum:
+                embeddings[row, 2] = sum(map(ord, text)) % 97
+        return embeddings
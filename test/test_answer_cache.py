@@ -0,0 +1,80 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from langchain.schema import Document
+
+from src.database.vectorstore import LocalVectorStore
+from src.utils import answer_cache as answer_cache_module
+from src.utils.answer_cache import AnswerCache
+from src.utils.testing_models import HashingEmbeddingModel
+
+def make_key(question="What is the revenue?", chunk_ids=(1, 2), history=(), model="llama-3.1-8b-instant"):
+    return AnswerCache.make_key("doc", model, question, list(chunk_ids), list(history))
+
+def test_repeated_question_hits():
+    cache = AnswerCache()
+    cache.put(make_key(), "42")
+
+    assert cache.get(make_key("  what is the   REVENUE? ")) == "42"
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.parametrize("changed", [
+    {"chunk_ids": (2, 1)},
+    {"history": [("Hi", "Hello")]},
+    {"model": "gemma2-9b-it"},
+    {"question": "What is the profit?"},
+])
+def test_key_changes_with_prompt_inputs(changed):
+    assert make_key(**changed) != make_key()
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", lambda: now[0])
+    cache = AnswerCache(ttl_seconds=10)
+    cache.put("key", "answer")
+
+    now[0] += 5
+    assert cache.get("key") == "answer"
+    now[0] += 6
+    assert cache.get("key") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5, "entries": 0}
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+def test_sessions_with_different_upload_order_do_not_share_answers():
+    documents = {
+        "X": [Document(page_content=f"x manual chunk {i}", metadata={"page": i}) for i in range(2)],
+        "Y": [Document(page_content=f"y report chunk {i}", metadata={"page": i}) for i in range(2)],
+    }
+
+    def first_chunks(upload_order):
+        vector_store = LocalVectorStore(HashingEmbeddingModel(32))
+        for doc_id in upload_order:
+            vector_store.add_documents(documents[doc_id], doc_id=doc_id)
+        hits = vector_store.similarity_search_batch(["chunk"], k=4)[0]
+        return sorted(hits, key=lambda hit: hit.chunk_id)
+
+    def key(hits):
+        return AnswerCache.make_key("X+Y", "model", "question", AnswerCache.chunk_keys(hits), [])
+
+    x_first, y_first = first_chunks("XY"), first_chunks("YX")
+
+    # Chunk ids 0 and 1 are X's chunks in one session and Y's in the other
+    assert [hit.chunk_id for hit in x_first[:2]] == [hit.chunk_id for hit in y_first[:2]]
+    assert key(x_first[:2]) != key(y_first[:2])
+    # The same chunks still share an answer whatever their ids
+    assert key(x_first[:2]) == key(y_first[2:])
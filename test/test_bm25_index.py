@@ -0,0 +1,50 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.bm25_index import BM25Index
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    index.add([10, 11, 12, 13], [
+        "Replace filter part AB-1234 every six months.",
+        "The pump uses part CD-9876.",
+        "Filters should be cleaned weekly. Filters wear out.",
+        "Nothing relevant here.",
+    ])
+    return index
+
+def test_tokenize_keeps_identifiers_whole():
+    assert BM25Index.tokenize("Part AB-1234, version v2.1!") == ["part", "ab-1234", "version", "v2.1"]
+
+def test_exact_identifier_ranks_first(index):
+    results = index.search_batch(["where is AB-1234 used"], k=3)
+
+    assert results[0][0][0] == 10
+    assert [chunk_id for chunk_id, _ in results[0]] == [10]
+
+def test_scores_are_ordered_and_only_matching_chunks_returned(index):
+    results = index.search_batch(["filters part", "unknown words"], k=10)
+
+    scores = [score for _, score in results[0]]
+    assert scores == sorted(scores, reverse=True)
+    assert {chunk_id for chunk_id, _ in results[0]} == {10, 11, 12}
+    assert results[1] == []
+
+def test_excluded_and_removed_chunks_are_not_returned(index):
+    assert [chunk_id for chunk_id, _ in index.search_batch(["part"], k=5, exclude={10})[0]] == [11]
+
+    index.remove([11])
+    assert len(index) == 3
+    assert [chunk_id for chunk_id, _ in index.search_batch(["part"], k=5)[0]] == [10]
+
+def test_additions_are_searchable_after_a_search(index):
+    index.search_batch(["part"], k=5)
+    index.add([14], ["Gasket EF-5555 ships separately."])
+
+    assert index.search_batch(["EF-5555"], k=5)[0][0][0] == 14
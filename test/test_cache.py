@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.cache import DocumentCache
+from src.database.vectorstore import LocalVectorStore
+from test.conftest import FakeEmbeddingModel
+
+@pytest.fixture
+def mock_embedding_model():
+    return FakeEmbeddingModel(dimension=5)
+
+@pytest.fixture
+def populated_store(mock_embedding_model):
+    vector_store = LocalVectorStore(mock_embedding_model)
+    vector_store.add_documents(["short", "a much longer chunk"])
+    return vector_store
+
+def test_make_key_depends_on_settings():
+    key = DocumentCache.make_key(b"pdf", 1000, 200, "model")
+    assert key == DocumentCache.make_key(b"pdf", 1000, 200, "model")
+    assert key != DocumentCache.make_key(b"other pdf", 1000, 200, "model")
+    assert key != DocumentCache.make_key(b"pdf", 500, 200, "model")
+    assert key != DocumentCache.make_key(b"pdf", 1000, 200, "other-model")
+    assert key == DocumentCache.make_key(b"pdf", 1000, 200, "model", "compat")
+    assert key != DocumentCache.make_key(b"pdf", 1000, 200, "model", "sentence")
+    assert key == DocumentCache.make_key(b"pdf", 1000, 200, "model", "compat", "float32")
+    assert key != DocumentCache.make_key(b"pdf", 1000, 200, "model", "compat", "int8")
+
+def test_get_miss_then_hit(tmp_path, mock_embedding_model, populated_store):
+    cache = DocumentCache(tmp_path)
+    key = DocumentCache.make_key(b"pdf", 1000, 200, "model")
+
+    assert cache.get(key, mock_embedding_model) is None
+    cache.put(key, populated_store)
+    cached = cache.get(key, mock_embedding_model)
+
+    assert list(cached.chunks) == ["short", "a much longer chunk"]
+    assert cached.index.ntotal == 2
+    np.testing.assert_array_equal(cached.embeddings, populated_store.embeddings)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_cached_store_does_not_reencode(tmp_path, mock_embedding_model, populated_store):
+    cache = DocumentCache(tmp_path)
+    cache.put("key", populated_store)
+    calls_before = len(mock_embedding_model.batches)
+
+    cached = cache.get("key", mock_embedding_model)
+    cached.similarity_search("query", k=1)
+
+    # Only the query is encoded, not the chunks
+    assert len(mock_embedding_model.batches) == calls_before + 1
+
+def test_lru_eviction(tmp_path, mock_embedding_model, populated_store):
+    cache = DocumentCache(tmp_path, max_bytes=1)
+    cache.put("old", populated_store)
+    cache.put("new", populated_store)
+
+    assert cache.get("old", mock_embedding_model) is None
+    assert cache.get("new", mock_embedding_model) is not None
+    assert cache.stats()["entries"] == 1
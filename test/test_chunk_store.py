@@ -0,0 +1,97 @@
+import pytest
+import json
+import numpy as np
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.chunk_store import ChunkStore
+from src.database.vectorstore import LocalVectorStore
+from test.conftest import FakeEmbeddingModel
+
+@pytest.fixture
+def store():
+    store = ChunkStore()
+    store.extend(["alpha", "bêta ünïcode", ""], "doc-a", [{"source": "a.pdf", "page": 0}, {"source": "a.pdf", "page": 1}, {}])
+    store.extend(["gamma"], "doc-b", [{"source": "b.pdf", "page": 3}])
+    return store
+
+def test_chunks_are_stored_in_shared_arrays(store):
+    assert len(store) == 4
+    assert list(store) == ["alpha", "bêta ünïcode", "", "gamma"]
+    assert store[-1] == "gamma" and store[1:3] == ["bêta ünïcode", ""]
+    assert store.doc_id(3) == "doc-b"
+    assert store.metadata(1) == {"source": "a.pdf", "page": 1}
+    assert store.metadata(2) == {}
+    assert list(store.doc_positions("doc-a")) == [0, 1, 2]
+    assert list(store.doc_positions("unknown")) == []
+    # Views share the buffer instead of copying it
+    view = store.view(1)
+    assert bytes(view) == "bêta ünïcode".encode("utf-8")
+    assert np.shares_memory(np.asarray(view), store._text)
+    with pytest.raises(IndexError):
+        store[4]
+
+def test_growing_keeps_earlier_chunks(store):
+    for i in range(3000):
+        store.extend([f"chunk {i}"], f"doc-{i % 7}", [{"page": i}])
+
+    assert len(store) == 3004
+    assert store[2500] == "chunk 2496"
+    assert store.metadata(2500) == {"page": 2496}
+    assert len(store.doc_table) == 2 + 7
+
+def test_extend_offsets_matches_extend_on_non_ascii_pages():
+    pages = ["Ünïcode — page 🚀 one", "plain ascii page", "ça coûte 5 €"]
+    metadatas = [{"source": "a.pdf", "page": p} for p in range(3)]
+    rows = [(0, 0, 7), (0, 10, 18), (1, 0, 5), (1, 6, 16), (2, 3, 12)]
+    by_offsets, by_texts = ChunkStore(), ChunkStore()
+
+    by_offsets.extend_offsets(pages, metadatas, *(np.array(column) for column in zip(*rows)), "doc-a")
+    by_texts.extend([pages[p][s:e] for p, s, e in rows], "doc-a", [metadatas[p] for p, _, _ in rows])
+
+    assert list(by_offsets) == list(by_texts)
+    assert list(by_offsets.pages) == [0, 0, 1, 1, 2]
+    assert [by_offsets.metadata(i) for i in range(5)] == [by_texts.metadata(i) for i in range(5)]
+
+def test_take_keeps_the_selected_chunks_in_order(store):
+    kept = store.take(np.array([0, 1, 3]))
+
+    assert list(kept) == ["alpha", "bêta ünïcode", "gamma"]
+    assert [kept.doc_id(i) for i in range(3)] == ["doc-a", "doc-a", "doc-b"]
+    assert kept.metadata(2) == {"source": "b.pdf", "page": 3}
+
+def test_save_and_memory_mapped_load(tmp_path, store):
+    store.save(tmp_path)
+
+    loaded = ChunkStore.load(tmp_path, mmap=True)
+
+    assert isinstance(loaded._text, np.memmap)
+    assert list(loaded) == list(store)
+    assert [loaded.metadata(i) for i in range(4)] == [store.metadata(i) for i in range(4)]
+    # Appending copies the read-only maps into memory
+    loaded.extend(["delta"], "doc-a", [{"source": "a.pdf", "page": 5}])
+    assert list(loaded)[-2:] == ["gamma", "delta"]
+    assert list(loaded.doc_positions("doc-a")) == [0, 1, 2, 4]
+    assert list(ChunkStore.load(tmp_path)) == list(store)
+
+def test_vector_store_loads_chunks_saved_inside_json(tmp_path):
+    model = FakeEmbeddingModel()
+    vector_store = LocalVectorStore(model)
+    vector_store.add_documents(["alpha", "a longer beta"], doc_id="a")
+    vector_store.save(tmp_path)
+    for name in ChunkStore.FILES:
+        (tmp_path / name).unlink()
+    # The format used before the chunk store
+    with open(tmp_path / LocalVectorStore.CHUNKS_FILE, "w", encoding="utf-8") as f:
+        json.dump({"chunks": ["alpha", "a longer beta"], "doc_ids": ["a", "a"],
+                   "metadatas": [{"page": 0}, {"page": 1}]}, f)
+
+    loaded = LocalVectorStore.load(tmp_path, model)
+
+    assert list(loaded.chunks) == ["alpha", "a longer beta"]
+    assert loaded.metadatas == [{"page": 0}, {"page": 1}]
+    assert loaded.document_ids() == ["a"]
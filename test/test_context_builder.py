@@ -0,0 +1,64 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.vectorstore import SearchHit
+from src.utils.context_builder import ContextBuilder
+
+class WordTokenizer:
+    """
+    A mock tokenizer that counts one token per word.
+    """
+    def encode(self, text, add_special_tokens=False, verbose=False):
+        return text.split()
+
+def make_hits(*lengths):
+    return [SearchHit(text=" ".join(["word"] * n), score=float(i), chunk_id=i, doc_id="doc")
+            for i, n in enumerate(lengths)]
+
+def test_budget_reserves_answer_tokens_per_model():
+    builder = ContextBuilder(max_tokens=1000, safety_margin=0.0)
+
+    assert builder.prompt_budget("gemma2-9b-it") == 8192 - 1000
+    assert builder.prompt_budget("llama-3.3-70b-versatile") == 131072 - 1000
+    assert ContextBuilder(max_prompt_tokens=3000).prompt_budget("llama-3.1-8b-instant") == 3000
+
+def test_count_tokens_uses_tokenizer_or_estimate():
+    assert ContextBuilder(tokenizer=WordTokenizer()).count_tokens("one two three") == 3
+    assert ContextBuilder().count_tokens("abcdefgh") == 2
+    assert ContextBuilder().count_tokens("") == 0
+
+def test_chunks_that_do_not_fit_are_skipped_for_smaller_ones():
+    builder = ContextBuilder(tokenizer=WordTokenizer(), max_tokens=0, max_prompt_tokens=120,
+                             safety_margin=0.0, max_chunks=3)
+
+    packed = builder.pack("q", make_hits(50, 100, 40, 10, 5), [], "gemma2-9b-it")
+
+    assert [hit.chunk_id for hit in packed.hits] == [0, 2, 3]
+    assert packed.prompt_tokens <= packed.budget
+    assert packed.context.count("word") == 100
+
+def test_history_keeps_the_most_recent_exchanges_that_fit():
+    builder = ContextBuilder(tokenizer=WordTokenizer(), max_tokens=0, max_prompt_tokens=60,
+                             safety_margin=0.0, max_exchanges=5)
+    history = [("old " * 30, "answer"), ("middle " * 10, "answer"), ("recent " * 10, "answer")]
+
+    packed = builder.pack("q", make_hits(10), history, "gemma2-9b-it")
+
+    assert [q.split()[0] for q, _ in packed.conversation_history] == ["middle", "recent"]
+    assert packed.dropped_exchanges == 1
+
+@pytest.mark.parametrize("model_name,expected_chunks", [
+    ("gemma2-9b-it", 2),
+    ("llama-3.1-8b-instant", 4),
+])
+def test_small_model_gets_fewer_chunks(model_name, expected_chunks):
+    builder = ContextBuilder(tokenizer=WordTokenizer(), max_tokens=1000)
+
+    packed = builder.pack("q", make_hits(3000, 3000, 3000, 3000), [], model_name)
+
+    assert len(packed.hits) == expected_chunks
@@ -0,0 +1,91 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+import threading
+import time
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.vectorstore import LocalVectorStore
+from src.utils.embedding_batcher import EmbeddingBatcher, SimulatedEmbeddingModel, load_test
+from test.conftest import FakeEmbeddingModel
+
+@pytest.fixture
+def model():
+    model = FakeEmbeddingModel(dimension=2, latency=0.02)
+    model.tokenizer = "tokenizer"
+    return model
+
+def test_concurrent_requests_share_model_calls(model):
+    batcher = EmbeddingBatcher(model, max_batch_size=64, max_wait=0.05)
+    texts = [f"question {'x' * i}" for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda text: batcher.encode([text]), texts))
+    batcher.close()
+
+    # Every caller gets its own row back
+    assert [row[0][0] for row in results] == [float(len(text)) for text in texts]
+    assert len(model.batches) < len(texts)
+    assert batcher.stats()["requests"] == 16
+    assert batcher.stats()["mean_batch_size"] > 1
+
+def test_batches_are_flushed_at_max_batch_size(model):
+    batcher = EmbeddingBatcher(model, max_batch_size=4, max_wait=0.5)
+
+    futures = [batcher.submit([f"text {i}", f"more {i}"]) for i in range(5)]
+    results = [future.result(timeout=5) for future in futures]
+    batcher.close()
+
+    assert all(len(texts) <= 4 for texts in model.batches)
+    assert [len(result) for result in results] == [2] * 5
+
+def test_a_lone_request_is_flushed_at_the_deadline(model):
+    batcher = EmbeddingBatcher(model, max_batch_size=64, max_wait=0.01)
+
+    start = time.perf_counter()
+    embeddings = batcher.encode(["alone"])
+    elapsed = time.perf_counter() - start
+    batcher.close()
+
+    assert embeddings.shape == (1, 2)
+    assert elapsed < 0.5
+
+def test_errors_reach_every_request_of_the_batch(model):
+    batcher = EmbeddingBatcher(model, max_wait=0.05)
+    model.fail = True
+    futures = [batcher.submit(["a"]), batcher.submit(["b"])]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="encoder failed"):
+            future.result(timeout=5)
+
+    model.fail = False
+    assert batcher.encode(["c"]).shape == (1, 2)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(["closed"])
+
+def test_batcher_stands_in_for_the_model(model):
+    batcher = EmbeddingBatcher(model, max_wait=0.001)
+    vector_store = LocalVectorStore(batcher)
+    vector_store.add_documents(["alpha", "a longer beta"], doc_id="a")
+
+    assert vector_store.similarity_search("a longer beta", k=1) == ["a longer beta"]
+    assert batcher.tokenizer == "tokenizer"
+    assert batcher.encode("single").shape == (2,)
+    batcher.encode(["direct"], normalize_embeddings=True)
+    assert (model.batches[-1], model.kwargs[-1]) == (["direct"], {"normalize_embeddings": True})
+    batcher.close()
+
+def test_load_test_shows_higher_throughput_and_lower_p99():
+    model = SimulatedEmbeddingModel(call_seconds=0.004, text_seconds=0.0001, dimension=8)
+
+    results = load_test(model, clients=16, requests_per_client=10, max_wait=0.005)
+
+    assert results["batched"]["texts_per_second"] > 2 * results["direct"]["texts_per_second"]
+    assert results["batched"]["p99_seconds"] < results["direct"]["p99_seconds"]
+    assert results["batcher"]["requests"] == 160
+    assert results["batcher"]["mean_batch_size"] > 2
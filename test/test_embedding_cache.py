@@ -0,0 +1,63 @@
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.embedding_cache import EmbeddingCache
+from src.database.vectorstore import LocalVectorStore
+from test.conftest import FakeEmbeddingModel
+
+@pytest.fixture
+def model():
+    return FakeEmbeddingModel()
+
+def test_duplicates_within_a_batch_are_encoded_once(model):
+    cache = EmbeddingCache("model")
+
+    embeddings = cache.encode(model, ["Confidential", "Body text", "Confidential  ", "Confidential"])
+
+    assert model.texts == ["Confidential", "Body text"]
+    assert embeddings.shape == (4, 3)
+    np.testing.assert_array_equal(embeddings[0], embeddings[2])
+    assert cache.stats()["duplicates"] == 2
+    assert cache.stats()["misses"] == 2
+
+def test_embeddings_are_reused_across_documents(model):
+    cache = EmbeddingCache("model")
+    cache.encode(model, ["Footer", "First document"])
+
+    cache.encode(model, ["Footer", "Second document"])
+
+    assert model.texts == ["Footer", "First document", "Second document"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert stats["hit_ratio"] == pytest.approx(0.25)
+
+def test_model_name_is_part_of_the_key():
+    assert EmbeddingCache("a").key("text") != EmbeddingCache("b").key("text")
+
+def test_sqlite_spill_survives_eviction_and_restart(tmp_path, model):
+    cache = EmbeddingCache("model", max_entries=1, sqlite_path=tmp_path / "cache.sqlite3")
+    cache.encode(model, ["one", "two"])
+    cache.close()
+
+    reopened = EmbeddingCache("model", max_entries=1, sqlite_path=tmp_path / "cache.sqlite3")
+    embeddings = reopened.encode(model, ["one", "two"])
+
+    assert model.texts == ["one", "two"]
+    assert embeddings[0][0] == 3.0
+    assert reopened.stats()["hits"] == 2
+
+def test_vector_store_uses_embedding_cache(model):
+    cache = EmbeddingCache("model")
+    LocalVectorStore(model, embedding_cache=cache).add_documents(["Disclaimer", "Report A"])
+    second = LocalVectorStore(model, embedding_cache=cache)
+
+    second.add_documents(["Disclaimer", "Report B"])
+
+    assert model.texts == ["Disclaimer", "Report A", "Report B"]
+    assert second.similarity_search("Report B", k=1) == ["Report B"]
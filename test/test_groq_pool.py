@@ -0,0 +1,185 @@
+import pytest
+import json
+import threading
+import time
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+
+import groq
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.utils.groq_pool import GroqPool
+
+def completion_body(content):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "fake-model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    }
+
+class FakeOpenAIServer:
+    """
+    A local OpenAI-compatible chat completions server.
+
+    Each request pops the next scripted (status, headers) failure; once the
+    script is empty it answers with a completion (or an SSE stream).
+    """
+    def __init__(self, failures=(), delay=0.0):
+        self.failures = list(failures)
+        self.delay = delay
+        self.calls = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.calls += 1
+                time.sleep(server.delay)
+                if server.failures:
+                    status, headers = server.failures.pop(0)
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.end_headers()
+                    self.wfile.write(json.dumps({"error": {"message": "Rate limit reached"}}).encode())
+                    return
+                if request.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for token in ["Hel", "lo"]:
+                        chunk = {
+                            "id": "c", "object": "chat.completion.chunk", "created": 0, "model": "fake-model",
+                            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    return
+                body = json.dumps(completion_body("answer to " + request["messages"][-1]["content"])).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+@pytest.fixture
+def make_pool():
+    resources = []
+
+    def factory(failures=(), delay=0.0, **kwargs):
+        server = FakeOpenAIServer(failures, delay)
+        pool = GroqPool("fake-key", base_url=server.url, backoff_base=0.01, **kwargs)
+        resources.append((server, pool))
+        return server, pool
+
+    yield factory
+    for server, pool in resources:
+        pool.close()
+        server.close()
+
+def ask(pool, question="hi"):
+    return pool.chat.completions.create(model="fake-model", messages=[{"role": "user", "content": question}])
+
+def test_retries_rate_limit_and_server_errors(make_pool):
+    server, pool = make_pool(failures=[(429, {"Retry-After": "0"}), (503, {})])
+
+    response = ask(pool)
+
+    assert response.choices[0].message.content == "answer to hi"
+    assert server.calls == 3
+    assert pool.stats["retries"] == 2
+
+def test_raises_after_retries_are_exhausted(make_pool):
+    server, pool = make_pool(failures=[(429, {})] * 3, max_retries=2)
+
+    with pytest.raises(groq.RateLimitError):
+        ask(pool)
+    assert server.calls == 3
+
+def test_client_errors_are_not_retried(make_pool):
+    server, pool = make_pool(failures=[(400, {})])
+
+    with pytest.raises(groq.BadRequestError):
+        ask(pool)
+    assert server.calls == 1
+
+def test_retry_after_is_honoured(make_pool):
+    _, pool = make_pool()
+
+    class Response:
+        headers = {"retry-after": "7"}
+
+    assert pool._retry_delay(Response(), attempt=0) == 7.0
+    assert 0 <= pool._retry_delay(None, attempt=3) <= 0.08
+
+def test_identical_concurrent_requests_are_coalesced(make_pool):
+    server, pool = make_pool(delay=0.3)
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(ask(pool, "same"))) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.calls == 1
+    assert pool.stats["coalesced"] == 3
+    assert {a.choices[0].message.content for a in answers} == {"answer to same"}
+
+def test_stream_yields_chunks(make_pool):
+    _, pool = make_pool()
+
+    stream = pool.chat.completions.create(model="fake-model", messages=[{"role": "user", "content": "hi"}], stream=True)
+
+    assert "".join(chunk.choices[0].delta.content for chunk in stream) == "Hello"
+
+def test_shared_returns_one_pool_per_key():
+    first = GroqPool.shared("shared-test-key", base_url="http://127.0.0.1:9")
+    assert GroqPool.shared("shared-test-key", base_url="http://127.0.0.1:9") is first
+    first.close()
+    assert GroqPool.shared("shared-test-key", base_url="http://127.0.0.1:9") is not first
+
+def test_abandoned_stream_stops_reading_and_closes_the_response(make_pool, monkeypatch):
+    _, pool = make_pool()
+    read, closed = [], threading.Event()
+
+    class EndlessStream:
+        async def __aiter__(self):
+            while True:
+                read.append(len(read))
+                yield SimpleNamespace(index=len(read))
+
+        async def close(self):
+            closed.set()
+
+    async def acreate(**kwargs):
+        return EndlessStream()
+
+    monkeypatch.setattr(pool, "acreate", acreate)
+
+    stream = pool.chat.completions.create(model="fake-model", messages=[{"role": "user", "content": "hi"}], stream=True)
+    assert next(stream).index == 1
+    time.sleep(0.1)
+    # Reads ahead stop at the buffer while the consumer is busy
+    assert len(read) <= GroqPool.STREAM_BUFFER + 2
+    del stream
+
+    assert closed.wait(5)
@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.index_factory import IndexFactory
+from src.database.vectorstore import LocalVectorStore
+from test.conftest import FakeEmbeddingModel
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).standard_normal((3000, 16)).astype('float32')
+
+def test_choose_index_type_by_size():
+    assert IndexFactory.choose_index_type(100) == "flat"
+    assert IndexFactory.choose_index_type(50_000) == "hnsw"
+    assert IndexFactory.choose_index_type(500_000) == "ivf_flat"
+    assert IndexFactory.choose_index_type(5_000_000) == "ivf_pq"
+
+def test_untrainable_types_fall_back_to_flat():
+    assert IndexFactory.resolve_index_type("ivf_flat", 10) == "flat"
+    assert IndexFactory.resolve_index_type("hnsw", 10) == "hnsw"
+    with pytest.raises(ValueError, match="Unknown index type"):
+        IndexFactory.resolve_index_type("lsh", 10)
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_build_finds_exact_vectors(vectors, index_type):
+    index, resolved = IndexFactory.build(index_type, vectors, np.arange(len(vectors), dtype='int64') + 100)
+
+    assert resolved == index_type
+    assert IndexFactory.index_type_of(index) == index_type
+    _, ids = index.search(vectors[:5], 1)
+    assert list(ids[:, 0]) == [100, 101, 102, 103, 104]
+
+def test_benchmark_reports_recall_and_latency(vectors):
+    results = IndexFactory.benchmark(vectors, vectors[:20], ("flat", "hnsw"), k=4)
+
+    assert results["flat"]["recall@4"] == 1.0
+    assert 0.0 < results["hnsw"]["recall@4"] <= 1.0
+    assert results["hnsw"]["p99_ms"] >= results["hnsw"]["p50_ms"]
+
+def test_vector_store_promotes_index_once_trainable():
+    vector_store = LocalVectorStore(FakeEmbeddingModel(dimension=16, random=True), index_type="ivf_flat")
+    vector_store.add_documents([f"chunk {i}" for i in range(10)])
+    assert IndexFactory.index_type_of(vector_store.index) == "flat"
+
+    vector_store.add_documents([f"chunk {i}" for i in range(10, 3000)])
+    assert IndexFactory.index_type_of(vector_store.index) == "ivf_flat"
+    assert vector_store.similarity_search("chunk 42", k=1) == ["chunk 42"]
+
+def test_pca_is_fitted_once_enough_chunks_arrive():
+    vector_store = LocalVectorStore(FakeEmbeddingModel(dimension=16, random=True), pca_dim=8)
+    vector_store.add_documents([f"chunk {i}" for i in range(4)])
+    assert IndexFactory.pca_dim_of(vector_store.index) is None
+
+    vector_store.add_documents([f"chunk {i}" for i in range(4, 100)])
+    assert IndexFactory.pca_dim_of(vector_store.index) == 8
+    assert vector_store.embeddings.shape == (100, 16)
+    assert vector_store.index.ntotal == 100
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_compressed_indexes_can_be_reconstructed(vectors, index_type):
+    index, _ = IndexFactory.build(index_type, vectors, np.arange(len(vectors), dtype='int64'), "float16")
+
+    np.testing.assert_allclose(IndexFactory.reconstruct_all(index), vectors, atol=1e-2)
+
+def test_benchmark_storage_reports_recall_and_memory(vectors):
+    results = IndexFactory.benchmark_storage(vectors, vectors[:50], pca_dims=(None, 8), k=4)
+
+    assert results["float32"]["recall@4"] == 1.0
+    assert results["int8"]["recall@4"] > 0.8
+    assert results["int8"]["bytes_per_chunk"] < results["float16"]["bytes_per_chunk"] < results["float32"]["bytes_per_chunk"]
+    assert results["float32+pca8"]["bytes_per_chunk"] < results["float32"]["bytes_per_chunk"]
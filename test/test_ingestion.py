@@ -0,0 +1,96 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.database.vectorstore import LocalVectorStore
+from src.document_processor.ingestion import IngestionPipeline
+from src.document_processor.offset_splitter import OffsetTextSplitter, PageChunks
+from src.document_processor.pdf_loader import PdfLoader
+from test.test_pdf_loader import make_pdf
+from test.conftest import FakeEmbeddingModel
+
+@pytest.fixture
+def pdf_bytes():
+    return make_pdf([f"Page {i} " + "word " * 30 for i in range(12)])
+
+@pytest.fixture
+def splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=60, chunk_overlap=10, length_function=len)
+
+def test_pipeline_matches_sequential_ingestion(pdf_bytes, splitter):
+    expected = splitter.split_documents(PdfLoader.load(pdf_bytes, "doc.pdf", max_workers=1))
+    model = FakeEmbeddingModel(checksum=True)
+    vector_store = LocalVectorStore(model)
+
+    n_chunks = IngestionPipeline(vector_store, splitter, batch_size=5, max_queued_pages=2).run(
+        pdf_bytes, "doc.pdf", doc_id="doc", max_workers=1
+    )
+
+    assert n_chunks == len(expected)
+    assert list(vector_store.chunks) == [doc.page_content for doc in expected]
+    assert [meta["page"] for meta in vector_store.metadatas] == [doc.metadata["page"] for doc in expected]
+    assert vector_store.index.ntotal == len(expected)
+    assert vector_store.document_ids() == ["doc"]
+    # Fixed-size micro-batches, only the last one may be smaller
+    assert all(len(batch) == 5 for batch in model.batches[:-1])
+    assert 0 < len(model.batches[-1]) <= 5
+
+def test_pipeline_stores_offset_chunks_without_building_documents(pdf_bytes, splitter, monkeypatch):
+    expected = splitter.split_documents(PdfLoader.load(pdf_bytes, "doc.pdf", max_workers=1))
+    monkeypatch.setattr(PageChunks, "documents", lambda *args, **kwargs: pytest.fail("Documents were built"))
+    vector_store = LocalVectorStore(FakeEmbeddingModel(checksum=True))
+
+    n_chunks = IngestionPipeline(vector_store, OffsetTextSplitter(chunk_size=60, chunk_overlap=10), batch_size=5).run(
+        pdf_bytes, "doc.pdf", doc_id="doc", max_workers=1
+    )
+
+    assert n_chunks == len(expected)
+    assert list(vector_store.chunks) == [doc.page_content for doc in expected]
+    assert [meta["page"] for meta in vector_store.metadatas] == [doc.metadata["page"] for doc in expected]
+    assert vector_store.index.ntotal == len(expected)
+
+def test_pipeline_reports_progress(pdf_bytes, splitter):
+    updates = []
+    vector_store = LocalVectorStore(FakeEmbeddingModel(checksum=True))
+
+    IngestionPipeline(vector_store, splitter, batch_size=4).run(
+        pdf_bytes, "doc.pdf", progress_callback=lambda *args: updates.append(args), max_workers=1
+    )
+
+    pages_done = [pages for pages, _, _ in updates]
+    assert pages_done == sorted(pages_done)
+    assert updates[-1] == (12, 12, len(vector_store.chunks))
+
+def test_pipeline_raises_on_invalid_pdf(splitter):
+    vector_store = LocalVectorStore(FakeEmbeddingModel(checksum=True))
+
+    with pytest.raises(ValueError, match="Could not read PDF"):
+        IngestionPipeline(vector_store, splitter).run(b"not a pdf", "broken.pdf")
+
+def test_pipeline_propagates_stage_errors(pdf_bytes, splitter):
+    class FailingModel:
+        def encode(self, texts):
+            raise RuntimeError("encoder crashed")
+
+    with pytest.raises(RuntimeError, match="encoder crashed"):
+        IngestionPipeline(LocalVectorStore(FailingModel()), splitter).run(pdf_bytes, "doc.pdf", max_workers=1)
+
+def test_pipeline_reports_stage_timings(pdf_bytes, splitter):
+    timings = {}
+    vector_store = LocalVectorStore(FakeEmbeddingModel(checksum=True))
+
+    IngestionPipeline(vector_store, splitter, batch_size=4).run(
+        pdf_bytes, "doc.pdf", max_workers=1, timings=timings
+    )
+
+    assert timings["pages"] == 12
+    assert set(timings) == {"parse", "split", "embed", "index", "total", "pages"}
+    assert all(timings[stage] > 0 for stage in ("parse", "split", "embed", "index"))
+    # Stages only count time spent working, never more than they were alive for
+    assert max(timings[stage] for stage in ("parse", "split", "embed", "index")) <= timings["total"]
@@ -0,0 +1,147 @@
+import pytest
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+
+from langchain.schema import Document
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.chunk_store import ChunkStore
+from src.database.metadata_filter import MetadataFilter
+from src.database.vectorstore import LocalVectorStore
+from src.utils.testing_models import HashingEmbeddingModel
+
+JANUARY = datetime(2025, 1, 1).timestamp()
+MARCH = datetime(2025, 3, 1).timestamp()
+
+def make_corpus(index_type="flat", storage="float32"):
+    """
+    Five documents of ten pages each, uploaded a month apart.
+    """
+    vector_store = LocalVectorStore(HashingEmbeddingModel(32), index_type=index_type, storage=storage)
+    for d in range(5):
+        documents = [
+            Document(page_content=f"manual {d} page {p} pump valve seal {p * d}",
+                     metadata={"source": f"manual-{d}.pdf", "page": p})
+            for p in range(10)
+        ]
+        vector_store.add_documents(documents, doc_id=f"doc-{d}", added_at=datetime(2025, d + 1, 1).timestamp())
+    return vector_store
+
+def test_from_dict_accepts_single_values_and_rejects_unknown_fields():
+    metadata_filter = MetadataFilter.from_dict(
+        {"source": "a.pdf", "pages": [2, None], "uploaded_after": "2025-01-01"}
+    )
+
+    assert metadata_filter.sources == ["a.pdf"]
+    assert metadata_filter.pages == (2, None)
+    assert MetadataFilter.timestamp(metadata_filter.uploaded_after) == JANUARY
+    assert MetadataFilter.from_dict({}) is None
+    with pytest.raises(ValueError, match="colour"):
+        MetadataFilter.from_dict({"colour": "red"})
+    with pytest.raises(ValueError):
+        MetadataFilter.from_dict({"pages": [1, 2, 3]})
+    with pytest.raises(ValueError):
+        MetadataFilter.from_dict({"uploaded_before": "last week"})
+
+def test_mask_combines_documents_sources_pages_and_dates():
+    chunks = ChunkStore()
+    chunks.extend(["a0", "a1", "a2"], "doc-a", [{"source": "a.pdf", "page": p} for p in range(3)], added_at=JANUARY)
+    chunks.extend(["b0", "b1"], "doc-b", [{"source": "b.pdf", "page": 0}, {}], added_at=MARCH)
+    chunks.extend(["c0"], "doc-c", [{"source": "c.pdf", "page": 1}], added_at=float("nan"))
+
+    def matching(**fields):
+        return [chunks.text(pos) for pos in np.flatnonzero(MetadataFilter(**fields).mask(chunks))]
+
+    assert matching() == ["a0", "a1", "a2", "b0", "b1", "c0"]
+    assert matching(doc_ids=["doc-b"]) == ["b0", "b1"]
+    assert matching(sources=["a.pdf", "c.pdf"], pages=(1, None)) == ["a1", "a2", "c0"]
+    # Chunks without a page never match a page range
+    assert matching(pages=(0, 0)) == ["a0", "b0"]
+    # Documents with an unknown upload time never match a date range
+    assert matching(uploaded_after=datetime(2025, 2, 1)) == ["b0", "b1"]
+    assert matching(uploaded_before="2025-02-01") == ["a0", "a1", "a2"]
+    assert matching(doc_ids=["missing"]) == []
+
+def test_filtered_search_only_returns_matching_chunks():
+    vector_store = make_corpus()
+
+    hits = vector_store.similarity_search_batch(
+        ["pump valve seal"], k=10, filter={"source": "manual-2.pdf", "pages": [3, 6]}
+    )[0]
+    recent = vector_store.similarity_search_batch(
+        ["pump valve seal"], k=50, filter=MetadataFilter(uploaded_after="2025-04-01")
+    )[0]
+
+    assert sorted((hit.source, hit.page) for hit in hits) == [("manual-2.pdf", page) for page in range(3, 7)]
+    assert {hit.doc_id for hit in recent} == {"doc-3", "doc-4"}
+    assert len(recent) == 20
+    assert vector_store.similarity_search("pump", k=4, filter={"doc_ids": []}) == []
+
+@pytest.mark.parametrize("index_type,storage", [("flat", "float32"), ("flat", "int8"), ("hnsw", "float16")])
+def test_exact_subset_and_selector_paths_agree(index_type, storage):
+    vector_store = make_corpus(index_type, storage)
+    metadata_filter = MetadataFilter(doc_ids=["doc-1", "doc-3"], pages=(2, 8))
+    expected = metadata_filter.mask(vector_store.chunks).sum()
+
+    exact = vector_store.similarity_search_batch(["seal 6", "manual 3"], k=5, filter=metadata_filter)
+    vector_store.FILTER_EXACT_MAX = 0
+    selected = vector_store.similarity_search_batch(["seal 6", "manual 3"], k=5, filter=metadata_filter)
+
+    assert expected == 14
+    for exact_hits, selected_hits in zip(exact, selected):
+        # Compressed codes tie often, so tied chunks may come back in either order
+        assert np.allclose([hit.score for hit in exact_hits], [hit.score for hit in selected_hits], rtol=1e-4)
+        for hit in exact_hits + selected_hits:
+            assert hit.doc_id in ("doc-1", "doc-3") and 2 <= hit.page <= 8
+
+def test_filtered_search_skips_deleted_chunks_on_both_sides():
+    vector_store = make_corpus()
+    vector_store.compact_threshold = 1.0
+    vector_store.delete_document("doc-2")
+
+    metadata_filter = MetadataFilter(doc_ids=["doc-2", "doc-4"])
+    dense = vector_store.similarity_search_batch(["manual 2 page 5"], k=20, filter=metadata_filter)[0]
+    hybrid = vector_store.hybrid_search_batch(["manual 2 page 5"], k=20, filter=metadata_filter)[0]
+    vector_store.FILTER_EXACT_MAX = 0
+    selected = vector_store.similarity_search_batch(["manual 2 page 5"], k=20, filter=metadata_filter)[0]
+
+    for hits in (dense, hybrid, selected):
+        assert {hit.doc_id for hit in hits} == {"doc-4"}
+        assert len(hits) == 10
+
+def test_add_vector_store_merges_documents_without_re_encoding():
+    model = HashingEmbeddingModel(32)
+    first = LocalVectorStore(model)
+    first.add_documents([Document(page_content="pump manual", metadata={"source": "a.pdf", "page": 0})],
+                        doc_id="a", added_at=JANUARY)
+    second = LocalVectorStore(model)
+    second.add_documents([Document(page_content="valve manual", metadata={"source": "b.pdf", "page": 4})],
+                         doc_id="b", added_at=MARCH)
+    second.add_documents(["deleted manual"], doc_id="c")
+    second.delete_document("c")
+
+    added = first.add_vector_store(second)
+    again = first.add_vector_store(second)
+
+    assert added == ["b"] and again == []
+    assert first.document_ids() == ["a", "b"]
+    assert [info["uploaded_at"] for info in first.document_info()] == [JANUARY, MARCH]
+    assert np.allclose(first.embeddings[1], second.embeddings[0])
+    [hit] = first.similarity_search_batch(["valve manual"], k=1, filter={"source": "b.pdf"})[0]
+    assert (hit.text, hit.doc_id, hit.page) == ("valve manual", "b", 4)
+
+def test_upload_times_survive_save_and_compaction(tmp_path):
+    vector_store = make_corpus()
+    vector_store.delete_document("doc-0")
+    vector_store.save(tmp_path)
+
+    loaded = LocalVectorStore.load(tmp_path, HashingEmbeddingModel(32))
+    hits = loaded.similarity_search_batch(["pump"], k=50, filter={"uploaded_before": "2025-03-15"})[0]
+
+    assert loaded.chunks.added_at("doc-1") == datetime(2025, 2, 1).timestamp()
+    assert {hit.doc_id for hit in hits} == {"doc-1", "doc-2"}
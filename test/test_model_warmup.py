@@ -0,0 +1,48 @@
+import pytest
+from pathlib import Path
+import sys
+import threading
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.utils.model_warmup import ModelWarmup
+
+def test_model_loads_in_background_and_is_warmed_up():
+    release = threading.Event()
+    warmed = []
+
+    def load():
+        release.wait(5)
+        return "model"
+
+    warmup = ModelWarmup(load, warmup=warmed.append).start()
+    assert not warmup.is_ready()
+    with pytest.raises(TimeoutError):
+        warmup.get(timeout=0.01)
+
+    release.set()
+    assert warmup.get(timeout=5) == "model"
+    assert warmed == ["model"]
+    assert set(warmup.timings) == {"load_seconds", "warmup_seconds"}
+
+def test_loader_runs_once():
+    calls = []
+    warmup = ModelWarmup(lambda: calls.append(1) or len(calls))
+    warmup.start()
+    warmup.start()
+
+    assert warmup.get(timeout=5) == 1
+    assert warmup.get(timeout=5) == 1
+    assert calls == [1]
+
+def test_loader_errors_reach_every_caller():
+    def load():
+        raise OSError("model not found")
+
+    warmup = ModelWarmup(load).start()
+
+    for _ in range(2):
+        with pytest.raises(OSError, match="model not found"):
+            warmup.get(timeout=5)
@@ -0,0 +1,83 @@
+import pytest
+import random
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.document_processor.offset_splitter import OffsetTextSplitter
+from src.document_processor.pdf_loader import PdfLoader
+from src.utils.pipeline_benchmark import make_synthetic_pdf
+
+def random_text(rng):
+    parts = ["a", "word", "sentence.", "\n", "\n\n", " ", "  ", "\t", "x" * rng.choice([1, 20, 200])]
+    return "".join(rng.choice(parts) for _ in range(rng.randint(0, 300)))
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(1000, 200), (60, 10), (10, 0), (30, 30)])
+def test_compat_mode_matches_langchain(chunk_size, chunk_overlap):
+    rng = random.Random(chunk_size)
+    langchain = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len)
+    splitter = OffsetTextSplitter(chunk_size, chunk_overlap)
+
+    for _ in range(300):
+        text = random_text(rng)
+        assert splitter.split_text(text) == langchain.split_text(text)
+
+def test_compat_mode_matches_langchain_on_pdf_pages():
+    pages = PdfLoader.load(make_synthetic_pdf(5, lines_per_page=60), "doc.pdf", max_workers=1)
+    expected = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len).split_documents(pages)
+
+    chunks = OffsetTextSplitter(1000, 200).split_documents(pages)
+
+    assert [(doc.page_content, doc.metadata) for doc in chunks] == [(doc.page_content, doc.metadata) for doc in expected]
+
+def test_split_pages_keeps_offsets_into_each_page():
+    pages = [Document(page_content="First page. " * 20, metadata={"page": 0}),
+             Document(page_content="", metadata={"page": 1}),
+             Document(page_content="Second page text.", metadata={"page": 2})]
+
+    chunks = OffsetTextSplitter(100, 20).split_pages(pages)
+
+    assert len(chunks) == 4
+    assert list(chunks.pages) == [0, 0, 0, 2]
+    # Page texts are held once, chunks are slices of them
+    assert chunks.texts[0] is pages[0].page_content
+    assert chunks.text(3) == "Second page text."
+    assert all(pages[page].page_content[start:end] == chunks.text(i)
+               for i, (page, start, end) in enumerate(zip(chunks.pages, chunks.starts, chunks.ends)))
+    documents = chunks.documents(1, 3, add_start_index=True)
+    assert [doc.metadata for doc in documents] == [{"page": 0, "start_index": int(chunks.starts[1])},
+                                                   {"page": 0, "start_index": int(chunks.starts[2])}]
+
+def test_sentence_mode_breaks_at_sentence_ends_rather_than_lines():
+    text = ("The pump was inspected on\nMonday and passed. " * 4) + "\n\n" + "Next paragraph starts here."
+    compat = OffsetTextSplitter(120, 0).split_text(text)
+    sentence = OffsetTextSplitter(120, 0, mode="sentence").split_text(text)
+
+    assert any(not chunk.endswith(".") for chunk in compat)
+    assert all(chunk.endswith(".") for chunk in sentence)
+    assert sentence[-1] == "Next paragraph starts here."
+    assert all(len(chunk) <= 120 for chunk in sentence)
+
+def test_invalid_settings_raise():
+    with pytest.raises(ValueError):
+        OffsetTextSplitter(mode="tokens")
+    with pytest.raises(ValueError):
+        OffsetTextSplitter(100, 200)
+
+def test_benchmark_reports_every_splitter():
+    pages = PdfLoader.load(make_synthetic_pdf(3), "doc.pdf", max_workers=1)
+
+    results = OffsetTextSplitter.benchmark(pages, repeats=1)
+
+    assert results["compat_matches_langchain"] is True
+    for name in ("langchain", "offset_documents", "offset_pages", "sentence_pages"):
+        assert results[name]["chunks"] > 0
+        assert results[name]["pages_per_second"] > 0
+        assert results[name]["peak_mb"] > 0
+    assert results["offset_pages"]["peak_mb"] < results["langchain"]["peak_mb"]
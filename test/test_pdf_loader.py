@@ -0,0 +1,72 @@
+import pytest
+import os
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.document_processor.pdf_loader import PdfLoader
+
+def make_pdf(page_texts):
+    """
+    Build a minimal PDF with one line of Helvetica text per page.
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode('latin-1')}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+@pytest.fixture
+def pdf_bytes():
+    return make_pdf([f"Page number {i}" for i in range(20)])
+
+def test_load_returns_pages_in_order_with_metadata(pdf_bytes):
+    documents = PdfLoader.load(pdf_bytes, "report.pdf", max_workers=1)
+
+    assert [doc.page_content for doc in documents] == [f"Page number {i}" for i in range(20)]
+    assert documents[3].metadata["source"] == "report.pdf"
+    assert documents[3].metadata["page"] == 3
+    assert documents[3].metadata["total_pages"] == 20
+
+def test_parallel_load_matches_serial_load(pdf_bytes):
+    serial = PdfLoader.load(pdf_bytes, "report.pdf", max_workers=1)
+    parallel = PdfLoader.load(pdf_bytes, "report.pdf", max_workers=2, pages_per_task=3)
+
+    assert [doc.page_content for doc in parallel] == [doc.page_content for doc in serial]
+    assert [doc.metadata for doc in parallel] == [doc.metadata for doc in serial]
+
+def test_load_raises_on_invalid_pdf():
+    with pytest.raises(ValueError, match="Could not read PDF broken.pdf"):
+        PdfLoader.load(b"not a pdf", "broken.pdf")
+
+def test_parallel_load_recovers_from_a_broken_pool(pdf_bytes):
+    broken = PdfLoader._get_executor(2)
+    # A worker dying breaks the whole pool
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+
+    documents = PdfLoader.load(pdf_bytes, "report.pdf", max_workers=2, pages_per_task=3)
+
+    assert [doc.page_content for doc in documents] == [f"Page number {i}" for i in range(20)]
+    assert PdfLoader._executor is not broken
@@ -0,0 +1,53 @@
+import pytest
+from pathlib import Path
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.utils.pipeline_benchmark import compare, make_synthetic_pdf, run
+from src.utils.testing_models import HashingEmbeddingModel
+from src.document_processor.pdf_loader import PdfLoader
+
+def test_synthetic_pdf_has_requested_pages_and_is_deterministic():
+    pdf_bytes = make_synthetic_pdf(5, lines_per_page=10)
+
+    documents = PdfLoader.load(pdf_bytes, "synthetic.pdf", max_workers=1)
+
+    assert len(documents) == 5
+    assert all(len(document.page_content.split()) > 60 for document in documents)
+    assert make_synthetic_pdf(5, lines_per_page=10) == pdf_bytes
+
+def test_hashing_embedding_model_is_normalized_and_deterministic():
+    model = HashingEmbeddingModel(dimension=16)
+
+    embeddings = model.encode(["pump valve", "pump valve", "sensor"])
+
+    assert embeddings.shape == (3, 16)
+    assert (embeddings[0] == embeddings[1]).all()
+    assert abs(float((embeddings ** 2).sum(axis=1)[2]) - 1.0) < 1e-6
+
+def test_run_reports_every_metric():
+    results = run(HashingEmbeddingModel(), pages=3, lines_per_page=10, queries=10,
+                  questions=2, llm_latency=0.0, repeats=1)
+
+    assert results["config"]["chunks"] > 0
+    assert set(results["metrics"]) == {
+        "load_and_split_pages_per_second", "add_documents_chunks_per_second",
+        "similarity_search_qps", "similarity_search_p50_seconds", "similarity_search_p99_seconds",
+        "question_p50_seconds", "question_p99_seconds", "question_overhead_p50_seconds",
+    }
+    assert all(value >= 0 for value in results["metrics"].values())
+
+def test_compare_flags_slower_latency_and_lower_throughput_only():
+    baseline = {"metrics": {"similarity_search_qps": 1000.0, "question_p99_seconds": 0.5,
+                            "add_documents_chunks_per_second": 100.0}}
+    results = {"metrics": {"similarity_search_qps": 700.0, "question_p99_seconds": 0.55,
+                           "add_documents_chunks_per_second": 300.0, "new_metric_seconds": 1.0}}
+
+    regressions = compare(results, baseline, tolerance=0.2)
+
+    assert [regression["metric"] for regression in regressions] == ["similarity_search_qps"]
+    assert regressions[0]["change"] == pytest.approx(1000 / 700 - 1)
+    assert compare(results, baseline, tolerance=0.5) == []
@@ -0,0 +1,70 @@
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock
+import json
+import sys
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.document_processor.qa_pipeline import QAPipeline, read_questions
+from test.test_pdf_loader import make_pdf
+from test.conftest import FakeEmbeddingModel
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    (tmp_path / "pumps.pdf").write_bytes(make_pdf(["Pump model PX-100 runs at 3000 rpm.", "Service every year."]))
+    (tmp_path / "filters.pdf").write_bytes(make_pdf(["Filter FL-7 must be replaced monthly."]))
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    return tmp_path
+
+def mock_client(answer="Mocked answer"):
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices[0].message.content = answer
+    return client
+
+def test_ingest_files_indexes_every_readable_pdf(pdf_dir):
+    pipeline = QAPipeline(FakeEmbeddingModel(checksum=True))
+
+    results = pipeline.ingest_files(sorted(pdf_dir.glob("*.pdf")), max_workers=3)
+
+    assert [result["source"] for result in results] == ["broken.pdf", "filters.pdf", "pumps.pdf"]
+    assert "error" in results[0]
+    assert [result["chunks"] for result in results[1:]] == [1, 2]
+    assert sorted(pipeline.vector_store.document_ids()) == [str(pdf_dir / "filters.pdf"), str(pdf_dir / "pumps.pdf")]
+
+def test_questions_are_retrieved_in_one_batch_and_answered_with_sources(pdf_dir):
+    model = FakeEmbeddingModel(checksum=True)
+    client = mock_client()
+    pipeline = QAPipeline(model, client)
+    pipeline.ingest_files([pdf_dir / "pumps.pdf", pdf_dir / "filters.pdf"])
+    model.batches.clear()
+
+    results = pipeline.answer_questions(["What speed does PX-100 run at?", "How often is FL-7 replaced?"])
+
+    assert model.batches == [["What speed does PX-100 run at?", "How often is FL-7 replaced?"]]
+    assert client.chat.completions.create.call_count == 2
+    assert [result["answer"] for result in results] == ["Mocked answer", "Mocked answer"]
+    assert results[0]["sources"][0]["source"] == "pumps.pdf"
+    assert results[1]["sources"][0]["source"] == "filters.pdf"
+    assert set(results[0]["timings"]) == {"retrieval", "llm"}
+    json.dumps(results)
+
+def test_retrieval_only_and_llm_errors(pdf_dir):
+    pipeline = QAPipeline(FakeEmbeddingModel(checksum=True))
+    pipeline.ingest_files([pdf_dir / "pumps.pdf"])
+    assert pipeline.answer_questions(["PX-100?"])[0]["answer"] is None
+
+    pipeline.client = MagicMock()
+    pipeline.client.chat.completions.create.side_effect = RuntimeError("rate limited")
+    result = pipeline.answer_questions(["PX-100?"])[0]
+    assert result["answer"] is None
+    assert result["error"] == "rate limited"
+
+def test_read_questions_from_text_and_jsonl(tmp_path):
+    (tmp_path / "questions.txt").write_text("First?\n\n  Second?\n")
+    (tmp_path / "questions.jsonl").write_text('{"question": "Third?"}\n')
+
+    assert read_questions(tmp_path / "questions.txt") == ["First?", "Second?"]
+    assert read_questions(tmp_path / "questions.jsonl") == ["Third?"]
@@ -0,0 +1,67 @@
+import pytest
+from pathlib import Path
+import sys
+import time
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.database.reranker import Reranker
+from src.database.vectorstore import SearchHit
+
+class KeywordCrossEncoder:
+    """
+    A mock cross-encoder scoring a chunk by how often it contains the query's last word.
+    """
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def predict(self, pairs):
+        self.batches.append(list(pairs))
+        time.sleep(self.delay)
+        return [text.count(query.split()[-1]) for query, text in pairs]
+
+def make_hits(*texts):
+    return [SearchHit(text=text, score=float(i), chunk_id=i, doc_id="doc") for i, text in enumerate(texts)]
+
+def test_hits_are_reordered_by_cross_encoder_score():
+    model = KeywordCrossEncoder()
+    reranker = Reranker(model, batch_size=2)
+
+    stats = {}
+    hits = reranker.rerank("about pumps", make_hits("filters", "pumps pumps", "pumps"), top_k=2, stats=stats)
+
+    assert [hit.chunk_id for hit in hits] == [1, 2]
+    assert [hit.score for hit in hits] == [2.0, 1.0]
+    assert [len(batch) for batch in model.batches] == [2, 1]
+    assert stats["scored"] == 3 and stats["cached"] == 0 and not stats["fallback"]
+
+def test_scores_are_cached_per_query_and_chunk():
+    model = KeywordCrossEncoder()
+    reranker = Reranker(model)
+    reranker.rerank("about pumps", make_hits("filters", "pumps"))
+
+    stats = {}
+    reranker.rerank("About  pumps", make_hits("pumps", "valves"), stats=stats)
+
+    assert model.batches[-1] == [("About  pumps", "valves")]
+    assert stats["cached"] == 1 and stats["scored"] == 1
+
+def test_low_scores_are_dropped():
+    hits = Reranker(KeywordCrossEncoder()).rerank("pumps", make_hits("filters", "pumps"), min_score=1)
+
+    assert [hit.text for hit in hits] == ["pumps"]
+
+def test_original_order_is_kept_when_over_budget():
+    model = KeywordCrossEncoder(delay=0.05)
+    reranker = Reranker(model, batch_size=1, latency_budget=0.01)
+    original = make_hits("filters", "pumps pumps", "pumps")
+
+    stats = {}
+    hits = reranker.rerank("pumps", original, top_k=2, stats=stats)
+
+    assert hits == original
+    assert stats["fallback"]
+    assert len(model.batches) == 1
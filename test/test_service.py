@@ -0,0 +1,252 @@
+import pytest
+from pathlib import Path
+import asyncio
+import json
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestClient, TestServer
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.document_processor.service import QAService
+from src.utils.local_llm import LocalLLM
+from src.utils.model_warmup import ModelWarmup
+from src.database.cache import DocumentCache
+from test.test_pdf_loader import make_pdf
+from test.conftest import FakeEmbeddingModel
+
+PUMP_PDF = make_pdf(["Pump model PX-100 runs at 3000 rpm. It is quiet.", "Service the pump every year."])
+
+def run_with_client(scenario, model=None, client=None, **kwargs):
+    """
+    Start the service on a test server and run an async scenario against it.
+    """
+    model = model or FakeEmbeddingModel(checksum=True)
+    service = QAService(ModelWarmup(lambda: model).start(), client or LocalLLM(), **kwargs)
+
+    async def run():
+        async with TestClient(TestServer(service.make_app())) as http:
+            return await scenario(http, service)
+
+    return asyncio.run(run())
+
+async def ingest(http, pdf_bytes=PUMP_PDF, name="pumps.pdf"):
+    response = await http.post(f"/documents?name={name}", data=pdf_bytes)
+    return response.status, await response.json()
+
+def test_ingest_registers_document_once():
+    model = FakeEmbeddingModel(checksum=True)
+
+    async def scenario(http, service):
+        first, second = await asyncio.gather(ingest(http), ingest(http))
+        again = await ingest(http)
+        listed = await (await http.get("/documents")).json()
+        health = await (await http.get("/health")).json()
+        return first, second, again, listed, health
+
+    first, second, again, listed, health = run_with_client(scenario, model)
+
+    # Concurrent uploads of the same file are processed once
+    assert first == second
+    assert first[0] == 201 and first[1]["chunks"] == 2
+    assert len(model.texts) == 2
+    assert again[1]["cached"] is True
+    assert [(doc["source"], doc["chunks"]) for doc in listed] == [("pumps.pdf", 2)]
+    assert health == {"status": "ok", "model_ready": True, "documents": 1}
+
+def test_ingest_rejects_unreadable_pdf():
+    async def scenario(http, service):
+        response = await http.post("/documents?name=broken.pdf", data=b"not a pdf")
+        return response.status, service.documents
+
+    status, documents = run_with_client(scenario)
+
+    assert status == 400
+    assert documents == {}
+
+def test_query_answers_with_local_llm_and_sources():
+    llm = LocalLLM()
+
+    async def scenario(http, service):
+        _, document = await ingest(http)
+        response = await http.post(
+            f"/documents/{document['doc_id']}/query",
+            json={"question": "How fast does PX-100 run?", "history": [["Hi", "Hello"]]},
+        )
+        missing = await http.post("/documents/unknown/query", json={"question": "Anything?"})
+        return response.status, await response.json(), missing.status
+
+    status, result, missing_status = run_with_client(scenario, client=llm)
+
+    assert status == 200
+    assert "Pump model PX-100 runs at 3000 rpm." in result["answer"]
+    assert {source["source"] for source in result["sources"]} == {"pumps.pdf"}
+    assert set(result["timings"]) == {"retrieval", "llm"}
+    assert llm.stats["calls"] == 1
+    assert missing_status == 404
+
+def test_corpus_query_filters_by_document_and_page():
+    manual = make_pdf(["Valve V-7 opens at 2 bar.", "Replace the valve seal yearly."])
+
+    async def scenario(http, service):
+        _, pumps = await ingest(http)
+        _, valves = await ingest(http, manual, name="valves.pdf")
+        everything = await (await http.post("/query", json={"question": "How fast does PX-100 run?"})).json()
+        second_pages = await (await http.post(
+            "/query", json={"question": "How often?", "filter": {"pages": [1, 1]}}
+        )).json()
+        one_document = await (await http.post(
+            f"/documents/{valves['doc_id']}/query", json={"question": "How fast does PX-100 run?"}
+        )).json()
+        bad = await http.post("/query", json={"question": "Anything?", "filter": {"colour": "red"}})
+        await http.delete(f"/documents/{valves['doc_id']}")
+        after_delete = await (await http.post("/query", json={"question": "Valve V-7?"})).json()
+        return everything, second_pages, one_document, bad.status, after_delete
+
+    everything, second_pages, one_document, bad_status, after_delete = run_with_client(scenario)
+
+    assert {source["source"] for source in everything["sources"]} == {"pumps.pdf", "valves.pdf"}
+    # Pages are numbered from 0, as in the chunk metadata
+    assert {source["page"] for source in second_pages["sources"]} == {1}
+    assert {source["source"] for source in one_document["sources"]} == {"valves.pdf"}
+    assert bad_status == 400
+    assert {source["source"] for source in after_delete["sources"]} == {"pumps.pdf"}
+
+def test_stream_sends_tokens_then_sources():
+    async def scenario(http, service):
+        _, document = await ingest(http)
+        response = await http.post(f"/documents/{document['doc_id']}/stream", json={"question": "What is PX-100?"})
+        return response.headers["Content-Type"], await response.text()
+
+    content_type, body = run_with_client(scenario, client=LocalLLM(tokens_per_second=1000))
+
+    events = [event for event in body.split("\n\n") if event]
+    tokens = [json.loads(event[len("data: "):]) for event in events if event.startswith("data: ")]
+    assert content_type == "text/event-stream"
+    assert len(tokens) > 1
+    assert "".join(tokens).startswith("Pump model PX-100")
+    assert events[-1].startswith("event: done")
+    done = json.loads(events[-1].split("data: ", 1)[1])
+    assert done["sources"] and "time_to_first_token" in done["timings"]
+
+class EndlessStreamLLM(LocalLLM):
+    """
+    A LocalLLM whose streamed answers never end, recording when they are closed.
+    """
+    def __init__(self):
+        super().__init__()
+        self.closed = threading.Event()
+
+    def create(self, messages, model=None, stream=False, **kwargs):
+        def chunks():
+            try:
+                while True:
+                    time.sleep(0.005)
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="more "))])
+            finally:
+                self.closed.set()
+
+        return chunks()
+
+def test_stream_closes_upstream_when_client_disconnects():
+    llm = EndlessStreamLLM()
+
+    async def scenario(http, service):
+        await ingest(http)
+        response = await http.post("/stream", json={"question": "What is PX-100?"})
+        first = await response.content.readany()
+        response.close()
+        for _ in range(200):
+            if llm.closed.is_set():
+                break
+            await asyncio.sleep(0.01)
+        # The only LLM worker is free again
+        freed = await asyncio.wait_for(service._run(lambda: True, executor=service._llm_executor), 2)
+        return first, freed
+
+    first, freed = run_with_client(scenario, client=llm, max_llm_workers=1)
+
+    assert first.startswith(b"data: ")
+    assert llm.closed.is_set()
+    assert freed
+
+def test_metrics_report_stage_timings_and_counts():
+    async def scenario(http, service):
+        _, document = await ingest(http)
+        await http.post(f"/documents/{document['doc_id']}/query", json={"question": "What is PX-100?"})
+        response = await http.get("/metrics")
+        return response.headers["Content-Type"], await response.text()
+
+    content_type, text = run_with_client(scenario)
+
+    assert content_type.startswith("text/plain")
+    for stage in ("ingest", "ingest.parse", "ingest.embed", "retrieval", "llm"):
+        assert f'rag_stage_duration_seconds_count{{stage="{stage}"}} 1' in text
+    assert 'rag_pages_total 2' in text
+    assert 'rag_tokens_out_total' in text
+
+def test_requests_are_served_while_llm_is_busy():
+    async def scenario(http, service):
+        _, document = await ingest(http)
+        slow = asyncio.ensure_future(
+            http.post(f"/documents/{document['doc_id']}/query", json={"question": "What is PX-100?"})
+        )
+        await asyncio.sleep(0.05)
+        health = await http.get("/health")
+        health_done_first = not slow.done()
+        await (await slow).json()
+        return health.status, health_done_first
+
+    status, health_done_first = run_with_client(scenario, client=LocalLLM(latency=0.5))
+
+    assert status == 200
+    assert health_done_first
+
+def test_ingest_reuses_document_cache(tmp_path):
+    cache = DocumentCache(tmp_path)
+
+    async def scenario(http, service):
+        return await ingest(http)
+
+    run_with_client(scenario, document_cache=cache)
+    model = FakeEmbeddingModel(checksum=True)
+    _, result = run_with_client(scenario, model, document_cache=cache)
+
+    assert result["cached"] is True
+    assert result["chunks"] == 2
+    assert model.texts == []
+
+def test_reingest_after_delete_records_new_upload_time():
+    async def scenario(http, service):
+        _, document = await ingest(http)
+        first = (await (await http.get("/documents")).json())[0]["ingested_at"]
+        await asyncio.sleep(0.05)
+        await http.delete(f"/documents/{document['doc_id']}")
+        _, again = await ingest(http)
+        listed = await (await http.get("/documents")).json()
+        recent = await (await http.post(
+            "/query", json={"question": "How fast does PX-100 run?", "filter": {"uploaded_after": first + 0.01}}
+        )).json()
+        return first, again, listed, recent
+
+    first, again, listed, recent = run_with_client(scenario)
+
+    assert again["cached"] is False
+    assert listed[0]["ingested_at"] > first
+    assert {source["source"] for source in recent["sources"]} == {"pumps.pdf"}
+
+def test_local_llm_matches_groq_interface():
+    llm = LocalLLM(answer_sentences=1)
+    messages = [{"role": "user", "content": "Document Context: First fact. Second fact. Current Question: Why?"}]
+
+    completion = llm.chat.completions.create(messages=messages, model="local")
+    chunks = list(llm.chat.completions.create(messages=messages, model="local", stream=True))
+
+    assert completion.choices[0].message.content == "First fact."
+    assert "".join(chunk.choices[0].delta.content for chunk in chunks) == "First fact."
+    assert llm.stats["calls"] == 2
@@ -0,0 +1,133 @@
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+import sys
+import threading
+import time
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from langchain.schema import Document
+
+from src.agents.summarizer import DocumentSummarizer
+from src.agents.summary_cache import SummaryCache
+
+class RecordingClient:
+    """
+    A fake Groq client that records prompts and how many calls overlap.
+    """
+    def __init__(self, latency=0.0, fail_on=None):
+        self.prompts = []
+        self.latency = latency
+        self.fail_on = fail_on
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model=None, **kwargs):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if self.fail_on and self.fail_on in prompt.split("<paragraph>")[-1]:
+                raise RuntimeError("Groq is down")
+            if "<summaries>" in prompt:
+                content = f"<response>merged {prompt.count('summary of')} summaries</response>"
+            else:
+                paragraph = prompt.split("<paragraph>")[1].split("</Paragraph>")[0].split()
+                content = "Not Relevant" if "boilerplate" in paragraph else f"summary of {paragraph[1]}"
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @property
+    def paragraph_prompts(self):
+        return [prompt for prompt in self.prompts if "<summaries>" not in prompt]
+
+def make_pages(n_paragraphs, changed=()):
+    paragraphs = ["Abstract: we study pumps and their maintenance schedules."]
+    for i in range(n_paragraphs):
+        word = "revised" if i in changed else "original"
+        paragraphs.append(f"Paragraph p{i} is {word} text about pumps. " * 3)
+    # Two paragraphs per page
+    return [Document(page_content="\n\n".join(paragraphs[i:i + 2]), metadata={"page": i // 2})
+            for i in range(0, len(paragraphs), 2)]
+
+def make_summarizer(client, cache=None, **kwargs):
+    return DocumentSummarizer(client, "test-model", cache=cache, min_paragraph_chars=40, **kwargs)
+
+def test_split_paragraphs_and_find_abstract():
+    summarizer = DocumentSummarizer(None, min_paragraph_chars=10, max_paragraph_chars=100)
+    pages = [Document(page_content="ABSTRACT\n\nShort.\n\nWe measure pump wear over ten years.\n\n" + "Long text. " * 30)]
+
+    paragraphs = summarizer.split_paragraphs(pages)
+
+    assert paragraphs[0] == "ABSTRACT Short."
+    assert paragraphs[1] == "We measure pump wear over ten years."
+    assert all(len(paragraph) <= 100 for paragraph in paragraphs)
+    assert DocumentSummarizer.find_abstract(paragraphs) == "Short."
+    assert DocumentSummarizer.find_abstract(["Intro text", "More"]) == "Intro text"
+
+def test_map_runs_concurrently_within_the_limit_and_reduces_hierarchically():
+    client = RecordingClient(latency=0.05)
+    summarizer = make_summarizer(client, max_concurrency=4, reduce_fanout=3)
+    progress = []
+
+    result = summarizer.summarize(make_pages(9), progress_callback=lambda *args: progress.append(args))
+
+    # Abstract paragraph plus nine, each summarized once
+    assert len(client.paragraph_prompts) == 10
+    assert 1 < client.max_in_flight <= 4
+    # 10 summaries -> 4 merges -> 2 merges -> 1 merge
+    assert result["levels"] == 3
+    assert result["llm_calls"] == 10 + 4 + 2 + 1
+    assert result["summary"].startswith("merged")
+    assert "<response>" not in result["summary"]
+    assert result["abstract"] == "we study pumps and their maintenance schedules."
+    assert progress[-1][0] == progress[-1][1]
+    assert set(result["timings"]) == {"map", "reduce"}
+
+def test_summaries_are_reused_and_only_changed_paragraphs_are_resummarized(tmp_path):
+    cache = SummaryCache(sqlite_path=tmp_path / "summaries.sqlite3")
+    first = RecordingClient()
+    make_summarizer(first, cache).summarize(make_pages(6))
+
+    again = RecordingClient()
+    result = make_summarizer(again, cache).summarize(make_pages(6))
+    assert again.prompts == []
+    assert result["llm_calls"] == 0
+
+    # A new process with the same SQLite file
+    revised = RecordingClient()
+    cache = SummaryCache(sqlite_path=tmp_path / "summaries.sqlite3")
+    make_summarizer(revised, cache).summarize(make_pages(6, changed={2}))
+    assert len(revised.paragraph_prompts) == 1
+    assert "p2 is revised" in revised.paragraph_prompts[0]
+
+def test_irrelevant_and_failed_paragraphs_are_left_out_of_the_summary():
+    client = RecordingClient(fail_on="p1 ")
+    pages = make_pages(3)
+    pages.append(Document(page_content="Legal boilerplate text that repeats on every page.", metadata={"page": 9}))
+
+    result = make_summarizer(client).summarize(pages)
+
+    assert result["failed"] == 1
+    assert result["skipped"] == 1
+    merge = [prompt for prompt in client.prompts if "<summaries>" in prompt][0]
+    assert "summary of p0" in merge and "summary of p2" in merge
+    assert "p1" not in merge.split("<summaries>")[1]
+
+def test_failure_of_every_paragraph_raises():
+    with pytest.raises(RuntimeError, match="Groq is down"):
+        make_summarizer(RecordingClient(fail_on="pumps")).summarize(make_pages(2))
+
+def test_empty_document_raises():
+    with pytest.raises(ValueError):
+        make_summarizer(RecordingClient()).summarize([Document(page_content="  ")])
@@ -0,0 +1,98 @@
+import pytest
+from pathlib import Path
+import json
+import logging
+import sys
+import threading
+import time
+
+# Get the parent directory of the current file
+parent_dir = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(parent_dir))
+
+from src.utils.tracing import NULL_TRACE, Tracer
+
+def test_spans_and_counts_are_recorded_per_trace():
+    tracer = Tracer(log=False)
+    trace = tracer.trace("question")
+
+    with trace.span("retrieval") as span:
+        span["hits"] = 4
+    trace.record("llm", 0.2)
+    trace.record("llm", 0.1)
+    trace.count("tokens_in", 120)
+    trace.count("cache_hits", cache="answer")
+
+    assert [(span.name, span.attributes) for span in trace.spans] == [
+        ("retrieval", {"hits": 4}), ("llm", {}), ("llm", {}),
+    ]
+    breakdown = trace.breakdown()
+    assert [(stage, calls) for stage, _, calls in breakdown] == [("retrieval", 1), ("llm", 2)]
+    assert breakdown[1][1] == pytest.approx(0.3)
+    assert trace.counts == {"tokens_in": 120, "cache_hits{cache=answer}": 1}
+    assert trace.total_seconds() >= 0.2
+
+def test_prometheus_text_has_cumulative_histograms_and_labelled_counters():
+    tracer = Tracer(log=False)
+    for seconds in (0.003, 0.2, 4.0):
+        tracer.trace("question").record("llm", seconds)
+    tracer.trace("question").count("cache_hits", 2, cache="query")
+    tracer.trace("question").count("chunks", 4)
+
+    text = tracer.prometheus_text()
+
+    assert '# TYPE rag_stage_duration_seconds histogram' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="llm",le="0.005"} 1' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="llm",le="0.25"} 2' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 'rag_stage_duration_seconds_count{stage="llm"} 3' in text
+    assert 'rag_cache_hits_total{cache="query"} 2' in text
+    assert 'rag_chunks_total 4' in text
+
+def test_spans_are_logged_as_json(caplog):
+    tracer = Tracer()
+    trace = tracer.trace("ingest", source="paper.pdf")
+
+    with caplog.at_level(logging.INFO, logger="rag.trace"):
+        trace.record("ingest.parse", 0.5, pages=3)
+
+    record = json.loads(caplog.records[-1].message)
+    assert record["trace_id"] == trace.trace_id
+    assert record["span"] == "ingest.parse"
+    assert record["source"] == "paper.pdf" and record["pages"] == 3
+
+def test_spans_can_be_recorded_from_many_threads():
+    tracer = Tracer(log=False)
+    trace = tracer.trace("ingest")
+
+    def work():
+        for _ in range(100):
+            trace.record("ingest.embed", 0.001)
+            trace.count("chunks")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert trace.breakdown()[0][2] == 400
+    assert trace.counts["chunks"] == 400
+
+def test_disabled_tracer_records_nothing_and_costs_little():
+    tracer = Tracer(enabled=False)
+    trace = tracer.trace("question")
+
+    with trace.span("retrieval") as span:
+        span["hits"] = 4
+    trace.count("chunks", 4)
+
+    assert trace is NULL_TRACE
+    assert trace.breakdown() == [] and trace.total_seconds() == 0.0
+    assert "rag_chunks_total" not in tracer.prometheus_text()
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        with tracer.trace("question").span("retrieval"):
+            pass
+    assert (time.perf_counter() - start) / 10_000 < 20e-6
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from pathlib import Path
+import os
 import sys
 
 # Get the parent directory of the current file
@@ -38,37 +39,45 @@ def test_initialize_groq():
     """
     Test the initialize_groq method.
     """
-    with patch("src.utils.utils.Groq") as MockGroq:
-        mock_instance = MockGroq.return_value
+    with patch("src.utils.utils.GroqPool") as MockGroq:
+        mock_instance = MockGroq.shared.return_value
         result = Utils.initialize_groq("mock_api_key")
-        MockGroq.assert_called_once_with(api_key="mock_api_key")
+        MockGroq.shared.assert_called_once_with(api_key="mock_api_key", base_url=os.getenv("GROQ_BASE_URL"))
         assert result == mock_instance
 
+def test_initialize_groq_uses_base_url_from_environment():
+    """
+    Test that initialize_groq points the shared client at GROQ_BASE_URL.
+    """
+    with patch("src.utils.utils.GroqPool") as MockGroq, \
+         patch.dict("os.environ", {"GROQ_BASE_URL": "http://127.0.0.1:8000"}):
+        Utils.initialize_groq("mock_api_key")
+        MockGroq.shared.assert_called_once_with(api_key="mock_api_key", base_url="http://127.0.0.1:8000")
+
 def test_load_and_split_pdf(mock_uploaded_file, mock_documents):
     """
     Test the load_and_split_pdf method.
     """
-    with patch("src.utils.utils.PyPDFLoader") as MockLoader, \
-         patch("src.utils.utils.RecursiveCharacterTextSplitter") as MockSplitter, \
+    with patch("src.utils.utils.PdfLoader") as MockLoader, \
+         patch("src.utils.utils.OffsetTextSplitter") as MockSplitter, \
          patch("os.remove") as mock_remove:
         
         # Mock the PDF loader
-        mock_loader_instance = MockLoader.return_value
-        mock_loader_instance.load.return_value = mock_documents
+        MockLoader.load.return_value = mock_documents
 
         # Mock the text splitter
         mock_splitter_instance = MockSplitter.return_value
-        mock_splitter_instance.split_documents.return_value = ["Chunk 1", "Chunk 2"]
+        mock_splitter_instance.split_pages.return_value = ["Chunk 1", "Chunk 2"]
 
         # Call the method
         result = Utils.load_and_split_pdf(mock_uploaded_file)
 
         # Assertions
-        MockLoader.assert_called_once()
-        MockSplitter.assert_called_once_with(chunk_size=1000, chunk_overlap=200, length_function=len)
-        mock_loader_instance.load.assert_called_once()
-        mock_splitter_instance.split_documents.assert_called_once_with(mock_documents)
-        mock_remove.assert_called_once()  
+        MockLoader.load.assert_called_once_with(mock_uploaded_file.getvalue(), mock_uploaded_file.name)
+        MockSplitter.assert_called_once_with(chunk_size=1000, chunk_overlap=200, mode="compat")
+        mock_splitter_instance.split_pages.assert_called_once_with(mock_documents)
+        # Parsed from memory, so there is no temporary file to clean up
+        mock_remove.assert_not_called()
         assert result == ["Chunk 1", "Chunk 2"]
 
 def test_get_groq_response(mock_groq_client):
@@ -114,4 +123,29 @@ def test_load_embedding_model():
         mock_instance = MockEmbeddings.return_value
         result = Utils.load_embedding_model()
         MockEmbeddings.assert_called_once_with(model_name="all-MiniLM-L6-v2")
-        assert result == mock_instance
\ No newline at end of file
+        assert result == mock_instance
+
+def test_stream_groq_response_yields_tokens_and_records_timings():
+    """
+    Test the stream_groq_response method.
+    """
+    def stream_chunk(content):
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = content
+        return chunk
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = iter(
+        [stream_chunk("Hello"), stream_chunk(None), stream_chunk(" world")]
+    )
+    timings = {}
+
+    tokens = list(Utils.stream_groq_response(mock_client, "context", "question", [], "gemma2-9b-it", timings))
+
+    assert tokens == ["Hello", " world"]
+    kwargs = mock_client.chat.completions.create.call_args.kwargs
+    assert kwargs["stream"] is True
+    assert kwargs["model"] == "gemma2-9b-it"
+    assert kwargs["messages"][-1]["role"] == "user"
+    assert "question" in kwargs["messages"][-1]["content"]
+    assert 0 <= timings["time_to_first_token"] <= timings["total_time"]
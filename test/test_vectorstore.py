@@ -8,7 +8,9 @@ import sys
 parent_dir = Path(__file__).resolve(strict=True).parent.parent
 sys.path.append(str(parent_dir))
 
+from src.database.chunk_store import ChunkStore
 from src.database.vectorstore import LocalVectorStore
+from test.conftest import FakeEmbeddingModel
 
 class MockEmbeddingModel:
     """
@@ -38,7 +40,7 @@ def test_add_document(mock_embedding_model, mock_documents):
     vector_store.add_document(mock_documents)
 
     # Check if chunks are correctly stored
-    assert vector_store.chunks == ["Document 1 content", "Document 2 content"]
+    assert list(vector_store.chunks) == ["Document 1 content", "Document 2 content"]
 
     # Check if embeddings are correctly created
     assert vector_store.embeddings.shape == (2, 5)  # 2 documents, embedding size 5
@@ -63,4 +65,200 @@ def test_similarity_search_empty_index(mock_embedding_model):
 
     # Attempt to search without adding documents
     with pytest.raises(ValueError, match="Vector store is empty"):
-        vector_store.similarity_search("Query")
\ No newline at end of file
+        vector_store.similarity_search("Query")
+
+
+@pytest.fixture
+def counting_embedding_model():
+    return FakeEmbeddingModel(dimension=5)
+
+def test_add_documents_appends_and_encodes_only_new_chunks(counting_embedding_model):
+    vector_store = LocalVectorStore(counting_embedding_model)
+    vector_store.add_documents(["first doc"], doc_id="a")
+    vector_store.add_documents(["second document", "more"], doc_id="b")
+
+    assert list(vector_store.chunks) == ["first doc", "second document", "more"]
+    assert vector_store.index.ntotal == 3
+    assert counting_embedding_model.batches == [["first doc"], ["second document", "more"]]
+    assert vector_store.document_ids() == ["a", "b"]
+
+def test_chunk_ids_grow_in_place_across_micro_batches(counting_embedding_model):
+    vector_store = LocalVectorStore(counting_embedding_model)
+    vector_store.add_documents(["page 0"], doc_id="0")
+    buffer = vector_store.chunk_ids.base
+    for page in range(1, 200):
+        vector_store.add_documents([f"page {page}"], doc_id=str(page))
+
+    # Appends reuse spare capacity instead of copying every id each time
+    assert vector_store.chunk_ids.base is buffer
+    assert list(vector_store.chunk_ids) == list(range(200))
+    assert vector_store._positions([123]).tolist() == [123]
+
+def test_delete_document_excludes_chunks_from_search(counting_embedding_model):
+    vector_store = LocalVectorStore(counting_embedding_model, compact_threshold=1.0)
+    vector_store.add_documents(["keep me", "keep this too"], doc_id="a")
+    vector_store.add_documents(["delete me"], doc_id="b")
+
+    assert vector_store.delete_document("b") == 1
+    results = vector_store.similarity_search("delete me", k=3)
+
+    assert "delete me" not in results
+    assert sorted(results) == ["keep me", "keep this too"]
+    assert vector_store.document_ids() == ["a"]
+
+def test_compaction_removes_deleted_chunks(counting_embedding_model):
+    vector_store = LocalVectorStore(counting_embedding_model, compact_threshold=0.5)
+    vector_store.add_documents(["alpha", "beta"], doc_id="a")
+    vector_store.add_documents(["gamma", "delta"], doc_id="b")
+
+    vector_store.delete_document("a")
+    vector_store.wait_for_compaction()
+
+    assert list(vector_store.chunks) == ["gamma", "delta"]
+    assert vector_store.index.ntotal == 2
+    assert vector_store.embeddings.shape == (2, 5)
+    assert sorted(vector_store.similarity_search("alpha", k=4)) == ["delta", "gamma"]
+
+    # New chunks keep getting fresh ids after compaction
+    vector_store.add_documents(["epsilon"], doc_id="c")
+    assert vector_store.similarity_search("epsilon", k=1) == ["epsilon"]
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load_round_trip(tmp_path, counting_embedding_model, mmap):
+    vector_store = LocalVectorStore(counting_embedding_model)
+    vector_store.add_documents(["alpha", "a longer beta"], doc_id="a")
+    vector_store.save(tmp_path / "store")
+
+    loaded = LocalVectorStore.load(tmp_path / "store", counting_embedding_model, mmap=mmap)
+
+    assert list(loaded.chunks) == ["alpha", "a longer beta"]
+    assert loaded.document_ids() == ["a"]
+    assert loaded._index_is_mmapped == mmap
+    np.testing.assert_array_equal(loaded.embeddings, vector_store.embeddings)
+    assert loaded.similarity_search("alpha", k=1) == ["alpha"]
+
+def test_mmap_loaded_store_accepts_new_documents(tmp_path, counting_embedding_model):
+    vector_store = LocalVectorStore(counting_embedding_model)
+    vector_store.add_documents(["alpha"], doc_id="a")
+    vector_store.save(tmp_path / "store")
+
+    loaded = LocalVectorStore.load(tmp_path / "store", counting_embedding_model, mmap=True)
+    loaded.add_documents(["a much longer gamma"], doc_id="b")
+
+    assert loaded.index.ntotal == 2
+    assert loaded.similarity_search("a much longer gamma", k=1) == ["a much longer gamma"]
+
+def test_similarity_search_batch_returns_hits_with_metadata(counting_embedding_model):
+    from langchain.schema import Document
+
+    vector_store = LocalVectorStore(counting_embedding_model)
+    vector_store.add_documents([
+        Document(page_content="abc", metadata={"source": "report.pdf", "page": 0}),
+        Document(page_content="a longer chunk", metadata={"source": "report.pdf", "page": 3}),
+    ], doc_id="report")
+    counting_embedding_model.batches.clear()
+
+    results = vector_store.similarity_search_batch(["abc", "a longer chunk"], k=2)
+
+    # Both queries are encoded in one call
+    assert counting_embedding_model.batches == [["abc", "a longer chunk"]]
+    assert [hit.text for hit in results[0]] == ["abc", "a longer chunk"]
+    best = results[1][0]
+    assert best.text == "a longer chunk"
+    assert best.score == 0.0
+    assert best.doc_id == "report"
+    assert (best.source, best.page) == ("report.pdf", 3)
+    assert results[0][0].score <= results[0][1].score
+
+def test_query_cache_skips_encoding_repeated_questions(counting_embedding_model):
+    from src.database.embedding_cache import EmbeddingCache
+
+    vector_store = LocalVectorStore(counting_embedding_model, query_cache=EmbeddingCache("model", max_entries=8))
+    vector_store.add_documents(["abc", "a longer chunk"], doc_id="a")
+    counting_embedding_model.batches.clear()
+
+    first = vector_store.similarity_search("abc", k=1)
+    second = vector_store.similarity_search("abc ", k=1)
+
+    assert first == second == ["abc"]
+    assert counting_embedding_model.batches == [["abc"]]
+    assert vector_store.query_cache.stats()["hits"] == 1
+
+def test_hybrid_search_finds_exact_identifiers_and_times_retrievers(counting_embedding_model):
+    # Every chunk has the same length, so the mock embeddings cannot tell them apart
+    vector_store = LocalVectorStore(counting_embedding_model)
+    vector_store.add_documents(["part AB-1234", "part CD-9876", "part EF-5555"], doc_id="a")
+
+    timings = {}
+    hits = vector_store.hybrid_search_batch(["CD-9876 stock"], k=2, timings=timings)[0]
+
+    assert hits[0].text == "part CD-9876"
+    assert hits[0].score > hits[1].score
+    assert set(timings) == {"dense", "encode", "search", "lexical", "fusion"}
+
+def test_hybrid_search_skips_deleted_documents(counting_embedding_model):
+    vector_store = LocalVectorStore(counting_embedding_model, compact_threshold=1.0)
+    vector_store.add_documents(["part AB-1234"], doc_id="a")
+    vector_store.add_documents(["part AB-1235"], doc_id="b")
+    vector_store.delete_document("a")
+
+    hits = vector_store.hybrid_search_batch(["AB-1234"], k=2)[0]
+
+    assert [hit.doc_id for hit in hits] == ["b"]
+
+def test_loaded_store_builds_bm25_on_first_hybrid_search(tmp_path, counting_embedding_model):
+    vector_store = LocalVectorStore(counting_embedding_model, compact_threshold=1.0)
+    vector_store.add_documents(["part AB-1234", "part CD-9876"], doc_id="a")
+    vector_store.save(tmp_path / "store")
+
+    loaded = LocalVectorStore.load(tmp_path / "store", counting_embedding_model)
+    loaded.compact_threshold = 1.0
+    # Loading does not tokenize anything; later changes wait for the rebuild
+    assert len(loaded.lexical_index) == 0
+    loaded.add_documents(["part EF-5555"], doc_id="b")
+    loaded.delete_document("a")
+    hits = loaded.hybrid_search_batch(["EF-5555"], k=3)[0]
+
+    assert len(loaded.lexical_index) == 3
+    assert hits[0].text == "part EF-5555"
+    assert [hit.doc_id for hit in hits] == ["b"]
+
+@pytest.mark.parametrize("storage,tolerance", [("float32", 0.0), ("float16", 1e-2), ("int8", 0.5)])
+def test_compact_storage_keeps_one_copy_and_round_trips(tmp_path, counting_embedding_model, storage, tolerance):
+    vector_store = LocalVectorStore(counting_embedding_model, storage=storage)
+    vector_store.add_documents(["alpha", "a longer beta", "the longest gamma of all"], doc_id="a")
+    vector_store.save(tmp_path / "store")
+
+    loaded = LocalVectorStore.load(tmp_path / "store", counting_embedding_model)
+
+    assert sorted(path.name for path in (tmp_path / "store").iterdir()) == sorted(
+        ["chunks.json", "index.faiss", *ChunkStore.FILES]
+    )
+    assert loaded.storage == storage
+    expected = counting_embedding_model.encode(["alpha", "a longer beta", "the longest gamma of all"])
+    np.testing.assert_allclose(loaded.embeddings, expected, atol=tolerance)
+    assert loaded.similarity_search("the longest gamma of all", k=1) == ["the longest gamma of all"]
+
+def test_int8_storage_uses_less_memory_per_chunk(counting_embedding_model):
+    float32_store = LocalVectorStore(counting_embedding_model)
+    int8_store = LocalVectorStore(counting_embedding_model, storage="int8")
+    for vector_store in (float32_store, int8_store):
+        vector_store.add_documents([f"chunk {'x' * i}" for i in range(200)])
+
+    assert int8_store.memory_per_chunk() < float32_store.memory_per_chunk()
+
+def test_int8_storage_never_clips_vectors_added_later():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((64, 16)).astype('float32')
+    vectors[:8] *= 0.1  # The first micro-batch spans a much narrower range
+    table = {f"chunk {i}": vector for i, vector in enumerate(vectors)}
+    embedding_model = MagicMock()
+    embedding_model.encode.side_effect = lambda texts: np.array([table[text] for text in texts])
+
+    vector_store = LocalVectorStore(embedding_model, storage="int8")
+    for start in range(0, 64, 8):
+        vector_store.add_documents([f"chunk {i}" for i in range(start, start + 8)], doc_id=str(start))
+    hits = vector_store.similarity_search_batch(list(table), k=1)
+
+    assert np.abs(vector_store.embeddings - vectors).max() < 0.1
+    assert [hit[0].chunk_id for hit in hits] == list(range(64))